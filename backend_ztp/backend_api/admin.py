@@ -3,7 +3,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.db.models import Count, Q
 
-from .models import Item, Receipt
+from .models import Instrument, Item, Job, Receipt
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
@@ -31,3 +31,15 @@ class ReceiptAdmin(admin.ModelAdmin):
         "payment_date",
     )  # Filtry po typie transakcji i dacie
     # filter_horizontal = ("items",)  # Interfejs do zarządzania relacją ManyToMany
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "user", "status", "attempts", "run_after", "finished_at")
+    list_filter = ("status", "task")
+
+
+@admin.register(Instrument)
+class InstrumentAdmin(admin.ModelAdmin):
+    list_display = ("symbol", "name", "currency", "current_price", "price_updated_at")
+    search_fields = ("symbol", "name")
@@ -0,0 +1,199 @@
+# backend_api/aggregations.py
+from collections import defaultdict
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Q, Sum
+
+from backend_api.models import MonthlyRollup
+
+
+def _as_float(value):
+    # Brak pozycji danego typu zostawiamy jako int 0, tak jak w odpowiedzi JSON
+    return float(value) if value is not None else 0
+
+
+def _month_rollups(user, selected_year, selected_month):
+    return MonthlyRollup.objects.filter(
+        user=user, year=selected_year, month=selected_month
+    )
+
+
+def _daily_rows(user, selected_year, selected_month):
+    return (
+        _month_rollups(user, selected_year, selected_month)
+        .values("day")
+        .annotate(
+            expense=Sum("value_sum", filter=Q(transaction_type="expense")),
+            income=Sum("value_sum", filter=Q(transaction_type="income")),
+        )
+        .order_by("day")
+    )
+
+
+def _daily_sums(rows, selected_year, selected_month):
+    daily = {}
+    for row in rows:
+        day_str = f"{selected_year}-{selected_month:02d}-{row['day']:02d}"
+        daily[day_str] = (_as_float(row["expense"]), _as_float(row["income"]))
+    return daily
+
+
+def daily_transaction_sums(user, selected_year, selected_month):
+    """
+    Dzienne sumy wydatków i przychodów użytkownika w danym miesiącu.
+
+    Jedno zapytanie GROUP BY dzień po tabeli rollup, z podziałem na typ transakcji
+    przez agregację warunkową. Zwraca słownik {"YYYY-MM-DD": (expense, income)}.
+    """
+    rows = _daily_rows(user, selected_year, selected_month)
+    return _daily_sums(rows, selected_year, selected_month)
+
+
+async def adaily_transaction_sums(user, selected_year, selected_month):
+    """``daily_transaction_sums`` przez async ORM (to samo zapytanie)."""
+    # ``async for`` po QuerySet pobiera cały wynik jednym przejściem do wątku;
+    # aiterator() dla values_list() z adnotacjami wykonuje zapytanie w pętli zdarzeń
+    rows = [row async for row in _daily_rows(user, selected_year, selected_month)]
+    return _daily_sums(rows, selected_year, selected_month)
+
+
+def cumulative_series(all_dates, daily):
+    """
+    Narastające sumy wydatków i przychodów dla każdego dnia z ``all_dates``.
+
+    Dni bez transakcji dostają wartość z poprzedniego dnia.
+    """
+    expenses = accumulate(daily.get(day, (0, 0))[0] for day in all_dates)
+    incomes = accumulate(daily.get(day, (0, 0))[1] for day in all_dates)
+    return [
+        {
+            "day": day_str,
+            "expense": round(expense, 2),
+            "income": round(income, 2),
+        }
+        for day_str, expense, income in zip(all_dates, expenses, incomes)
+    ]
+
+
+def _category_sums(user, selected_year, selected_month):
+    return (
+        _month_rollups(user, selected_year, selected_month)
+        .filter(transaction_type="expense")
+        .values("category")
+        .annotate(expense_sum=Sum("value_sum"))
+        .order_by("category")
+        .values_list("category", "expense_sum")
+    )
+
+
+def category_expense_sums(user, selected_year, selected_month):
+    """
+    Suma wydatków użytkownika w danym miesiącu pogrupowana po kategorii.
+
+    Jedno zapytanie GROUP BY category po tabeli rollup.
+    Zwraca listę gotową do wysłania jako JSON, posortowaną po kategorii.
+    """
+    return _category_rows(_category_sums(user, selected_year, selected_month))
+
+
+async def acategory_expense_sums(user, selected_year, selected_month):
+    """``category_expense_sums`` przez async ORM (to samo zapytanie)."""
+    sums = _category_sums(user, selected_year, selected_month)
+    return _category_rows([row async for row in sums])
+
+
+def _category_rows(sums):
+    return [
+        {
+            "category": category,
+            "expense_sum": round(float(expense_sum), 2),
+            "fill": f"var(--color-{category})",
+        }
+        for category, expense_sum in sums
+    ]
+
+
+def _shop_sums(user, selected_year, selected_month, categories):
+    return (
+        _month_rollups(user, selected_year, selected_month)
+        .filter(transaction_type="expense", category__in=categories)
+        .values("shop")
+        .annotate(expense_sum=Sum("value_sum"))
+        .order_by("-expense_sum")
+        .values_list("shop", "expense_sum")
+    )
+
+
+def shop_expense_sums(user, selected_year, selected_month, categories):
+    """
+    Suma wydatków użytkownika w danym miesiącu pogrupowana po sklepie,
+    ograniczona do ``categories``. Posortowana malejąco po sumie.
+    """
+    return _shop_rows(_shop_sums(user, selected_year, selected_month, categories))
+
+
+async def ashop_expense_sums(user, selected_year, selected_month, categories):
+    """``shop_expense_sums`` przez async ORM (to samo zapytanie)."""
+    sums = _shop_sums(user, selected_year, selected_month, categories)
+    return _shop_rows([row async for row in sums])
+
+
+def _shop_rows(sums):
+    return [
+        {"shop": shop, "expense_sum": round(float(expense_sum), 2)}
+        for shop, expense_sum in sums
+    ]
+
+
+def _dashboard_rows(user, selected_year, selected_month):
+    return _month_rollups(user, selected_year, selected_month).values_list(
+        "day", "transaction_type", "category", "shop", "value_sum"
+    )
+
+
+def _dashboard_sums(rows, selected_year, selected_month, categories):
+    daily = defaultdict(lambda: {"expense": None, "income": None})
+    by_category = defaultdict(Decimal)
+    by_shop = defaultdict(Decimal)
+    categories = set(categories)
+
+    for day, transaction_type, category, shop, value_sum in rows:
+        day_sums = daily[day]
+        day_sums[transaction_type] = (day_sums[transaction_type] or 0) + value_sum
+        if transaction_type == "expense":
+            by_category[category] += value_sum
+            if category in categories:
+                by_shop[shop] += value_sum
+
+    daily_sums = {
+        f"{selected_year}-{selected_month:02d}-{day:02d}": (
+            _as_float(sums["expense"]),
+            _as_float(sums["income"]),
+        )
+        for day, sums in sorted(daily.items())
+    }
+    return (
+        daily_sums,
+        _category_rows(sorted(by_category.items())),
+        _shop_rows(sorted(by_shop.items(), key=lambda entry: entry[1], reverse=True)),
+    )
+
+
+def dashboard_sums(user, selected_year, selected_month, categories):
+    """
+    Dane wszystkich trzech wykresów miesiąca z jednego odczytu tabeli rollup.
+
+    Wiersze (dzień, typ, kategoria, sklep, suma) są czytane raz i w jednym
+    przebiegu rozkładane na sumy dzienne, sumy kategorii i sumy sklepów
+    (ograniczone do ``categories``). Wyniki mają ten sam format co
+    ``daily_transaction_sums``, ``category_expense_sums`` i ``shop_expense_sums``.
+    """
+    rows = _dashboard_rows(user, selected_year, selected_month)
+    return _dashboard_sums(rows, selected_year, selected_month, categories)
+
+
+async def adashboard_sums(user, selected_year, selected_month, categories):
+    """``dashboard_sums`` przez async ORM (ten sam jeden odczyt)."""
+    rows = [row async for row in _dashboard_rows(user, selected_year, selected_month)]
+    return _dashboard_sums(rows, selected_year, selected_month, categories)
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class BackendApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend_api"
+
+    def ready(self):
+        from django.core import checks
+
+        from backend_api.authentication import connect_signals
+        from backend_api.routers import check_replica_pin_cache
+        # rejestracja rozszerzeń drf-spectacular (schemat jwtAuth)
+        import backend_api.schema  # noqa: F401
+
+        connect_signals()
+        checks.register(check_replica_pin_cache, checks.Tags.caches)
@@ -0,0 +1,190 @@
+# backend_api/authentication.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    Użytkownicy rozpoznani z tokenów JWT, w pamięci procesu.
+
+    - wpis żyje AUTH_USER_CACHE_TTL sekund (0 wyłącza cache),
+    - najwyżej AUTH_USER_CACHE_SIZE wpisów, najstarsze usuwane LRU,
+    - zapis lub usunięcie użytkownika (zmiana hasła, dezaktywacja, DELETE
+      /auth/users/me/) usuwa wpis w tym procesie; inne procesy widzą zmianę
+      najpóźniej po TTL,
+    - ``get`` i ``set`` operują na kopiach (``copy.copy`` kopiuje też ``_state``
+      z cache relacji), więc zmiany ``request.user`` w jednym żądaniu nie są
+      widoczne w innych, także równoległych wątkach.
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._users)
+
+    # claim w tokenie to tekst ("5"), a sygnały podają pk (5)
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            cached = self._users.get(key)
+            if cached is None:
+                return None
+            user, expires_at = cached
+            if time.monotonic() >= expires_at:
+                del self._users[key]
+                return None
+            self._users.move_to_end(key)
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return
+        key = str(user_id)
+        user = copy.copy(user)
+        with self._lock:
+            self._users[key] = (user, time.monotonic() + settings.AUTH_USER_CACHE_TTL)
+            self._users.move_to_end(key)
+            while len(self._users) > settings.AUTH_USER_CACHE_SIZE:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+def _revoked_key(user_id):
+    return f"jwt-revoked:{user_id}"
+
+
+def _revoke(user_id, code):
+    # tokeny dostępu tego użytkownika tracą ważność najpóźniej po ACCESS_TOKEN_LIFETIME
+    cache.set(_revoked_key(user_id), code, api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def _invalidate_user(sender, instance, **kwargs):
+    user_cache.invalidate(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+def _user_saved(sender, instance, **kwargs):
+    _invalidate_user(sender, instance)
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    if instance.is_active:
+        cache.delete(_revoked_key(user_id))
+    else:
+        _revoke(user_id, "user_inactive")
+
+
+def _user_deleted(sender, instance, **kwargs):
+    _invalidate_user(sender, instance)
+    _revoke(getattr(instance, api_settings.USER_ID_FIELD), "user_not_found")
+
+
+def connect_signals():
+    user_model = get_user_model()
+    post_save.connect(_user_saved, sender=user_model, dispatch_uid="user_cache_save")
+    post_delete.connect(_user_deleted, sender=user_model, dispatch_uid="user_cache_delete")
+
+
+def _user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken("Token contained no recognizable user identification") from e
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` z użytkownikiem z ``user_cache``: zapytanie do auth_user
+    tylko przy pierwszym żądaniu użytkownika w procesie i po wygaśnięciu wpisu.
+    Sprawdzenia simplejwt (nieaktywny użytkownik, unieważnienie po zmianie hasła)
+    działają jak w klasie bazowej, bo wpis powstaje z ``super().get_user``.
+    """
+
+    def authenticate_cached(self, request):
+        """
+        ``authenticate`` bez bazy: ``(user, token)``, gdy użytkownika nie trzeba
+        czytać z bazy, inaczej ``None``. Widoki async tylko przy ``None``
+        przechodzą do wątku z pełnym ``authenticate``.
+        """
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = self.cached_user(validated_token)
+        return (user, validated_token) if user is not None else None
+
+    def cached_user(self, validated_token):
+        user = user_cache.get(_user_id(validated_token))
+        if (
+            user is not None
+            and api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            # token wystawiony przed zmianą hasła, a wpis już po niej
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        return user
+
+    def get_user(self, validated_token):
+        user = self.cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(_user_id(validated_token), user)
+        return user
+
+
+class StatelessReadJWTAuthentication(CachedJWTAuthentication):
+    """
+    Dla widoków tylko do odczytu (fetch/*, GET wyszukiwarek).
+
+    Przy JWT_STATELESS_READS GET/HEAD ufają podpisanym claimom tokenu: użytkownik
+    to niezapisana instancja z samym ``id``, bez bazy i ``user_cache``. Usunięcie
+    lub dezaktywacja konta zostawia w cache Django znacznik na ACCESS_TOKEN_LIFETIME,
+    więc takie tokeny dostają 401 (``user_not_found`` / ``user_inactive``); przy
+    cache lokalnym dla procesu inne procesy odrzucają je dopiero po wygaśnięciu
+    tokenu. Pozostałe metody idą przez ``CachedJWTAuthentication``.
+    """
+
+    stateless = False
+
+    def authenticate(self, request):
+        self.stateless = settings.JWT_STATELESS_READS and request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_cached(self, request):
+        self.stateless = settings.JWT_STATELESS_READS and request.method in SAFE_METHODS
+        return super().authenticate_cached(request)
+
+    def cached_user(self, validated_token):
+        if not self.stateless:
+            return super().cached_user(validated_token)
+        user_id = _user_id(validated_token)
+        code = cache.get(_revoked_key(user_id))
+        if code == "user_not_found":
+            raise AuthenticationFailed("User not found", code=code)
+        if code == "user_inactive":
+            raise AuthenticationFailed("User is inactive", code=code)
+        user = self.user_model(**{api_settings.USER_ID_FIELD: user_id, "is_active": True})
+        user._state.adding = False
+        return user
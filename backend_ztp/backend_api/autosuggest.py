@@ -0,0 +1,292 @@
+# backend_api/autosuggest.py
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from backend_api.models import ItemPrediction, RecentShop, UserDataVersion
+
+# Przybliżony koszt pamięci węzła drzewa i wpisu (bajty), do limitu AUTOSUGGEST_MEMORY_CAP_MB
+NODE_BYTES = 120
+ENTRY_BYTES = 250
+
+
+class PrefixTrie:
+    """
+    Drzewo prefiksowe słów z wpisami rangowanymi po ``rank`` (mniejszy = lepszy).
+
+    Każdy wpis jest indeksowany od początku każdego słowa, więc "mleko" znajdzie
+    zarówno "mleko łaciate", jak i "jogurt mleko". Głębokość drzewa jest ograniczona
+    do ``max_depth`` znaków; dłuższe zapytania są doweryfikowane na tekście wpisu.
+    Wpisy można nadpisywać (nowa ranga) i usuwać bez przebudowy drzewa.
+    """
+    __slots__ = ("root", "entries", "positions", "node_count", "max_depth")
+
+    def __init__(self, max_depth=8):
+        self.root = {}
+        self.entries = []
+        self.positions = {}
+        self.node_count = 1
+        self.max_depth = max_depth
+
+    @property
+    def approx_bytes(self):
+        return self.node_count * NODE_BYTES + len(self.entries) * ENTRY_BYTES
+
+    def add(self, text, rank, payload):
+        entry_id = self.positions.get(text)
+        if entry_id is not None:
+            self.entries[entry_id] = (rank, text, payload)
+            return
+
+        entry_id = len(self.entries)
+        self.entries.append((rank, text, payload))
+        self.positions[text] = entry_id
+        words = text.split()
+        for index in range(len(words)):
+            node = self.root
+            for char in " ".join(words[index:])[:self.max_depth]:
+                child = node.get(char)
+                if child is None:
+                    child = node[char] = {}
+                    self.node_count += 1
+                node = child
+            node.setdefault(None, []).append(entry_id)
+
+    def remove(self, text):
+        entry_id = self.positions.pop(text, None)
+        if entry_id is not None:
+            self.entries[entry_id] = None
+
+    def search(self, prefix, limit):
+        node = self.root
+        for char in prefix[:self.max_depth]:
+            node = node.get(char)
+            if node is None:
+                return []
+
+        found = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for key, child in current.items():
+                if key is None:
+                    found.update(entry_id for entry_id in child if self.entries[entry_id])
+                else:
+                    stack.append(child)
+
+        if len(prefix) > self.max_depth:
+            found = {
+                entry_id
+                for entry_id in found
+                if f" {self.entries[entry_id][1]}".find(f" {prefix}") >= 0
+            }
+        best = heapq.nsmallest(limit, found, key=lambda entry_id: self.entries[entry_id][0])
+        return [self.entries[entry_id][2] for entry_id in best]
+
+    def first(self, limit):
+        """Pierwsze ``limit`` wpisów alfabetycznie po tekście (lista bez zapytania)."""
+        return [self.entries[self.positions[text]][2] for text in heapq.nsmallest(limit, self.positions)]
+
+
+def _prediction_rank(description, frequency):
+    return (-frequency, description)
+
+
+def _shop_rank(name, last_used):
+    return (-last_used.timestamp(), name)
+
+
+class UserSuggestions:
+    """Sugestie jednego użytkownika: opisy pozycji i sklepy."""
+    __slots__ = ("predictions", "shops", "version", "checked_at")
+
+    def __init__(self, version):
+        self.predictions = PrefixTrie()
+        self.shops = PrefixTrie()
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    @property
+    def approx_bytes(self):
+        return self.predictions.approx_bytes + self.shops.approx_bytes
+
+    @classmethod
+    def load(cls, user_id, version):
+        suggestions = cls(version)
+        predictions = ItemPrediction.objects.filter(user_id=user_id).values_list(
+            "item_description", "frequency"
+        )
+        for description, frequency in predictions.iterator():
+            suggestions.set_prediction(description, frequency)
+        shops = RecentShop.objects.filter(user_id=user_id).values_list("id", "name", "last_used")
+        for shop_id, name, last_used in shops.iterator():
+            suggestions.set_shop(shop_id, name, last_used)
+        return suggestions
+
+    def set_prediction(self, description, frequency):
+        self.predictions.add(
+            description, _prediction_rank(description, frequency), (description, frequency)
+        )
+
+    def set_shop(self, shop_id, name, last_used):
+        self.shops.add(name, _shop_rank(name, last_used), (shop_id, name))
+
+
+class AutosuggestIndex:
+    """
+    Indeks sugestii w pamięci procesu, po jednym ``UserSuggestions`` na użytkownika.
+
+    - ładowany leniwie z ItemPrediction i RecentShop przy pierwszym zapytaniu,
+    - aktualizowany przyrostowo z zapisów paragonów (``record``),
+    - wersja danych sprawdzana w bazie najwyżej raz na AUTOSUGGEST_REFRESH_SECONDS,
+      więc zmiany z innych procesów pojawiają się z takim opóźnieniem,
+    - usuwany LRU, gdy łączny rozmiar przekroczy AUTOSUGGEST_MEMORY_CAP_MB.
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def approx_bytes(self):
+        with self._lock:
+            return sum(entry.approx_bytes for entry in self._users.values())
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def _current_version(self, user_id):
+        version = (
+            UserDataVersion.objects.filter(user_id=user_id)
+            .values_list("version", flat=True)
+            .first()
+        )
+        return version.hex if version else None
+
+    def _touch(self, user_id):
+        # (wpis, czy sprawdzony w ciągu AUTOSUGGEST_REFRESH_SECONDS)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None, False
+            self._users.move_to_end(user_id)
+            return entry, time.monotonic() - entry.checked_at < settings.AUTOSUGGEST_REFRESH_SECONDS
+
+    def get(self, user_id):
+        entry, fresh = self._touch(user_id)
+        if fresh:
+            return entry
+
+        version = self._current_version(user_id)
+        if entry is not None and entry.version == version:
+            entry.checked_at = time.monotonic()
+            return entry
+
+        entry = UserSuggestions.load(user_id, version)
+        with self._lock:
+            self._users[user_id] = entry
+            self._users.move_to_end(user_id)
+            self._evict()
+        return entry
+
+    def _evict(self):
+        cap = settings.AUTOSUGGEST_MEMORY_CAP_MB * 1024 * 1024
+        total = sum(entry.approx_bytes for entry in self._users.values())
+        # najnowszy wpis zostaje nawet, jeśli sam przekracza limit
+        while total > cap and len(self._users) > 1:
+            _, evicted = self._users.popitem(last=False)
+            total -= evicted.approx_bytes
+
+    def search_predictions(self, user_id, query, limit):
+        entry = self.get(user_id)
+        with self._lock:
+            return entry.predictions.search(query, limit)
+
+    def search_shops(self, user_id, query, limit):
+        entry = self.get(user_id)
+        with self._lock:
+            return entry.shops.search(query, limit)
+
+    def list_predictions(self, user_id, limit):
+        entry = self.get(user_id)
+        with self._lock:
+            return entry.predictions.first(limit)
+
+    def list_shops(self, user_id, limit):
+        entry = self.get(user_id)
+        with self._lock:
+            return entry.shops.first(limit)
+
+    async def aget(self, user_id):
+        """
+        ``get`` dla widoków async: świeży wpis jest zwracany bez opuszczania
+        pętli zdarzeń, a sprawdzenie wersji i ładowanie idą do wątku.
+        """
+        entry, fresh = self._touch(user_id)
+        if fresh:
+            return entry
+        return await sync_to_async(self.get)(user_id)
+
+    async def asearch_predictions(self, user_id, query, limit):
+        entry = await self.aget(user_id)
+        with self._lock:
+            return entry.predictions.search(query, limit)
+
+    async def asearch_shops(self, user_id, query, limit):
+        entry = await self.aget(user_id)
+        with self._lock:
+            return entry.shops.search(query, limit)
+
+    async def alist_predictions(self, user_id, limit):
+        entry = await self.aget(user_id)
+        with self._lock:
+            return entry.predictions.first(limit)
+
+    async def alist_shops(self, user_id, limit):
+        entry = await self.aget(user_id)
+        with self._lock:
+            return entry.shops.first(limit)
+
+    def record(self, user_id, predictions=None, shops=None, versions=None):
+        """
+        Nanosi zapisane wartości na załadowany indeks użytkownika.
+
+        ``predictions``: {opis: częstotliwość} (0 usuwa opis), ``shops``: [(id, nazwa, last_used)].
+        ``versions``: ``(poprzednia, nowa)`` z ``bump_data_version``. Wpis w wersji
+        poprzedniej przejmuje nową, więc kolejne sprawdzenie nie przeładowuje indeksu;
+        wpis w innej wersji nie widział cudzych zapisów i jest usuwany.
+        Użytkownicy spoza pamięci są pomijani – zostaną załadowani przy odczycie.
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            if versions is not None:
+                previous, version = versions
+                if entry.version != previous:
+                    del self._users[user_id]
+                    return
+                entry.version = version
+            for description, frequency in (predictions or {}).items():
+                if frequency > 0:
+                    entry.set_prediction(description, frequency)
+                else:
+                    entry.predictions.remove(description)
+            for shop_id, name, last_used in shops or []:
+                entry.set_shop(shop_id, name, last_used)
+            self._evict()
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+autosuggest_index = AutosuggestIndex()
@@ -0,0 +1,475 @@
+# backend_api/benchmarks.py
+import json
+import math
+import random
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend_api.fingerprints import receipt_fingerprint, receipt_total
+from backend_api.models import Item, ItemPrediction, MonthlyRollup, Receipt, RecentShop
+from backend_api.outliers import OUTLIER_MODES
+from backend_api.rollups import rebuild_rollups
+
+BENCH_SHOPS = ["biedronka", "lidl", "orlen", "zabka", "kaufland", "rossmann", "media markt"]
+BENCH_EXPENSE_CATEGORIES = [
+    "fuel", "car_expenses", "fastfood", "alcohol", "food_drinks", "chemistry",
+    "clothes", "electronics_games", "tickets_entrance", "delivery", "other_shopping",
+]
+BENCH_INCOME_CATEGORIES = ["work_income", "family_income", "investments_income"]
+
+
+def seed_month(user, n_items, year, month, items_per_receipt=10, batch_size=5000, seed=0):
+    """
+    Tworzy ``n_items`` pozycji użytkownika rozłożonych na paragony z jednego miesiąca.
+
+    Paragony i pozycje wstawiane są przez ``bulk_create`` w paczkach po
+    ``batch_size``. Co dziesiąty paragon jest przychodem. Rollupy użytkownika
+    są przebudowywane na końcu, bo ``bulk_create`` omija ich utrzymanie.
+    """
+    rng = random.Random(seed)
+    days = [date(year, month, day) for day in range(1, 29)]
+    n_receipts = max(1, -(-n_items // items_per_receipt))
+
+    receipts = Receipt.objects.bulk_create(
+        [
+            Receipt(
+                user=user,
+                shop=rng.choice(BENCH_SHOPS),
+                transaction_type="income" if i % 10 == 0 else "expense",
+                payment_date=rng.choice(days),
+            )
+            for i in range(n_receipts)
+        ],
+        batch_size=batch_size,
+    )
+
+    batch = []
+    created = 0
+    for i in range(n_items):
+        receipt = receipts[i // items_per_receipt]
+        categories = (
+            BENCH_INCOME_CATEGORIES
+            if receipt.transaction_type == "income"
+            else BENCH_EXPENSE_CATEGORIES
+        )
+        batch.append(
+            Item(
+                user=user,
+                receipt=receipt,
+                category=rng.choice(categories),
+                value=round(rng.uniform(1, 300), 2),
+                description=f"item {rng.randint(1, 500)}",
+            )
+        )
+        if len(batch) >= batch_size:
+            Item.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        Item.objects.bulk_create(batch)
+        created += len(batch)
+    rebuild_rollups(user)
+    return created
+
+
+def measure(func, repeat=5):
+    """
+    Wywołuje ``func`` ``repeat`` razy i zwraca liczbę zapytań SQL oraz czasy (ms).
+    """
+    timings = []
+    query_count = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        query_count = len(ctx.captured_queries)
+    return {
+        "queries": query_count,
+        "min_ms": round(min(timings), 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "max_ms": round(max(timings), 2),
+    }
+
+
+# Realistyczne dane: (kategoria, zakres kwot, opisy) i sklepy z wagami popularności
+SEED_SHOPS = [
+    ("biedronka", 30), ("lidl", 25), ("żabka", 15), ("kaufland", 8), ("carrefour", 6),
+    ("orlen", 6), ("bp", 3), ("rossmann", 5), ("hebe", 2), ("media markt", 1),
+    ("allegro", 6), ("mcdonald's", 4), ("kfc", 2), ("ikea", 1), ("pepco", 2),
+]
+SEED_EXPENSES = [
+    ("food_drinks", (1, 40), ["mleko", "chleb", "masło", "jajka", "ser żółty", "jogurt naturalny",
+                              "pomidory", "banany", "jabłka", "woda mineralna", "kawa ziarnista",
+                              "makaron", "ryż", "kurczak filet", "szynka", "sok pomarańczowy"]),
+    ("chemistry", (3, 60), ["proszek do prania", "płyn do naczyń", "papier toaletowy", "szampon",
+                            "pasta do zębów", "mydło", "ręczniki papierowe"]),
+    ("fastfood", (8, 60), ["burger", "frytki", "kebab", "pizza", "zestaw powiększony"]),
+    ("fuel", (120, 380), ["pb95", "on", "lpg"]),
+    ("alcohol", (4, 90), ["piwo", "wino czerwone", "wódka"]),
+    ("clothes", (30, 400), ["koszulka", "spodnie", "buty sportowe", "kurtka"]),
+    ("electronics_games", (40, 2500), ["słuchawki", "ładowarka", "gra", "mysz"]),
+    ("other_shopping", (5, 300), ["prezent", "doniczka", "długopisy", "kubek"]),
+    ("delivery", (5, 25), ["dostawa"]),
+]
+SEED_INCOMES = [
+    ("work_income", (4000, 12000), ["wynagrodzenie"]),
+    ("family_income", (100, 1500), ["przelew od rodziny"]),
+    ("money_back", (10, 300), ["zwrot"]),
+]
+
+
+def _seed_user_receipts(user, n_items, rng, start, days, items_per_receipt, batch_size):
+    shops, shop_weights = zip(*SEED_SHOPS)
+    receipts_per_chunk = max(1, batch_size // items_per_receipt)
+    created_receipts = 0
+    created_items = 0
+    while created_items < n_items:
+        receipts = Receipt.objects.bulk_create(
+            [
+                Receipt(
+                    user=user,
+                    shop=rng.choices(shops, shop_weights)[0],
+                    # co ~25. paragon to przychód
+                    transaction_type="income" if rng.random() < 0.04 else "expense",
+                    payment_date=start + timedelta(days=rng.randrange(days)),
+                )
+                for _ in range(receipts_per_chunk)
+            ]
+        )
+
+        batch = []
+        used = 0
+        for receipt in receipts:
+            remaining = n_items - created_items - len(batch)
+            if remaining <= 0:
+                break
+            used += 1
+            if receipt.transaction_type == "income":
+                count, catalog = 1, SEED_INCOMES
+            else:
+                count = rng.randint(1, 2 * items_per_receipt - 1)
+                catalog = SEED_EXPENSES
+            for _ in range(min(count, remaining)):
+                category, (low, high), descriptions = rng.choice(catalog)
+                batch.append(
+                    Item(
+                        user=user,
+                        receipt=receipt,
+                        category=category,
+                        value=round(rng.uniform(low, high), 2),
+                        description=rng.choice(descriptions),
+                        quantity=rng.choice((1, 1, 1, 2, 3)),
+                    )
+                )
+        Item.objects.bulk_create(batch, batch_size=batch_size)
+        receipt_items = defaultdict(list)
+        for item in batch:
+            receipt_items[item.receipt_id].append(item)
+        for receipt in receipts[:used]:
+            receipt.fingerprint = receipt_fingerprint(
+                receipt.payment_date, receipt.shop, receipt.transaction_type, receipt_items[receipt.pk]
+            )
+            receipt.total = receipt_total(receipt_items[receipt.pk])
+        Receipt.objects.bulk_update(receipts[:used], ["fingerprint", "total"], batch_size=batch_size)
+        created_items += len(batch)
+        created_receipts += used
+        # paragony z ostatniej paczki, na które zabrakło pozycji
+        if used < len(receipts):
+            Receipt.objects.filter(pk__in=[receipt.pk for receipt in receipts[used:]]).delete()
+    return created_receipts, created_items
+
+
+def seed_dataset(
+    n_items,
+    n_users=1,
+    months=12,
+    items_per_receipt=8,
+    prefix="bench_user_",
+    password="bench",
+    start=date(2024, 1, 1),
+    batch_size=5000,
+    seed=0,
+):
+    """
+    Generuje użytkowników ``{prefix}{i}`` z łącznie ``n_items`` pozycjami.
+
+    Paragony rozkładają się na ``months`` miesięcy od ``start``, sklepy i kategorie
+    losowane są z wagami zbliżonymi do prawdziwych zakupów. Wszystko wstawiane
+    jest przez ``bulk_create`` paczkami po ``batch_size``; rollupy, predykcje
+    i ostatnie sklepy są przebudowywane zbiorczo na końcu.
+    """
+    from backend_api.search import rebuild_item_predictions, rebuild_recent_shops
+
+    rng = random.Random(seed)
+    days = max(1, (date(start.year + (start.month - 1 + months) // 12,
+                        (start.month - 1 + months) % 12 + 1, 1) - start).days)
+    stats = {"users": 0, "receipts": 0, "items": 0}
+    per_user = -(-n_items // n_users)
+    for index in range(n_users):
+        user = User.objects.create_user(username=f"{prefix}{index}", password=password)
+        user_items = min(per_user, n_items - stats["items"])
+        receipts, items = _seed_user_receipts(
+            user, user_items, rng, start, days, items_per_receipt, batch_size
+        )
+        rebuild_rollups(user)
+        rebuild_item_predictions(user)
+        rebuild_recent_shops(user)
+        stats["users"] += 1
+        stats["receipts"] += receipts
+        stats["items"] += items
+    return stats
+
+
+_QUERIES_IN_TIMING = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def queries_from_server_timing(header):
+    """Liczba zapytań z nagłówka ``Server-Timing`` (RequestMetricsMiddleware)."""
+    match = _QUERIES_IN_TIMING.search(header or "")
+    return int(match.group(1)) if match else None
+
+
+class HttpTransport:
+    """Żądania HTTP do działającego serwera (osobna sesja ``requests`` na wątek)."""
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self._local = threading.local()
+
+    def request(self, method, path, params=None, body=None):
+        import requests
+
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        response = session.request(method, self.base_url + path, params=params, json=body)
+        elapsed = (time.perf_counter() - started) * 1000
+        return response.status_code, elapsed, response.headers.get("Server-Timing")
+
+
+class ClientTransport:
+    """Żądania przez ``django.test.Client`` w tym samym procesie (bez serwera)."""
+
+    def __init__(self, token):
+        self.token = token
+        self._local = threading.local()
+
+    def request(self, method, path, params=None, body=None):
+        from django.test import Client
+
+        client = getattr(self._local, "client", None)
+        if client is None:
+            # "localhost" jest w ALLOWED_HOSTS także poza testami
+            client = self._local.client = Client(
+                HTTP_AUTHORIZATION=f"Bearer {self.token}", HTTP_HOST="localhost"
+            )
+        started = time.perf_counter()
+        if method == "GET":
+            response = client.get(path, params)
+        else:
+            response = client.generic(
+                method, path, json.dumps(body), content_type="application/json"
+            )
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        elapsed = (time.perf_counter() - started) * 1000
+        return response.status_code, elapsed, response.headers.get("Server-Timing")
+
+
+def percentile(values, pct):
+    """Percentyl metodą najbliższego rzędu (wartości nie muszą być posortowane)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples, wall_seconds):
+    """Statystyki jednego endpointu z listy (status, ms, zapytania)."""
+    latencies = [elapsed for _, elapsed, _ in samples]
+    queries = [count for _, _, count in samples if count is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for status, _, _ in samples if status >= 400),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "queries": {
+            "min": min(queries),
+            "max": max(queries),
+            "mean": round(statistics.fmean(queries), 2),
+        } if queries else None,
+    }
+
+
+def run_scenario(transport, scenario, requests, concurrency):
+    """
+    Wykonuje ``requests`` żądań scenariusza w ``concurrency`` wątkach.
+
+    ``scenario``: słownik z ``method``, ``path`` i ``params(i)`` / ``body(i)``
+    zwracającymi parametry i-tego żądania.
+    """
+    def call(i):
+        params = scenario.get("params", lambda i: None)(i)
+        body = scenario.get("body", lambda i: None)(i)
+        status, elapsed, timing = transport.request(scenario["method"], scenario["path"], params, body)
+        return status, elapsed, queries_from_server_timing(timing)
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        samples = [call(i) for i in range(requests)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(call, range(requests)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def api_scenarios(user, requests, cold=False, writes=False, seed=0):
+    """
+    Scenariusze ``bench_api``/``bench_serving``: listy paragonów i pozycji, wszystkie
+    wykresy fetch/* (z outliers), wyszukiwarki i (``writes``) zapis paragonów,
+    z parametrami dobranymi do danych ``user``.
+
+    Poza pomiarem: edycja i usuwanie paragonów/pozycji (zmieniają zbiór danych
+    między przebiegami), eksport i import (zadania wsadowe, nie ścieżka
+    interaktywna), kolejka zadań, schemat OpenAPI i endpointy debug.
+
+    ``cold``: unikalny parametr w każdym żądaniu, żeby ominąć cache wykresów.
+    """
+    rng = random.Random(seed)
+    months = list(
+        MonthlyRollup.objects.filter(user=user)
+        .values_list("year", "month")
+        .distinct()
+        .order_by("year", "month")
+    ) or [(datetime.now().year, datetime.now().month)]
+    # losujemy z góry, bo generatory parametrów wywoływane są z wielu wątków
+    picks = [rng.choice(months) for _ in range(requests)]
+    prediction_prefixes = [
+        name[:3] for name in ItemPrediction.objects.filter(user=user)
+        .values_list("item_description", flat=True)[:200] if len(name) >= 3
+    ] or ["mle"]
+    shop_prefixes = [
+        name[:3] for name in RecentShop.objects.filter(user=user)
+        .values_list("name", flat=True)[:200] if len(name) >= 3
+    ] or ["lid"]
+
+    def month_params(i, **extra):
+        year, month = picks[i]
+        params = {"year": year, "month": month, **extra}
+        if cold:
+            params["_bench"] = i
+        return params
+
+    scenarios = {
+        "receipts-month": {
+            "method": "GET", "path": "/api/receipts/", "params": month_params,
+        },
+        "receipts-page": {
+            "method": "GET", "path": "/api/receipts/", "params": lambda i: {"page_size": 100},
+        },
+        "line-sums": {"method": "GET", "path": "/api/fetch/line-sums/", "params": month_params},
+        "pie-categories": {
+            "method": "GET", "path": "/api/fetch/pie-categories/", "params": month_params,
+        },
+        "bar-shops": {"method": "GET", "path": "/api/fetch/bar-shops/", "params": month_params},
+        "dashboard": {"method": "GET", "path": "/api/fetch/dashboard/", "params": month_params},
+        "trends": {
+            "method": "GET",
+            "path": "/api/fetch/trends/",
+            "params": lambda i: {
+                "start": f"{months[0][0]}-{months[0][1]:02d}-01",
+                "end": f"{months[-1][0]}-12-31",
+                "granularity": ("day", "week", "month")[i % 3],
+                **({"_bench": i} if cold else {}),
+            },
+        },
+        "outliers": {
+            "method": "GET",
+            "path": "/api/fetch/outliers/",
+            "params": lambda i: month_params(i, mode=OUTLIER_MODES[i % len(OUTLIER_MODES)]),
+        },
+        "items": {"method": "GET", "path": "/api/items/", "params": lambda i: {}},
+        "item-predictions": {
+            "method": "GET",
+            "path": "/api/item-predictions/",
+            "params": lambda i: {"q": prediction_prefixes[i % len(prediction_prefixes)]},
+        },
+        "recent-shops": {
+            "method": "GET",
+            "path": "/api/recent-shops/",
+            "params": lambda i: {"q": shop_prefixes[i % len(shop_prefixes)]},
+        },
+    }
+    if writes:
+        scenarios["receipts-create"] = {
+            "method": "POST",
+            "path": "/api/receipts/",
+            "body": lambda i: {
+                "shop": "bench",
+                "transaction_type": "expense",
+                "payment_date": f"{picks[i][0]}-{picks[i][1]:02d}-01",
+                "items": [
+                    {"category": "food_drinks", "value": "9.99", "description": "bench", "quantity": 1}
+                ] * 5,
+            },
+        }
+    return scenarios
+
+
+def compare_reports(current, baseline):
+    """Zmiana p95 i średniej liczby zapytań względem poprzedniego raportu: {endpoint: {...}}."""
+    changes = {}
+    for name, stats in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            "p95_ms": [before["p95_ms"], stats["p95_ms"]],
+            "p95_change_pct": round((stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100, 1)
+            if before["p95_ms"] else None,
+            "queries_mean": [
+                (before.get("queries") or {}).get("mean"),
+                (stats.get("queries") or {}).get("mean"),
+            ],
+        }
+    return changes
+
+
+def run_concurrently(transport, workloads):
+    """
+    Uruchamia kilka scenariuszy jednocześnie, np. serię autosugestii razem z zapisami.
+
+    ``workloads``: {nazwa: (scenariusz, liczba żądań, równoległość)}. Zwraca
+    {nazwa: statystyki ``summarize``}; przepustowość każdego scenariusza liczona
+    jest względem jego własnego czasu trwania.
+    """
+    results = {}
+
+    def run(name, scenario, requests, concurrency):
+        results[name] = run_scenario(transport, scenario, requests, concurrency)
+
+    threads = [
+        threading.Thread(target=run, args=(name, *workload)) for name, workload in workloads.items()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: results[name] for name in workloads}
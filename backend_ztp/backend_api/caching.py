@@ -0,0 +1,171 @@
+# backend_api/caching.py
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from backend_api.models import UserDataVersion
+
+
+# wersja użytkownika, który jeszcze niczego nie zapisał (wiersz tworzy pierwszy zapis)
+INITIAL_DATA_VERSION = "0"
+
+
+def _data_version(user):
+    # Bez get_or_create: GET niczego nie zapisuje. Odczyt idzie przez router, więc
+    # z tej samej bazy (repliki) co dane wykresu – wersja nigdy nie wyprzedza danych
+    # i dane sprzed zapisu nie trafią do cache pod nową wersją.
+    return UserDataVersion.objects.filter(user=user).values_list("version", flat=True)
+
+
+def get_data_version(user):
+    """Aktualna wersja danych użytkownika w bazie, z której czyta żądanie."""
+    version = _data_version(user).first()
+    return version.hex if version else INITIAL_DATA_VERSION
+
+
+async def aget_data_version(user):
+    """``get_data_version`` przez async ORM."""
+    version = await _data_version(user).afirst()
+    return version.hex if version else INITIAL_DATA_VERSION
+
+
+def bump_data_version(user):
+    """
+    Unieważnia wszystkie wpisy cache wykresów użytkownika.
+
+    Wywoływane w tej samej transakcji co zapis paragonu/pozycji.
+    Zwraca ``(poprzednia, nowa)`` wersję (jak ``get_data_version``; poprzednia
+    ``None``, gdy wiersza nie było). Wiersz jest blokowany do końca transakcji,
+    więc między tymi wersjami nie ma zapisu z innego procesu.
+    """
+    version = uuid.uuid4()
+    with transaction.atomic(savepoint=False):
+        previous = (
+            UserDataVersion.objects.select_for_update()
+            .filter(user=user)
+            .values_list("version", flat=True)
+            .first()
+        )
+        if previous is None:
+            data_version, created = UserDataVersion.objects.get_or_create(
+                user=user, defaults={"version": version}
+            )
+            if created:
+                return None, version.hex
+            # wiersz utworzył równolegle inny proces
+            previous = data_version.version
+        UserDataVersion.objects.filter(user=user).update(version=version)
+    return previous.hex, version.hex
+
+
+def normalize_query_params(query_dict):
+    """
+    Stała reprezentacja parametrów GET: klucze i wartości list posortowane,
+    więc ``category[]=b&category[]=a`` i ``category[]=a&category[]=b`` dają ten sam klucz.
+    """
+    return "&".join(
+        f"{key}={','.join(sorted(query_dict.getlist(key)))}"
+        for key in sorted(query_dict.keys())
+    )
+
+
+def _chart_etag(endpoint, version, request):
+    params_digest = hashlib.sha1(normalize_query_params(request.GET).encode()).hexdigest()
+    etag = f'"{endpoint}-{version}-{params_digest[:16]}"'
+    cache_key = f"chart:{endpoint}:{request.user.pk}:{version}:{params_digest}"
+    return etag, cache_key
+
+
+def _etag_matches(request, etag):
+    """
+    Słabe porównanie z If-None-Match (RFC 9110): lista ETagów po przecinku,
+    prefiks ``W/`` pomijany, ``*`` pasuje do każdej wersji.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return etags == ["*"] or etag in (tag.removeprefix("W/") for tag in etags)
+
+
+def _not_modified(request, etag):
+    if not _etag_matches(request, etag):
+        return None
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
+
+
+def _finish(response, etag):
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cached_chart_response(endpoint):
+    """
+    Dekorator widoku ``fetch/*`` cache'ujący odpowiedź per użytkownik,
+    endpoint i parametry zapytania, z obsługą ETag / 304 Not Modified.
+
+    Musi być najbliżej funkcji widoku (pod ``@api_view``), żeby
+    ``request.user`` był już uwierzytelniony. Widoki async (``async def``)
+    dostają wrapper async z tymi samymi kluczami cache i ETag.
+    """
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                etag, cache_key = _chart_etag(endpoint, await aget_data_version(request.user), request)
+                not_modified = _not_modified(request, etag)
+                if not_modified is not None:
+                    return not_modified
+
+                cached = await cache.aget(cache_key)
+                if cached is not None:
+                    content, content_type = cached
+                    return _finish(HttpResponse(content, content_type=content_type), etag)
+                response = await view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                await cache.aset(
+                    cache_key,
+                    (response.content, response["Content-Type"]),
+                    settings.CHART_CACHE_TIMEOUT,
+                )
+                return _finish(response, etag)
+
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            etag, cache_key = _chart_etag(endpoint, get_data_version(request.user), request)
+            not_modified = _not_modified(request, etag)
+            if not_modified is not None:
+                return not_modified
+
+            cached = cache.get(cache_key)
+            if cached is not None:
+                content, content_type = cached
+                return _finish(HttpResponse(content, content_type=content_type), etag)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(
+                cache_key,
+                (response.content, response["Content-Type"]),
+                settings.CHART_CACHE_TIMEOUT,
+            )
+            return _finish(response, etag)
+
+        return wrapper
+
+    return decorator
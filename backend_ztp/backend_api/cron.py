@@ -1,12 +1,6 @@
-import yfinance as yf
-from .models import Instrument
+from .quotes import update_instrument_prices
 
 
 def update_instruments_prices():
-    instruments = Instrument.objects.all()
-    for instrument in instruments:
-        ticker = yf.Ticker(instrument.symbol)
-        price = ticker.info.get("regularMarketPrice")
-        if price is not None:
-            instrument.current_price = price
-            instrument.save()
+    """Zadanie cykliczne (JOB_SCHEDULE): odświeża ceny wszystkich instrumentów."""
+    return update_instrument_prices()
@@ -1,7 +1,23 @@
+import calendar
+from datetime import date
+
 from django_filters import rest_framework as filters
 from .models import Item, Receipt
 
 
+def period_date_range(year, month=None):
+    """
+    Pierwszy i ostatni dzień roku lub miesiąca.
+
+    Zakres dat (``payment_date__range``) zamiast ``__year``/``__month``
+    pozwala bazie użyć indeksu na ``payment_date``.
+    """
+    if month is None:
+        return date(year, 1, 1), date(year, 12, 31)
+    _, last_day = calendar.monthrange(year, month)
+    return date(year, month, 1), date(year, month, last_day)
+
+
 class ItemFilter(filters.FilterSet):
     user = filters.CharFilter(field_name="user", lookup_expr="exact")
 
@@ -14,9 +30,10 @@ class ReceiptFilter(filters.FilterSet):
     id = filters.NumberFilter(field_name="id", lookup_expr="exact")
     user = filters.BaseInFilter(field_name="user", lookup_expr="in")
     shop = filters.CharFilter(field_name="shop", lookup_expr="icontains")
-    day = filters.NumberFilter(field_name="payment_date", lookup_expr="day")
-    month = filters.NumberFilter(field_name="payment_date", lookup_expr="month")
-    year = filters.NumberFilter(field_name="payment_date", lookup_expr="year")
+    # day/month/year są łączone w filter_queryset w jeden zakres dat
+    day = filters.NumberFilter(method="filter_period_part")
+    month = filters.NumberFilter(method="filter_period_part")
+    year = filters.NumberFilter(method="filter_period_part")
     payment_date = filters.DateFromToRangeFilter(
         field_name="payment_date", lookup_expr="range"
     )
@@ -35,3 +52,30 @@ class ReceiptFilter(filters.FilterSet):
             "transaction_type",
             "category",
         ]
+
+    def filter_period_part(self, queryset, name, value):
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        year = self.form.cleaned_data.get("year")
+        month = self.form.cleaned_data.get("month")
+        day = self.form.cleaned_data.get("day")
+        year, month, day = (
+            int(value) if value is not None else None for value in (year, month, day)
+        )
+
+        try:
+            if year and month and day:
+                return queryset.filter(payment_date=date(year, month, day))
+            if year:
+                queryset = queryset.filter(payment_date__range=period_date_range(year, month))
+            elif month:
+                queryset = queryset.filter(payment_date__month=month)
+        except ValueError:
+            # Nieistniejąca data (np. 31 lutego) – brak wyników
+            return queryset.none()
+
+        if day and not (year and month):
+            queryset = queryset.filter(payment_date__day=day)
+        return queryset
@@ -0,0 +1,92 @@
+# backend_api/fingerprints.py
+import hashlib
+from collections import defaultdict
+from decimal import Decimal
+
+from backend_api.models import Item, Receipt
+
+# Zachowanie importu masowego wobec paragonów, które użytkownik już ma:
+# "flag" zapisuje je i tylko zlicza, "skip" pomija
+DUPLICATE_POLICIES = ("flag", "skip")
+ITEM_FIELDS = ("category", "value", "description", "quantity")
+
+
+def _decimal_text(value):
+    # "9.9", "9.90" i Decimal("9.900") dają ten sam tekst
+    return format(Decimal(str(value)).normalize(), "f")
+
+
+def _item_line(item):
+    if isinstance(item, dict):
+        category, value, description, quantity = (
+            item.get("category"), item.get("value"), item.get("description"), item.get("quantity", 1)
+        )
+    else:
+        category, value, description, quantity = (getattr(item, field) for field in ITEM_FIELDS)
+    return "|".join(
+        [
+            category or "",
+            _decimal_text(value or 0),
+            (description or "").strip().lower(),
+            _decimal_text(1 if quantity is None else quantity),
+        ]
+    )
+
+
+def receipt_fingerprint(payment_date, shop, transaction_type, items):
+    """
+    Odcisk treści paragonu: SHA-256 znormalizowanego nagłówka i posortowanych pozycji.
+
+    ``items`` to obiekty Item albo słowniki z danymi pozycji (np. ``validated_data``),
+    więc odcisk można policzyć przed zapisem. Kolejność pozycji, wielkość liter
+    w opisie i sklepie oraz zapis liczb nie mają wpływu na wynik.
+    """
+    digest = hashlib.sha256(
+        "|".join([str(payment_date), (shop or "").strip().lower(), transaction_type or ""]).encode()
+    )
+    for line in sorted(_item_line(item) for item in items):
+        digest.update(b"\n" + line.encode())
+    return digest.hexdigest()
+
+
+def receipt_total(items):
+    """Suma wartości pozycji (obiekty Item albo słowniki z ``value``)."""
+    return sum(
+        (Decimal(str(item["value"] if isinstance(item, dict) else item.value)) for item in items),
+        Decimal("0"),
+    )
+
+
+def refresh_derived_fields(receipt_ids):
+    """
+    Przelicza z bazy odcisk i sumę wskazanych paragonów (np. po edycji pozycji przez /api/items/).
+
+    Dwa zapytania odczytu i jeden ``bulk_update``; zwraca liczbę zmienionych paragonów.
+    """
+    receipts = list(Receipt.objects.filter(id__in=receipt_ids))
+    if not receipts:
+        return 0
+    items = defaultdict(list)
+    for item in Item.objects.filter(receipt_id__in=[receipt.id for receipt in receipts]):
+        items[item.receipt_id].append(item)
+    changed = []
+    for receipt in receipts:
+        fingerprint = receipt_fingerprint(
+            receipt.payment_date, receipt.shop, receipt.transaction_type, items[receipt.id]
+        )
+        total = receipt_total(items[receipt.id])
+        if receipt.fingerprint != fingerprint or receipt.total != total:
+            receipt.fingerprint = fingerprint
+            receipt.total = total
+            changed.append(receipt)
+    Receipt.objects.bulk_update(changed, ["fingerprint", "total"], batch_size=1000)
+    return len(changed)
+
+
+def existing_fingerprints(user, fingerprints):
+    """Które z ``fingerprints`` użytkownik już ma (jedno zapytanie po indeksie)."""
+    return set(
+        Receipt.objects.filter(user=user, fingerprint__in=set(fingerprints))
+        .values_list("fingerprint", flat=True)
+        .distinct()
+    )
@@ -0,0 +1,291 @@
+# backend_api/instrumentation.py
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("backend_api.requests")
+
+_current = ContextVar("request_metrics", default=None)
+
+# "IN (%s, %s, %s)" -> "IN (...)", żeby zapytania różniące się długością listy miały jeden szablon
+_IN_LIST = re.compile(r"\((?:\s*%s\s*,)*\s*%s\s*\)")
+# nazwy savepointów są unikalne, więc też je ujednolicamy
+_SAVEPOINT = re.compile(r'SAVEPOINT "[^"]+"')
+
+
+def query_template(sql):
+    sql = _IN_LIST.sub("(...)", " ".join(sql.split()))
+    return _SAVEPOINT.sub('SAVEPOINT "..."', sql)
+
+
+class RequestMetrics:
+    """Liczniki jednego żądania: zapytania SQL, czasy (ms) i szablony zapytań."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.timings = Counter()
+        self.templates = Counter()
+        self.query_budget = None
+        self._depth = Counter()
+
+    def record_query(self, sql, duration_ms):
+        self.queries += 1
+        self.db_ms += duration_ms
+        self.templates[query_template(sql)] += 1
+
+    def repeated_queries(self, threshold=None):
+        """Szablony wykonane co najmniej ``threshold`` razy (podejrzenie N+1)."""
+        threshold = threshold or settings.REQUEST_METRICS_N_PLUS_ONE_THRESHOLD
+        return [
+            {"sql": template, "count": count}
+            for template, count in self.templates.most_common()
+            if count >= threshold
+        ]
+
+
+def current_metrics():
+    """Metryki bieżącego żądania albo ``None`` poza żądaniem."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Dolicza czas bloku do metryki ``name`` bieżącego żądania.
+
+    Zagnieżdżone bloki o tej samej nazwie liczone są raz (najbardziej zewnętrzny).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics._depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] -= 1
+        if not metrics._depth[name]:
+            metrics.timings[name] += (time.perf_counter() - started) * 1000
+
+
+def install_serializer_timing():
+    """
+    Mierzy czas ``serializer.data`` (DRF) jako metrykę ``serializer``.
+
+    Wszystkie serializatory (także ``many=True``) przechodzą przez
+    ``BaseSerializer.data``, więc wystarcza jeden punkt pomiaru. To podmiana
+    właściwości klasy DRF w całym procesie (także poza żądaniami, np. w runworker
+    i shellu), wywoływana przy tworzeniu ``RequestMetricsMiddleware``:
+
+    - znacznik ``_timed`` sprawia, że kolejne wywołania (kilka instancji
+      middleware, testy) nie owijają właściwości ponownie,
+    - poza żądaniem i przy REQUEST_METRICS_ENABLED=0 ``timed`` niczego nie mierzy,
+      a koszt to jeden odczyt ContextVar,
+    - podklasa, która sama nadpisuje ``data`` (np. ``ListSerializer``), jest
+      mierzona, o ile woła ``super().data``.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, "_timed", False):
+        return
+
+    def data(self):
+        with timed("serializer"):
+            return original.fget(self)
+
+    data._timed = True
+    BaseSerializer.data = property(data)
+
+
+def query_budget(budget):
+    """
+    Deklaruje maksymalną liczbę zapytań SQL widoku funkcyjnego.
+
+    ``budget``: liczba albo {metoda HTTP: liczba}. Dla widoków klasowych
+    wystarczy atrybut ``query_budget``. Dekorator musi być najbardziej zewnętrzny.
+    """
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def resolve_query_budget(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    func = match.func
+    budget = getattr(func, "query_budget", None)
+    if budget is None:
+        # Django: view_class, DRF ViewSet: cls
+        view_class = getattr(func, "view_class", None) or getattr(func, "cls", None)
+        budget = getattr(view_class, "query_budget", None)
+    if isinstance(budget, dict):
+        budget = budget.get(request.method)
+    return budget
+
+
+def database_pool_stats():
+    """
+    Stan puli połączeń każdej bazy (``psycopg_pool.ConnectionPool.get_stats``) w tym procesie.
+
+    Dla baz bez puli (SQLite, DB_POOL=0) ``pool`` to ``None``, a ``conn_max_age``
+    mówi, czy połączenia są trwałe.
+    """
+    stats = {}
+    for connection in connections.all():
+        pool = getattr(connection, "pool", None)
+        stats[connection.alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "pool": pool.get_stats() if pool is not None else None,
+        }
+    return stats
+
+
+class RequestMetricsMiddleware:
+    """
+    Mierzy każde żądanie: liczbę zapytań, czas bazy, serializacji i widoku.
+
+    - nagłówek ``Server-Timing`` (widoczny w narzędziach przeglądarki),
+    - strukturalna linia logu (JSON) w loggerze ``backend_api.requests``,
+    - ostrzeżenie o powtarzanych szablonach zapytań (N+1) i przekroczonym
+      budżecie zapytań widoku (``query_budget``); przy ``StreamingHttpResponse``
+      liczą się też zapytania wykonane podczas wysyłania treści.
+
+    Działa w trybie sync (WSGI) i async (ASGI), więc pod ASGI nie wymusza
+    przełączenia całego łańcucha middleware do wątku.
+    Metryki są też dostępne w ``response.request_metrics`` (testy).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_serializer_timing()
+
+    def _wrapper(self, metrics):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                metrics.record_query(sql, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+    def _install(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self._wrapper(metrics)))
+        return stack
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with self._install(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.timings["view"] = (time.perf_counter() - started) * 1000
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        # Połączenia są per wątek, a async ORM wykonuje zapytania w wątku żądania
+        # (sync_to_async), więc wrappery instalujemy i zdejmujemy właśnie tam
+        stack = await sync_to_async(self._install)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        metrics.timings["view"] = (time.perf_counter() - started) * 1000
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics):
+        metrics.query_budget = resolve_query_budget(request)
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={metrics.db_ms:.2f};desc="{metrics.queries} queries"',
+                f"serializer;dur={metrics.timings['serializer']:.2f}",
+                f"view;dur={metrics.timings['view']:.2f}",
+            ]
+        )
+        response.request_metrics = metrics
+        if response.streaming:
+            # zapytania strumienia (np. eksport) wykonują się już po wyjściu z widoku,
+            # więc budżet i log obejmują je dopiero po wysłaniu całej treści;
+            # Server-Timing, wysłany przed treścią, ich nie zawiera
+            response.streaming_content = self._measure_stream(request, response, metrics)
+        else:
+            self._log(request, response, metrics)
+        return response
+
+    def _measure_stream(self, request, response, metrics):
+        content = response.streaming_content
+        if response.is_async:
+            return self._ameasure_stream(request, response, metrics, content)
+
+        def stream():
+            try:
+                with self._install(metrics):
+                    yield from content
+            finally:
+                self._log(request, response, metrics)
+        return stream()
+
+    async def _ameasure_stream(self, request, response, metrics, content):
+        stack = await sync_to_async(self._install)(metrics)
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await sync_to_async(stack.close)()
+            self._log(request, response, metrics)
+
+    @staticmethod
+    def _log(request, response, metrics):
+        repeated = metrics.repeated_queries()
+        over_budget = metrics.query_budget is not None and metrics.queries > metrics.query_budget
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_ms, 2),
+            "serializer_ms": round(metrics.timings["serializer"], 2),
+            "view_ms": round(metrics.timings["view"], 2),
+        }
+        if metrics.query_budget is not None:
+            entry["query_budget"] = metrics.query_budget
+        if repeated:
+            entry["n_plus_one"] = repeated
+        level = logging.WARNING if repeated or over_budget else logging.INFO
+        logger.log(level, json.dumps(entry, ensure_ascii=False))
@@ -0,0 +1,200 @@
+# backend_api/jobs.py
+import logging
+import traceback
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from backend_api.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name, max_attempts=None):
+    """
+    Rejestruje funkcję ``func(job)`` jako zadanie kolejki o nazwie ``name``.
+
+    Wartość zwrócona przez funkcję (JSON) trafia do ``Job.result``.
+    """
+    def register(func):
+        TASKS[name] = SimpleNamespace(
+            func=func, max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+        return func
+    return register
+
+
+def enqueue(name, user=None, payload=None, run_after=None):
+    """Dodaje zadanie do kolejki i zwraca ``Job``."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+    return Job.objects.create(
+        user=user,
+        task=name,
+        payload=payload or {},
+        max_attempts=TASKS[name].max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def retry_delay(attempts):
+    """Wykładniczy backoff: JOB_RETRY_BACKOFF * 2^(próba - 1) sekund."""
+    return timedelta(seconds=settings.JOB_RETRY_BACKOFF * 2 ** max(attempts - 1, 0))
+
+
+def claim_jobs(limit):
+    """
+    Rezerwuje do ``limit`` zadań gotowych do uruchomienia.
+
+    Rezerwacja to warunkowy UPDATE (status=queued -> running), więc kilku
+    workerów może pracować na tej samej bazie, także na SQLite. Ten sam UPDATE
+    liczy próbę, więc wlicza się ona także wtedy, gdy worker padnie w trakcie.
+    """
+    candidates = list(
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in candidates:
+        updated = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=timezone.now(), attempts=F("attempts") + 1
+        )
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def execute_job(job_id):
+    """
+    Wykonuje zarezerwowane zadanie i zapisuje wynik.
+
+    Błąd przy wolnych próbach odkłada zadanie z backoffem, po ostatniej próbie
+    oznacza je jako ``failed``. Zwraca końcowy status.
+    """
+    job = Job.objects.get(id=job_id)
+    registered = TASKS.get(job.task)
+    try:
+        if registered is None:
+            raise LookupError(f"Unknown task: {job.task}")
+        result = registered.func(job)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning("Job %s (%s) failed, retry %d", job.id, job.task, job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Job %s (%s) failed permanently", job.id, job.task)
+    else:
+        job.status = Job.SUCCEEDED
+        job.result = result
+        job.error = ""
+        job.finished_at = timezone.now()
+    job.save(update_fields=["status", "run_after", "result", "error", "finished_at"])
+    return job.status
+
+
+def requeue_stale_jobs(exclude=()):
+    """
+    Przywraca zadania ``running`` porzucone przez przerwanego workera
+    (starsze niż JOB_STALE_AFTER). ``exclude`` to zadania wykonywane właśnie
+    przez wywołującego workera.
+
+    Porzucone zadanie bez wolnych prób (np. ``import_receipts``) jest oznaczane
+    jako ``failed`` – ponowienie mogłoby zdublować zatwierdzone już zapisy.
+    Zwraca liczbę przywróconych zadań.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff).exclude(id__in=exclude)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED,
+        error="Worker przerwany w trakcie ostatniej próby.",
+        finished_at=timezone.now(),
+    )
+    if failed:
+        logger.error("%d stale jobs failed permanently", failed)
+    return stale.filter(attempts__lt=F("max_attempts")).update(status=Job.QUEUED, run_after=timezone.now())
+
+
+def enqueue_scheduled():
+    """
+    Dodaje zadania cykliczne z JOB_SCHEDULE ({zadanie: interwał w s}), jedno na
+    okres ``interwał``. Unikalne (task, schedule_slot) sprawia, że przy kilku
+    workerach zadanie okresu powstaje tylko raz.
+    """
+    enqueued = []
+    now = timezone.now()
+    for name, interval in settings.JOB_SCHEDULE.items():
+        if name not in TASKS:
+            raise ValueError(f"Unknown task: {name}")
+        job, created = Job.objects.get_or_create(
+            task=name,
+            schedule_slot=int(now.timestamp()) // interval,
+            defaults={"max_attempts": TASKS[name].max_attempts, "run_after": now},
+        )
+        if created:
+            enqueued.append(job)
+    return enqueued
+
+
+def run_pending():
+    """Wykonuje w bieżącym procesie wszystkie gotowe zadania (testy, ``runworker --processes 0``)."""
+    executed = 0
+    while True:
+        claimed = claim_jobs(100)
+        if not claimed:
+            return executed
+        for job_id in claimed:
+            execute_job(job_id)
+            executed += 1
+
+
+@task("rebuild_item_predictions")
+def rebuild_item_predictions_task(job):
+    from backend_api.caching import bump_data_version
+    from backend_api.search import rebuild_item_predictions
+
+    count = rebuild_item_predictions(job.user)
+    bump_data_version(job.user)
+    return {"message": "ItemPrediction table updated.", "predictions": count}
+
+
+@task("rebuild_recent_shops")
+def rebuild_recent_shops_task(job):
+    from backend_api.caching import bump_data_version
+    from backend_api.search import rebuild_recent_shops
+
+    shops = rebuild_recent_shops(job.user, job.payload.get("new_shops"))
+    bump_data_version(job.user)
+    return {"message": "Shops updated successfully.", "updated_shops": sorted(shops)}
+
+
+# Import jest zatwierdzany paczkami, więc ponowienie zdublowałoby zapisane paragony
+@task("import_receipts", max_attempts=1)
+def import_receipts_task(job):
+    from backend_api.views.transfer_views import import_receipts
+
+    path = job.payload["path"]
+    try:
+        with default_storage.open(path, "rb") as upload:
+            return import_receipts(
+                job.user, upload, job.payload["file_format"], job.payload.get("duplicates", "flag")
+            )
+    finally:
+        default_storage.delete(path)
+
+
+@task("update_instruments_prices")
+def update_instruments_prices_task(job):
+    from backend_api.cron import update_instruments_prices
+
+    return update_instruments_prices()
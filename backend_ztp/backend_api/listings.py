@@ -0,0 +1,89 @@
+# backend_api/listings.py
+from decimal import Decimal
+from functools import cache
+
+from backend_api.instrumentation import timed
+from backend_api.models import Item
+
+# Kolumny w kolejności pól ItemSerializer / ReceiptSerializer
+ITEM_COLUMNS = ("id", "save_date", "category", "value", "description", "quantity", "user_id", "receipt_id")
+RECEIPT_COLUMNS = ("id", "save_date", "payment_date", "user_id", "shop", "transaction_type")
+
+
+def _decimal_formatter(field):
+    """
+    Odpowiednik ``DecimalField.to_representation`` dla wartości z bazy.
+
+    Baza zwraca liczby już w skali pola, więc ``quantize`` niczego nie zaokrągla,
+    a sam format jest kilkanaście razy tańszy niż pełna ścieżka pola DRF.
+    """
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+    return lambda value: format(value.quantize(exponent), "f")
+
+
+@cache
+def _decimal_formatters():
+    # Skala z pól ItemSerializer, więc format liczb ("3.50", "2") jest identyczny
+    from backend_api.serializers import ItemSerializer
+
+    fields = ItemSerializer().fields
+    return _decimal_formatter(fields["value"]), _decimal_formatter(fields["quantity"])
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def item_rows(queryset):
+    """
+    Pozycje w formacie ItemSerializer zbudowane z ``values_list`` (bez instancji
+    modeli i pól serializera); zachowuje kolejność ``queryset``.
+    """
+    value_repr, quantity_repr = _decimal_formatters()
+    with timed("serializer"):
+        return [
+            {
+                "id": pk,
+                "save_date": _date(save_date),
+                "category": category,
+                "value": value_repr(value),
+                "description": description,
+                "quantity": quantity_repr(quantity),
+                "user": user_id,
+                "receipt": receipt_id,
+            }
+            for pk, save_date, category, value, description, quantity, user_id, receipt_id
+            in queryset.values_list(*ITEM_COLUMNS)
+        ]
+
+
+def receipt_rows(receipts):
+    """
+    Paragony w formacie ReceiptSerializer (z zagnieżdżonymi pozycjami).
+
+    ``receipts`` to wiersze ``values_list(*RECEIPT_COLUMNS, named=True)``.
+    Pozycje wszystkich paragonów pobiera jedno zapytanie (jak ``prefetch_related``)
+    i są rozkładane do paragonów w jednym przebiegu. Czas liczony jest jako
+    metryka ``serializer`` (Server-Timing), tak jak ``serializer.data``.
+    """
+    with timed("serializer"):
+        result = []
+        items_by_receipt = {}
+        for row in receipts:
+            items = []
+            items_by_receipt[row.id] = items
+            result.append(
+                {
+                    "id": row.id,
+                    "save_date": _date(row.save_date),
+                    "payment_date": _date(row.payment_date),
+                    "user": row.user_id,
+                    "shop": row.shop,
+                    "transaction_type": row.transaction_type,
+                    "items": items,
+                }
+            )
+        if items_by_receipt:
+            for item in item_rows(Item.objects.filter(receipt_id__in=list(items_by_receipt))):
+                items_by_receipt[item["receipt"]].append(item)
+        return result
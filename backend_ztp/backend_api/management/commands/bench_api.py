@@ -0,0 +1,109 @@
+import json
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend_api.benchmarks import (
+    ClientTransport,
+    HttpTransport,
+    api_scenarios,
+    compare_reports,
+    run_scenario,
+)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Obciąża /api/receipts/, /api/fetch/* i wyszukiwarki równoległymi klientami "
+        "i zapisuje p50/p95/p99, przepustowość i liczbę zapytań do pliku JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            help="Adres działającego serwera (np. http://localhost:8000); "
+                 "bez niego żądania idą przez django.test.Client w tym procesie",
+        )
+        parser.add_argument("--username", default="bench_user_0", help="Użytkownik z seed_bench")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200, help="Żądań na endpoint")
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Unikalny parametr w każdym żądaniu, żeby ominąć cache wykresów",
+        )
+        parser.add_argument("--writes", action="store_true", help="Dodaj scenariusz POST /api/receipts/")
+        parser.add_argument("--output", default="bench_results.json")
+        parser.add_argument("--baseline", help="Poprzedni raport JSON do porównania")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(
+                f"Brak użytkownika {options['username']}; uruchom najpierw seed_bench."
+            )
+        token = AccessToken.for_user(user)
+        token.set_exp(lifetime=timedelta(hours=2))
+        transport = (
+            HttpTransport(options["base_url"], str(token))
+            if options["base_url"]
+            else ClientTransport(str(token))
+        )
+
+        # stan danych przed scenariuszem zapisów
+        dataset = {"receipts": user.receipt_set.count(), "items": user.item_set.count()}
+        scenarios = api_scenarios(
+            user, options["requests"], cold=options["cold"], writes=options["writes"], seed=options["seed"]
+        )
+        self.stdout.write(
+            f"{'endpoint':<22} {'req':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'rps':>8} {'queries':>8}"
+        )
+        endpoints = {}
+        for name, scenario in scenarios.items():
+            stats = run_scenario(transport, scenario, options["requests"], options["concurrency"])
+            endpoints[name] = stats
+            queries = stats["queries"]["mean"] if stats["queries"] else "-"
+            self.stdout.write(
+                f"{name:<22} {stats['requests']:>6} {stats['errors']:>5} {stats['p50_ms']:>9} "
+                f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['throughput_rps']:>8} {queries:>8}"
+            )
+
+        report = {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "target": options["base_url"] or "in-process",
+            "database": settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1],
+            "config": {
+                key: options[key] for key in ("username", "concurrency", "requests", "cold", "writes")
+            },
+            "dataset": dataset,
+            "endpoints": endpoints,
+        }
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                report["comparison"] = compare_reports(report, json.load(f))
+            for name, change in report["comparison"].items():
+                self.stdout.write(
+                    f"{name:<22} p95 {change['p95_ms'][0]} -> {change['p95_ms'][1]} ms "
+                    f"({change['p95_change_pct']}%)"
+                )
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Zapisano raport: {options['output']}")
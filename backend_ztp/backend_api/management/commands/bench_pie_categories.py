@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend_api.benchmarks import measure, seed_month
+from backend_api.views import fetch_pie_categories
+
+BENCH_YEAR = 2000
+BENCH_MONTH = 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Mierzy liczbę zapytań i czas odpowiedzi fetch/pie-categories/ "
+        "dla zadanych liczb pozycji. Dane testowe są wycofywane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help="Liczby pozycji (Item) do wygenerowania",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        self.stdout.write(f"{'items':>10} {'queries':>8} {'min ms':>10} {'median ms':>10} {'max ms':>10}")
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                user = User.objects.create_user(username=f"bench_pie_{size}")
+                seed_month(user, size, BENCH_YEAR, BENCH_MONTH)
+
+                def call():
+                    # mierzymy obliczenie odpowiedzi, nie trafienie w cache
+                    cache.clear()
+                    request = factory.get(
+                        "/api/fetch/pie-categories/",
+                        {"month": BENCH_MONTH, "year": BENCH_YEAR},
+                    )
+                    force_authenticate(request, user=user)
+                    response = fetch_pie_categories(request)
+                    assert response.status_code == 200, response.content
+
+                result = measure(call, options["repeat"])
+                self.stdout.write(
+                    f"{size:>10} {result['queries']:>8} {result['min_ms']:>10} "
+                    f"{result['median_ms']:>10} {result['max_ms']:>10}"
+                )
+                transaction.set_rollback(True)
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from backend_api.benchmarks import measure, seed_month
+from backend_api.listings import RECEIPT_COLUMNS, item_rows, receipt_rows
+from backend_api.models import Item, Receipt
+from backend_api.renderers import ORJSONRenderer
+from backend_api.serializers import ItemSerializer, ReceiptSerializer
+
+BENCH_YEAR = 2000
+BENCH_MONTH = 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje listę paragonów i pozycji budowaną przez serializery DRF + JSONRenderer "
+        "z szybką ścieżką (values_list + ORJSONRenderer). Sprawdza, że odpowiedzi "
+        "są identyczne bajt w bajt. Dane testowe są wycofywane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000],
+            help="Liczby pozycji (Item) do wygenerowania",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'items':>10} {'endpoint':>9} {'path':>10} {'queries':>8} {'min ms':>10} "
+            f"{'median ms':>10} {'max ms':>10}"
+        )
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                user = User.objects.create_user(username=f"bench_listing_{size}")
+                seed_month(user, size, BENCH_YEAR, BENCH_MONTH)
+                receipts = Receipt.objects.filter(user=user).order_by("payment_date", "id")
+                items = Item.objects.filter(user=user)
+
+                paths = {
+                    "receipts": {
+                        "serializer": lambda: JSONRenderer().render(
+                            ReceiptSerializer(receipts.prefetch_related("items"), many=True).data
+                        ),
+                        "fast": lambda: ORJSONRenderer().render(
+                            receipt_rows(receipts.values_list(*RECEIPT_COLUMNS, named=True))
+                        ),
+                    },
+                    "items": {
+                        "serializer": lambda: JSONRenderer().render(
+                            ItemSerializer(items.all(), many=True).data
+                        ),
+                        "fast": lambda: ORJSONRenderer().render(item_rows(items.all())),
+                    },
+                }
+                for endpoint, funcs in paths.items():
+                    if funcs["serializer"]() != funcs["fast"]():
+                        raise CommandError(f"{endpoint}: odpowiedzi szybkiej ścieżki się różnią")
+                    for name, func in funcs.items():
+                        result = measure(func, options["repeat"])
+                        self.stdout.write(
+                            f"{size:>10} {endpoint:>9} {name:>10} {result['queries']:>8} "
+                            f"{result['min_ms']:>10} {result['median_ms']:>10} {result['max_ms']:>10}"
+                        )
+                transaction.set_rollback(True)
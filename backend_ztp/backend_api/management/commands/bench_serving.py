@@ -0,0 +1,223 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend_api.benchmarks import HttpTransport, api_scenarios, run_concurrently, run_scenario
+
+INTERFACES = ("wsgi", "asgi")
+CHART_SCENARIOS = ("line-sums", "pie-categories", "bar-shops", "dashboard", "trends")
+SEARCH_SCENARIOS = ("item-predictions", "recent-shops")
+# tryby połączeń z PostgreSQL: nowe połączenie w każdym żądaniu, trwałe połączenia, pula
+DB_MODES = {
+    "fresh": {"DB_POOL": "0", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "0", "DB_CONN_MAX_AGE": "600"},
+    "pool": {"DB_POOL": "1"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje WSGI (gunicorn gthread) i ASGI (gunicorn + uvicorn, widoki async) "
+        "na tej samej maszynie: przepustowość wykresów i wyszukiwarek przy równoległych "
+        "klientach oraz opóźnienie zapisów w trakcie serii autosugestii. Z --db-modes "
+        "(PostgreSQL) porównuje też połączenie na żądanie, trwałe połączenia i pulę."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interfaces", nargs="+", choices=INTERFACES, default=list(INTERFACES))
+        parser.add_argument(
+            "--db-modes",
+            nargs="+",
+            choices=list(DB_MODES),
+            help="Tryby połączeń z bazą (domyślnie: ustawienia z DB_* bez zmian)",
+        )
+        parser.add_argument("--username", default="bench_user_0", help="Użytkownik z seed_bench")
+        parser.add_argument("--workers", type=int, default=2, help="Procesy serwera (WEB_CONCURRENCY)")
+        parser.add_argument("--threads", type=int, default=4, help="Wątki procesu WSGI (WEB_THREADS)")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--concurrency", type=int, default=32, help="Równoległych klientów odczytu")
+        parser.add_argument("--requests", type=int, default=400, help="Żądań na scenariusz odczytu")
+        parser.add_argument("--writes", type=int, default=40, help="Zapisów w trakcie serii autosugestii")
+        parser.add_argument("--write-concurrency", type=int, default=2)
+        parser.add_argument("--startup-timeout", type=float, default=30)
+        parser.add_argument("--output", default="bench_serving.json")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(
+                f"Brak użytkownika {options['username']}; uruchom najpierw seed_bench."
+            )
+        token = AccessToken.for_user(user)
+        token.set_exp(lifetime=timedelta(hours=2))
+        scenarios = api_scenarios(
+            user, max(options["requests"], options["writes"]), cold=True, writes=True
+        )
+
+        if options["db_modes"] and connection.vendor != "postgresql":
+            raise CommandError("Tryby połączeń (--db-modes) wymagają PostgreSQL (DB_*).")
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "database": settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1],
+            "cpu_count": os.cpu_count(),
+            "config": {
+                key: options[key]
+                for key in ("workers", "threads", "concurrency", "requests", "writes", "write_concurrency")
+            },
+            "profiles": {},
+        }
+        self.stdout.write(
+            f"{'profile':<16} {'scenario':<24} {'req':>6} {'err':>5} {'p50 ms':>9} "
+            f"{'p95 ms':>9} {'rps':>8}"
+        )
+        for interface in options["interfaces"]:
+            for db_mode in options["db_modes"] or [None]:
+                label = interface if db_mode is None else f"{interface}/{db_mode}"
+                sessions = self._db_sessions()
+                base_url = f"http://127.0.0.1:{options['port']}"
+                with self._server(interface, db_mode, options):
+                    transport = HttpTransport(base_url, str(token))
+                    self._wait_until_ready(transport, options["startup_timeout"])
+                    results = self._run(transport, scenarios, options)
+                profile = {"interface": interface, "db_mode": db_mode, "scenarios": results}
+                if sessions is not None:
+                    # sesje PostgreSQL otwarte przez serwer = liczba nawiązanych połączeń
+                    profile["db_sessions"] = self._db_sessions() - sessions
+                report["profiles"][label] = profile
+                for name, stats in results.items():
+                    self.stdout.write(
+                        f"{label:<16} {name:<24} {stats['requests']:>6} {stats['errors']:>5} "
+                        f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['throughput_rps']:>8}"
+                    )
+                if sessions is not None:
+                    self.stdout.write(f"{label:<16} nowe połączenia z bazą: {profile['db_sessions']}")
+
+        report["comparisons"] = self._comparisons(report["profiles"])
+        for title, changes in report["comparisons"].items():
+            for name, change in changes.items():
+                self.stdout.write(
+                    f"{title:<28} {name:<24} rps x{change['throughput_ratio']}, "
+                    f"p50 {change['p50_ms'][0]} -> {change['p50_ms'][1]} ms, "
+                    f"p95 {change['p95_ms'][0]} -> {change['p95_ms'][1]} ms"
+                )
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Zapisano raport: {options['output']}")
+
+    @staticmethod
+    def _comparisons(profiles):
+        """ASGI względem WSGI (w tym samym trybie bazy) i każdy tryb bazy względem ``fresh``."""
+        def compare(base, other):
+            return {
+                name: {
+                    "throughput_ratio": round(
+                        other[name]["throughput_rps"] / base[name]["throughput_rps"], 2
+                    ),
+                    "p50_ms": [base[name]["p50_ms"], other[name]["p50_ms"]],
+                    "p95_ms": [base[name]["p95_ms"], other[name]["p95_ms"]],
+                }
+                for name in base
+            }
+
+        by_key = {(p["interface"], p["db_mode"]): p["scenarios"] for p in profiles.values()}
+        comparisons = {}
+        for (interface, db_mode), scenarios in by_key.items():
+            suffix = "" if db_mode is None else f"/{db_mode}"
+            if interface == "asgi" and ("wsgi", db_mode) in by_key:
+                comparisons[f"asgi vs wsgi{suffix}"] = compare(by_key["wsgi", db_mode], scenarios)
+            if db_mode not in (None, "fresh") and (interface, "fresh") in by_key:
+                comparisons[f"{interface}: {db_mode} vs fresh"] = compare(
+                    by_key[interface, "fresh"], scenarios
+                )
+        return comparisons
+
+    @staticmethod
+    def _db_sessions():
+        """Licznik sesji bazy z pg_stat_database (PostgreSQL 14+), inaczej ``None``."""
+        if connection.vendor != "postgresql":
+            return None
+        # statystyki zakończonych backendów trafiają do pg_stat z niewielkim opóźnieniem
+        time.sleep(1)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_clear_snapshot()")
+            cursor.execute("SELECT sessions FROM pg_stat_database WHERE datname = current_database()")
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _run(transport, scenarios, options):
+        results = {}
+        for name in CHART_SCENARIOS + SEARCH_SCENARIOS:
+            results[name] = run_scenario(
+                transport, scenarios[name], options["requests"], options["concurrency"]
+            )
+        # seria autosugestii (jak szybkie pisanie) i w tym samym czasie zapisy paragonów
+        burst = run_concurrently(
+            transport,
+            {
+                f"burst:{name}": (scenarios[name], options["requests"], options["concurrency"] // 2 or 1)
+                for name in SEARCH_SCENARIOS
+            }
+            | {
+                "burst:receipts-create": (
+                    scenarios["receipts-create"], options["writes"], options["write_concurrency"]
+                ),
+            },
+        )
+        results.update(burst)
+        return results
+
+    @staticmethod
+    @contextmanager
+    def _server(interface, db_mode, options):
+        """Proces gunicorna z profilem ``gunicorn.conf.py`` (zamykany po wyjściu z bloku)."""
+        env = {
+            **os.environ,
+            **DB_MODES.get(db_mode, {}),
+            "SERVER_INTERFACE": interface,
+            "WEB_CONCURRENCY": str(options["workers"]),
+            "WEB_THREADS": str(options["threads"]),
+            "BIND": f"127.0.0.1:{options['port']}",
+            "REQUEST_LOG_LEVEL": "WARNING",
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", os.path.join(settings.BASE_DIR, "gunicorn.conf.py")],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            yield process
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    @staticmethod
+    def _wait_until_ready(transport, timeout):
+        import requests
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                transport.request("GET", "/api/item-predictions/", {"q": "ab"})
+                return
+            except requests.ConnectionError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f"Serwer nie wystartował w {timeout} s")
+                time.sleep(0.2)
+
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend_api.benchmarks import measure, seed_month
+from backend_api.search import rebuild_item_predictions, rebuild_recent_shops
+
+BENCH_YEAR = 2000
+BENCH_MONTH = 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Mierzy liczbę zapytań i czas przebudowy ItemPrediction i RecentShop "
+        "z historii paragonów. Dane testowe są wycofywane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[100_000],
+            help="Liczby pozycji (Item) do wygenerowania",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'items':>10} {'rebuild':>12} {'queries':>8} {'min ms':>10} {'median ms':>10} {'max ms':>10}"
+        )
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                user = User.objects.create_user(username=f"bench_suggest_{size}")
+                seed_month(user, size, BENCH_YEAR, BENCH_MONTH)
+
+                for name, func in (
+                    ("predictions", rebuild_item_predictions),
+                    ("shops", rebuild_recent_shops),
+                ):
+                    result = measure(lambda: func(user), options["repeat"])
+                    self.stdout.write(
+                        f"{size:>10} {name:>12} {result['queries']:>8} {result['min_ms']:>10} "
+                        f"{result['median_ms']:>10} {result['max_ms']:>10}"
+                    )
+                transaction.set_rollback(True)
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from backend_api.models import Item, MonthlyRollup
+from backend_api.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Przebudowuje tabelę MonthlyRollup na podstawie Receipt/Item "
+        "i opcjonalnie weryfikuje jej zgodność z surowymi danymi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Nazwa użytkownika (domyślnie wszyscy)")
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Tylko porównaj rollupy z surowymi tabelami, bez przebudowy",
+        )
+        parser.add_argument(
+            "--if-empty",
+            action="store_true",
+            help="Przebuduj tylko gdy tabela rollup jest pusta, a istnieją pozycje",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"Użytkownik {options['user']} nie istnieje")
+
+        if not options["verify_only"]:
+            if options["if_empty"] and (
+                MonthlyRollup.objects.exists()
+                or not Item.objects.filter(receipt__isnull=False).exists()
+            ):
+                self.stdout.write("Rollupy nie wymagają przebudowy.")
+                return
+            created = rebuild_rollups(user)
+            self.stdout.write(f"Utworzono {created} wierszy rollup.")
+
+        mismatches = verify_rollups(user)
+        if mismatches:
+            for key, expected, stored in mismatches[:20]:
+                self.stderr.write(f"{key}: oczekiwano {expected}, zapisano {stored}")
+            raise CommandError(f"Rollupy niezgodne z danymi ({len(mismatches)} rozbieżności)")
+        self.stdout.write(self.style.SUCCESS("Rollupy zgodne z danymi."))
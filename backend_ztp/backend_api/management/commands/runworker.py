@@ -0,0 +1,93 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from backend_api.jobs import (
+    claim_jobs,
+    enqueue_scheduled,
+    requeue_stale_jobs,
+    run_pending,
+)
+from backend_api.worker_process import init_process, run_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Wykonuje zadania z kolejki Job (backend_api.jobs) w puli procesów. "
+        "Dodaje też zadania cykliczne z JOB_SCHEDULE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.JOB_WORKER_PROCESSES,
+            help="Liczba procesów roboczych; 0 wykonuje zadania w bieżącym procesie",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Wykonaj gotowe zadania i zakończ",
+        )
+        parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        self.next_stale_check = 0
+        if options["processes"] <= 0:
+            self._run_inline(options)
+        else:
+            self._run_pool(options)
+
+    def _requeue_stale(self, running=()):
+        """Co JOB_STALE_CHECK_INTERVAL s przywraca zadania porzucone przez inne workery."""
+        if time.monotonic() < self.next_stale_check:
+            return
+        self.next_stale_check = time.monotonic() + settings.JOB_STALE_CHECK_INTERVAL
+        requeued = requeue_stale_jobs(exclude=running)
+        if requeued:
+            self.stdout.write(f"Przywrócono {requeued} porzuconych zadań.")
+
+    def _run_inline(self, options):
+        while True:
+            self._requeue_stale()
+            enqueue_scheduled()
+            executed = run_pending()
+            if executed:
+                self.stdout.write(f"Wykonano zadań: {executed}")
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
+
+    def _run_pool(self, options):
+        processes = options["processes"]
+        running = {}  # future -> id zadania
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_process,
+        ) as pool:
+            while True:
+                # zadania z tej puli nie są porzucone, nawet gdy trwają dłużej niż JOB_STALE_AFTER
+                self._requeue_stale(list(running.values()))
+                enqueue_scheduled()
+                for job_id in claim_jobs(processes - len(running)):
+                    running[pool.submit(run_job, job_id)] = job_id
+                close_old_connections()
+
+                if not running:
+                    if options["once"]:
+                        return
+                    time.sleep(options["poll_interval"])
+                    continue
+                done, _ = wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    if future.exception() is not None:
+                        logger.error("Worker process error", exc_info=future.exception())
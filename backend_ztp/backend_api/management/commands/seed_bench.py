@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from backend_api.benchmarks import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generuje syntetycznych użytkowników, paragony, pozycje, sklepy i predykcje "
+        "do benchmarków (bulk insert, od 1k do 10M pozycji)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100_000, help="Łączna liczba pozycji")
+        parser.add_argument("--users", type=int, default=1)
+        parser.add_argument("--months", type=int, default=12, help="Zakres dat paragonów")
+        parser.add_argument("--items-per-receipt", type=int, default=8, help="Średnia liczba pozycji")
+        parser.add_argument("--prefix", default="bench_user_", help="Prefiks nazw użytkowników")
+        parser.add_argument("--password", default="bench")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Usuń wcześniej wygenerowanych użytkowników z tym prefiksem",
+        )
+
+    def handle(self, *args, **options):
+        existing = User.objects.filter(username__startswith=options["prefix"])
+        if existing.exists():
+            if not options["reset"]:
+                raise CommandError(
+                    f"Użytkownicy '{options['prefix']}*' już istnieją; użyj --reset."
+                )
+            existing.delete()
+
+        stats = seed_dataset(
+            options["items"],
+            n_users=options["users"],
+            months=options["months"],
+            items_per_receipt=options["items_per_receipt"],
+            prefix=options["prefix"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            f"Utworzono {stats['users']} użytkowników, {stats['receipts']} paragonów, "
+            f"{stats['items']} pozycji."
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from backend_api.quotes import FileQuoteProvider, get_quote_provider, update_instrument_prices
+
+
+class Command(BaseCommand):
+    help = "Odświeża ceny instrumentów (bez kolejki zadań)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", help="Ścieżka do klasy dostawcy (domyślnie QUOTE_PROVIDER)")
+        parser.add_argument("--fixture", help="Plik JSON/CSV z cenami (FileQuoteProvider, offline)")
+
+    def handle(self, *args, **options):
+        if options["fixture"]:
+            provider = FileQuoteProvider(options["fixture"])
+        elif options["provider"]:
+            provider = import_string(options["provider"])()
+        else:
+            provider = get_quote_provider()
+        stats = update_instrument_prices(provider=provider)
+        self.stdout.write(
+            f"Zaktualizowano {stats['updated']}/{stats['instruments']} instrumentów "
+            f"(brak notowań: {stats['missing']})."
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+TRIGRAM_INDEXES = [
+    ("prediction_desc_trgm_idx", "backend_api_itemprediction", "item_description"),
+    ("recentshop_name_trgm_idx", "backend_api_recentshop", "name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm istnieje tylko na PostgreSQL; na SQLite wyszukiwanie używa drzewa w pamięci
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0002_receipt_item_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemprediction',
+            index=models.Index(fields=['user', '-frequency'], name='prediction_user_freq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recentshop',
+            index=models.Index(fields=['user', '-last_used'], name='recentshop_user_used_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    # Przed dodaniem ograniczeń scalamy istniejące duplikaty (user, opis) i (user, nazwa)
+    ItemPrediction = apps.get_model("backend_api", "ItemPrediction")
+    RecentShop = apps.get_model("backend_api", "RecentShop")
+
+    duplicates = (
+        ItemPrediction.objects.values("user_id", "item_description")
+        .annotate(rows=Count("id"), keep=Min("id"), total=Sum("frequency"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        group = ItemPrediction.objects.filter(
+            user_id=row["user_id"], item_description=row["item_description"]
+        )
+        group.exclude(id=row["keep"]).delete()
+        group.update(frequency=row["total"])
+
+    duplicates = (
+        RecentShop.objects.values("user_id", "name")
+        .annotate(rows=Count("id"), keep=Min("id"), latest=Max("last_used"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        group = RecentShop.objects.filter(user_id=row["user_id"], name=row["name"])
+        group.exclude(id=row["keep"]).delete()
+        group.update(last_used=row["latest"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0003_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='itemprediction',
+            constraint=models.UniqueConstraint(fields=('user', 'item_description'), name='prediction_user_desc_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='recentshop',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='recentshop_user_name_uniq'),
+        ),
+    ]
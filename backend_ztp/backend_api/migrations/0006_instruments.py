@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 14:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0005_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Instrument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=32, unique=True)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('currency', models.CharField(blank=True, max_length=8)),
+                ('current_price', models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True)),
+                ('price_updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InstrumentPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('fetched_at', models.DateTimeField()),
+                ('instrument', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='backend_api.instrument')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['instrument', '-fetched_at'], name='price_instrument_time_idx')],
+            },
+        ),
+    ]
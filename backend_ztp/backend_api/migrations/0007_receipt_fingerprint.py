@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-18 14:37
+
+import hashlib
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# Zamrożona kopia backend_api.fingerprints.receipt_fingerprint z chwili tej migracji:
+# zmiany w kodzie aplikacji nie mogą zmienić odcisków liczonych przy jej odtwarzaniu.
+def _decimal_text(value):
+    return format(Decimal(str(value)).normalize(), "f")
+
+
+def _item_line(item):
+    return "|".join(
+        [
+            item.category or "",
+            _decimal_text(item.value or 0),
+            (item.description or "").strip().lower(),
+            _decimal_text(1 if item.quantity is None else item.quantity),
+        ]
+    )
+
+
+def receipt_fingerprint(payment_date, shop, transaction_type, items):
+    digest = hashlib.sha256(
+        "|".join([str(payment_date), (shop or "").strip().lower(), transaction_type or ""]).encode()
+    )
+    for line in sorted(_item_line(item) for item in items):
+        digest.update(b"\n" + line.encode())
+    return digest.hexdigest()
+
+
+def fill_fingerprints(apps, schema_editor):
+    # Odciski istniejących paragonów, paczkami po 1000
+    Receipt = apps.get_model("backend_api", "Receipt")
+    Item = apps.get_model("backend_api", "Item")
+
+    receipts = Receipt.objects.order_by("id")
+    last_id = 0
+    while True:
+        batch = list(receipts.filter(id__gt=last_id)[:1000])
+        if not batch:
+            break
+        items = defaultdict(list)
+        for item in Item.objects.filter(receipt_id__in=[receipt.id for receipt in batch]):
+            items[item.receipt_id].append(item)
+        for receipt in batch:
+            receipt.fingerprint = receipt_fingerprint(
+                receipt.payment_date, receipt.shop, receipt.transaction_type, items[receipt.id]
+            )
+        Receipt.objects.bulk_update(batch, ["fingerprint"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0006_instruments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['user', 'fingerprint'], name='receipt_user_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 14:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_totals(apps, schema_editor):
+    # Jedno UPDATE z podzapytaniem sumującym pozycje paragonu
+    Receipt = apps.get_model("backend_api", "Receipt")
+    Item = apps.get_model("backend_api", "Item")
+    item_sums = (
+        Item.objects.filter(receipt=OuterRef("pk"))
+        .values("receipt")
+        .annotate(total=Sum("value"))
+        .values("total")
+    )
+    Receipt.objects.update(
+        total=Coalesce(
+            Subquery(item_sums, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0007_receipt_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['user', 'transaction_type', '-total'], name='receipt_user_type_total_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.db.models import Sum
 from django.utils import timezone
@@ -17,6 +19,24 @@ class Receipt(models.Model):
 
     shop = models.CharField(max_length=255)
     transaction_type = models.CharField(max_length=255, choices=TRANSACTION_CHOICES)
+    # SHA-256 nagłówka i pozycji (backend_api.fingerprints), do wykrywania duplikatów
+    fingerprint = models.CharField(max_length=64, blank=True, default="", editable=False)
+    # suma wartości pozycji, utrzymywana przy zapisie (top-k bez agregacji pozycji)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "transaction_type", "-total"], name="receipt_user_type_total_idx"
+            ),
+            models.Index(fields=["user", "fingerprint"], name="receipt_user_fingerprint_idx"),
+            # lista paragonów, paginacja keyset i eksport: user + zakres dat
+            models.Index(fields=["user", "payment_date", "id"], name="receipt_user_date_idx"),
+            models.Index(
+                fields=["user", "transaction_type", "payment_date"],
+                name="receipt_user_type_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Receipt {self.id}"
@@ -56,6 +76,12 @@ class Item(models.Model):
     quantity = models.DecimalField(max_digits=10, decimal_places=0, default=1)
     receipt = models.ForeignKey(Receipt, on_delete=models.CASCADE, null=True, blank=True, related_name="items")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "category"], name="item_user_category_idx"),
+            models.Index(fields=["receipt", "category"], name="item_receipt_category_idx"),
+        ]
+
     def __str__(self):
         return self.description
 
@@ -65,6 +91,14 @@ class RecentShop(models.Model):
     name = models.CharField(max_length=255, unique=False)
     last_used = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-last_used"], name="recentshop_user_used_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "name"], name="recentshop_user_name_uniq"),
+        ]
+
     def save(self, *args, **kwargs):
         self.name = self.name.strip().lower()
         super().save(*args, **kwargs)
@@ -78,6 +112,16 @@ class ItemPrediction(models.Model):
     item_description = models.CharField(max_length=255, unique=False)
     frequency = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-frequency"], name="prediction_user_freq_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "item_description"], name="prediction_user_desc_uniq"
+            ),
+        ]
+
     def increment_frequency(self):
         """Increase the frequency of the item."""
         self.frequency += 1
@@ -85,3 +129,124 @@ class ItemPrediction(models.Model):
 
     def __str__(self):
         return f"{self.item_description}: {self.frequency} times"
+
+
+class MonthlyRollup(models.Model):
+    """
+    Zagregowane sumy pozycji użytkownika dla wykresów.
+
+    Jeden wiersz na (user, dzień, typ transakcji, kategoria, sklep).
+    Utrzymywane przyrostowo przez backend_api.rollups przy zapisie paragonów.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    day = models.PositiveSmallIntegerField()
+    transaction_type = models.CharField(max_length=255, choices=Receipt.TRANSACTION_CHOICES)
+    category = models.CharField(max_length=255, choices=Item.CATEGORY_CHOICES)
+    shop = models.CharField(max_length=255)
+    value_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    item_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month", "day", "transaction_type", "category", "shop"],
+                name="unique_monthly_rollup_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "year", "month"], name="rollup_user_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}-{self.day:02d} {self.category}: {self.value_sum}"
+
+
+class UserDataVersion(models.Model):
+    """
+    Wersja danych użytkownika wykorzystywana w kluczach cache wykresów.
+
+    Zmieniana przy każdym zapisie paragonu lub pozycji, więc wpisy w cache
+    zbudowane na starszej wersji przestają być trafiane.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    version = models.UUIDField(default=uuid.uuid4)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
+
+
+class Job(models.Model):
+    """
+    Zadanie w tle (przebudowy, duże importy, zadania cykliczne).
+
+    Kolejka opiera się wyłącznie na tej tabeli; zadania wykonuje
+    ``manage.py runworker`` (backend_api.jobs).
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # numer okresu zadania cyklicznego (JOB_SCHEDULE), dla pozostałych NULL
+    schedule_slot = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # pobieranie kolejnych zadań przez workera
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+            models.Index(fields=["user", "-created_at"], name="job_user_created_idx"),
+        ]
+        constraints = [
+            # kilku workerów nie doda tego samego zadania cyklicznego dwa razy
+            models.UniqueConstraint(fields=["task", "schedule_slot"], name="job_task_slot_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.task} ({self.status})"
+
+
+class Instrument(models.Model):
+    """Instrument inwestycyjny (akcja, ETF, kryptowaluta) z ostatnią znaną ceną."""
+    symbol = models.CharField(max_length=32, unique=True)
+    name = models.CharField(max_length=255, blank=True)
+    currency = models.CharField(max_length=8, blank=True)
+    current_price = models.DecimalField(max_digits=18, decimal_places=6, null=True, blank=True)
+    price_updated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.symbol}: {self.current_price}"
+
+
+class InstrumentPrice(models.Model):
+    """Historia notowań instrumentu; jeden wiersz na każde odświeżenie ceny."""
+    instrument = models.ForeignKey(Instrument, on_delete=models.CASCADE, related_name="prices")
+    price = models.DecimalField(max_digits=18, decimal_places=6)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["instrument", "-fetched_at"], name="price_instrument_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.instrument_id} {self.fetched_at:%Y-%m-%d %H:%M}: {self.price}"
@@ -0,0 +1,123 @@
+# backend_api/outliers.py
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.db.models import F, Sum
+
+from backend_api.models import Item, Receipt
+
+OUTLIER_MODES = ("top", "zscore", "iqr")
+DEFAULT_THRESHOLDS = {"zscore": 3.0, "iqr": 1.5}
+# Kategorie z mniejszą liczbą paragonów pomijamy – statystyki byłyby przypadkowe
+MIN_CATEGORY_SAMPLES = 4
+
+
+def _top_rows(user, k, date_range, transaction_type):
+    receipts = Receipt.objects.filter(user=user, transaction_type=transaction_type)
+    if date_range is not None:
+        receipts = receipts.filter(payment_date__range=date_range)
+    return receipts.order_by("-total", "-id").values_list("id", "payment_date", "shop", "total")[:k]
+
+
+def _top_records(rows):
+    return [
+        {
+            "receipt_id": receipt_id,
+            "payment_date": payment_date.isoformat(),
+            "shop": shop,
+            "total": float(total),
+        }
+        for receipt_id, payment_date, shop, total in rows
+    ]
+
+
+def top_receipts(user, k, date_range=None, transaction_type="expense"):
+    """
+    ``k`` paragonów o największej sumie: ``ORDER BY total DESC LIMIT k``
+    po indeksie receipt_user_type_total_idx, bez czytania pozycji.
+    """
+    return _top_records(_top_rows(user, k, date_range, transaction_type))
+
+
+async def atop_receipts(user, k, date_range=None, transaction_type="expense"):
+    """``top_receipts`` przez async ORM (to samo zapytanie)."""
+    rows = _top_rows(user, k, date_range, transaction_type)
+    return _top_records([row async for row in rows])
+
+
+def _category_rows(user, date_range):
+    # Jedno zapytanie: suma pozycji paragonu w każdej kategorii
+    items = Item.objects.filter(user=user, receipt__transaction_type="expense")
+    if date_range is not None:
+        items = items.filter(receipt__payment_date__range=date_range)
+    return (
+        items.values("receipt_id", "category")
+        .annotate(
+            value=Sum("value"),
+            payment_date=F("receipt__payment_date"),
+            shop=F("receipt__shop"),
+        )
+        .order_by()
+        .values_list("receipt_id", "payment_date", "shop", "category", "value")
+    )
+
+
+def _category_frame(rows):
+    frame = pd.DataFrame.from_records(
+        rows, columns=["receipt_id", "payment_date", "shop", "category", "value"]
+    )
+    frame["value"] = frame["value"].astype(float)
+    return frame
+
+
+def statistical_outliers(user, mode, threshold=None, date_range=None, limit=None):
+    """
+    Paragony z nietypowo wysoką kwotą w danej kategorii.
+
+    Dla każdej pary (paragon, kategoria) liczona jest suma pozycji, a potem
+    w jednym przebiegu ``groupby(category)``:
+
+    - ``zscore``: ``(kwota - średnia) / odchylenie`` powyżej ``threshold`` (domyślnie 3),
+    - ``iqr``: kwota powyżej ``Q3 + threshold * IQR`` (domyślnie 1.5); ``score``
+      to liczba rozstępów ćwiartkowych ponad Q3.
+
+    Wynik jest posortowany malejąco po ``score``.
+    """
+    rows = _category_rows(user, date_range)
+    return _outliers(rows, mode, threshold, limit)
+
+
+async def astatistical_outliers(user, mode, threshold=None, date_range=None, limit=None):
+    """
+    ``statistical_outliers`` przez async ORM. Obliczenia pandas idą do puli wątków,
+    żeby nie blokować pętli zdarzeń.
+    """
+    rows = [row async for row in _category_rows(user, date_range)]
+    return await sync_to_async(_outliers, thread_sensitive=False)(rows, mode, threshold, limit)
+
+
+def _outliers(rows, mode, threshold, limit):
+    threshold = DEFAULT_THRESHOLDS[mode] if threshold is None else threshold
+    frame = _category_frame(rows)
+    values = frame.groupby("category")["value"]
+    enough = values.transform("size") >= MIN_CATEGORY_SAMPLES
+
+    if mode == "zscore":
+        std = values.transform("std", ddof=0)
+        frame["score"] = (frame["value"] - values.transform("mean")) / std.where(std > 0)
+        flagged = frame["score"] > threshold
+    else:
+        q1 = values.transform("quantile", 0.25)
+        q3 = values.transform("quantile", 0.75)
+        iqr = (q3 - q1).where(q3 > q1)
+        frame["score"] = (frame["value"] - q3) / iqr
+        flagged = frame["score"] > threshold
+
+    outliers = frame[enough & flagged].sort_values(["score", "receipt_id"], ascending=[False, True])
+    if limit is not None:
+        outliers = outliers.head(limit)
+    outliers = outliers.assign(
+        value=outliers["value"].round(2),
+        score=outliers["score"].round(2),
+        payment_date=outliers["payment_date"].map(lambda day: day.isoformat()),
+    )
+    return outliers.to_dict("records")
@@ -0,0 +1,112 @@
+# backend_api/pagination.py
+import base64
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ReceiptKeysetPagination(BasePagination):
+    """
+    Opcjonalna paginacja keyset po (payment_date, id) z nieprzezroczystym kursorem.
+
+    Włącza się tylko, gdy zapytanie zawiera ``cursor`` lub ``page_size``;
+    bez tych parametrów lista zwracana jest w całości, jak dotychczas.
+    Strona może zawierać instancje Receipt albo wiersze ``values_list(named=True)``.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("payment_date", "id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_requested(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.RECEIPT_PAGE_SIZE
+        return max(1, min(page_size, settings.RECEIPT_MAX_PAGE_SIZE))
+
+    @staticmethod
+    def encode_cursor(payment_date, pk):
+        raw = f"{payment_date.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payment_date, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+            return date.fromisoformat(payment_date), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            payment_date, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(payment_date__gt=payment_date) | Q(payment_date=payment_date, id__gt=pk)
+            )
+
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.last.payment_date, self.last.id),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Kursor z pola 'next' poprzedniej strony",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Liczba paragonów na stronie (włącza paginację)",
+                "schema": {"type": "integer"},
+            },
+        ]
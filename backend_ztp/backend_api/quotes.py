@@ -0,0 +1,184 @@
+# backend_api/quotes.py
+import csv
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from backend_api.models import Instrument, InstrumentPrice
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteProvider:
+    """
+    Źródło notowań. Podklasy implementują ``fetch`` dla jednej paczki symboli.
+
+    ``batch_size`` określa, ile symboli trafia do jednego wywołania ``fetch``.
+    """
+    batch_size = 100
+
+    def fetch(self, symbols):
+        """Zwraca {symbol: Decimal} dla znalezionych symboli; brakujące są pomijane."""
+        raise NotImplementedError
+
+
+class YFinanceQuoteProvider(QuoteProvider):
+    """Notowania z Yahoo Finance: jedno ``yf.download`` na paczkę symboli."""
+    batch_size = 200
+
+    def fetch(self, symbols):
+        import yfinance as yf
+
+        frame = yf.download(
+            list(symbols),
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            threads=False,
+            progress=False,
+            auto_adjust=False,
+        )
+        quotes = {}
+        for symbol in symbols:
+            try:
+                closes = frame[symbol]["Close"]
+            except KeyError:
+                # starsze wersje yfinance nie grupują kolumn dla jednego symbolu
+                if len(symbols) > 1 or "Close" not in frame:
+                    continue
+                closes = frame["Close"]
+            closes = closes.dropna()
+            if not closes.empty:
+                quotes[symbol] = _to_decimal(closes.iloc[-1])
+        return {symbol: price for symbol, price in quotes.items() if price is not None}
+
+
+class FileQuoteProvider(QuoteProvider):
+    """
+    Notowania z lokalnego pliku (QUOTE_FIXTURE_PATH) do pracy offline i testów.
+
+    Obsługuje JSON ``{"SYMBOL": cena}`` oraz CSV z kolumnami ``symbol,price``.
+    """
+    batch_size = 1000
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.QUOTE_FIXTURE_PATH)
+        self._prices = None
+
+    def _load(self):
+        if self._prices is None:
+            if self.path.suffix.lower() == ".csv":
+                with self.path.open(newline="", encoding="utf-8") as f:
+                    rows = {row["symbol"]: row["price"] for row in csv.DictReader(f)}
+            else:
+                rows = json.loads(self.path.read_text(encoding="utf-8"))
+            self._prices = {
+                symbol.upper(): price
+                for symbol, price in ((s, _to_decimal(p)) for s, p in rows.items())
+                if price is not None
+            }
+        return self._prices
+
+    def fetch(self, symbols):
+        prices = self._load()
+        return {symbol: prices[symbol.upper()] for symbol in symbols if symbol.upper() in prices}
+
+
+def _to_decimal(value):
+    try:
+        price = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() else None
+
+
+def get_quote_provider():
+    """Dostawca notowań wskazany w QUOTE_PROVIDER (ścieżka do klasy)."""
+    return import_string(settings.QUOTE_PROVIDER)()
+
+
+def _cache_key(symbol):
+    return f"quote:{symbol.upper()}"
+
+
+def fetch_quotes(symbols, provider=None):
+    """
+    Pobiera notowania dla ``symbols``: {symbol: Decimal}.
+
+    - symbole z cache (QUOTE_CACHE_TTL sekund) nie są pobierane ponownie,
+    - pozostałe są dzielone na paczki po ``provider.batch_size`` i pobierane
+      równolegle w puli QUOTE_MAX_WORKERS wątków,
+    - błąd paczki jest logowany, a jej symbole pomijane.
+    """
+    provider = provider or get_quote_provider()
+    symbols = list(dict.fromkeys(symbols))
+    cached = cache.get_many([_cache_key(symbol) for symbol in symbols])
+    quotes = {
+        symbol: cached[_cache_key(symbol)] for symbol in symbols if _cache_key(symbol) in cached
+    }
+    missing = [symbol for symbol in symbols if symbol not in quotes]
+    batches = [
+        missing[start:start + provider.batch_size]
+        for start in range(0, len(missing), provider.batch_size)
+    ]
+
+    def fetch_batch(batch):
+        try:
+            return provider.fetch(batch)
+        except Exception:
+            logger.exception("Quote batch failed (%d symbols, first %s)", len(batch), batch[0])
+            return {}
+
+    fetched = {}
+    if batches:
+        with ThreadPoolExecutor(max_workers=min(settings.QUOTE_MAX_WORKERS, len(batches))) as pool:
+            for result in pool.map(fetch_batch, batches):
+                fetched.update(result)
+    if fetched:
+        cache.set_many(
+            {_cache_key(symbol): price for symbol, price in fetched.items()},
+            timeout=settings.QUOTE_CACHE_TTL,
+        )
+    quotes.update(fetched)
+    return quotes
+
+
+def update_instrument_prices(instruments=None, provider=None, batch_size=1000):
+    """
+    Odświeża ``current_price`` instrumentów i dopisuje historię notowań.
+
+    Zapis: ``bulk_update`` instrumentów i ``bulk_create`` wierszy InstrumentPrice.
+    Zwraca {"instruments", "updated", "missing"}.
+    """
+    instruments = list(instruments if instruments is not None else Instrument.objects.all())
+    quotes = fetch_quotes([instrument.symbol for instrument in instruments], provider)
+    fetched_at = timezone.now()
+
+    updated, history = [], []
+    for instrument in instruments:
+        price = quotes.get(instrument.symbol)
+        if price is None:
+            continue
+        instrument.current_price = price
+        instrument.price_updated_at = fetched_at
+        updated.append(instrument)
+        history.append(InstrumentPrice(instrument=instrument, price=price, fetched_at=fetched_at))
+
+    Instrument.objects.bulk_update(
+        updated, ["current_price", "price_updated_at"], batch_size=batch_size
+    )
+    InstrumentPrice.objects.bulk_create(history, batch_size=batch_size)
+    stats = {
+        "instruments": len(instruments),
+        "updated": len(updated),
+        "missing": len(instruments) - len(updated),
+    }
+    logger.info("Instrument prices updated: %(updated)d/%(instruments)d", stats)
+    return stats
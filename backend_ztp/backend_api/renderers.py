@@ -0,0 +1,33 @@
+# backend_api/renderers.py
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+# Daty i czasy przekazujemy do enkodera DRF (np. "Z" zamiast "+00:00"),
+# klucze nie-str (int) zamieniamy na napisy jak json.dumps
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer oparty o orjson, dający te same bajty co renderer DRF
+    przy domyślnych ustawieniach (COMPACT_JSON, UNICODE_JSON).
+
+    Typy nieobsługiwane natywnie (Decimal, date, lazy str...) trafiają do
+    ``JSONEncoder.default`` z DRF. Wcięcia (``?format=json; indent=4``,
+    Browsable API) i inne ustawienia obsługuje renderer bazowy.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        # Jak w JSONRenderer: \u2028 i \u2029 zawsze escapowane
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
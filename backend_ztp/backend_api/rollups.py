@@ -0,0 +1,224 @@
+# backend_api/rollups.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
+
+from backend_api.models import Item, MonthlyRollup
+
+ROLLUP_KEY_FIELDS = ("user_id", "year", "month", "day", "transaction_type", "category", "shop")
+
+
+def _receipt_key(receipt, user_id, category):
+    payment_date = receipt.payment_date
+    return (
+        user_id,
+        payment_date.year,
+        payment_date.month,
+        payment_date.day,
+        receipt.transaction_type,
+        category,
+        receipt.shop,
+    )
+
+
+def receipt_contributions(receipt, items=None):
+    """
+    Wkład paragonu w tabelę rollup: {klucz: [suma, liczba pozycji]}.
+
+    Gdy ``items`` nie są podane, pozycje są agregowane w bazie (jedno zapytanie),
+    więc funkcję można wywołać przed usunięciem lub podmianą pozycji.
+    """
+    contributions = defaultdict(lambda: [Decimal("0"), 0])
+    if items is None:
+        rows = receipt.items.values("user_id", "category").annotate(
+            value_sum=Sum("value"), item_count=Count("id")
+        )
+        for row in rows:
+            entry = contributions[_receipt_key(receipt, row["user_id"], row["category"])]
+            entry[0] += row["value_sum"]
+            entry[1] += row["item_count"]
+    else:
+        for item in items:
+            entry = contributions[_receipt_key(receipt, item.user_id, item.category)]
+            entry[0] += Decimal(str(item.value))
+            entry[1] += 1
+    return contributions
+
+
+def item_contributions(items):
+    """Wkład pojedynczych pozycji (np. edytowanych przez /api/items/)."""
+    contributions = defaultdict(lambda: [Decimal("0"), 0])
+    for item in items:
+        if item.receipt_id is None:
+            continue
+        entry = contributions[_receipt_key(item.receipt, item.user_id, item.category)]
+        entry[0] += Decimal(str(item.value))
+        entry[1] += 1
+    return contributions
+
+
+def contribution_delta(old, new):
+    """Różnica netto ``new - old``; klucze bez zmian są pomijane."""
+    delta = {}
+    for key in set(old) | set(new):
+        old_sum, old_count = old.get(key, (Decimal("0"), 0))
+        new_sum, new_count = new.get(key, (Decimal("0"), 0))
+        if old_sum != new_sum or old_count != new_count:
+            delta[key] = (new_sum - old_sum, new_count - old_count)
+    return delta
+
+
+def apply_contributions(contributions, sign=1):
+    """
+    Dodaje (``sign=1``) lub odejmuje (``sign=-1``) wkład od tabeli rollup.
+
+    Wiersze, w których nie została już żadna pozycja, są usuwane.
+    Musi być wywołana w tej samej transakcji co zapis paragonu.
+    """
+    if not contributions:
+        return
+    user_ids = set()
+    with transaction.atomic():
+        for key, (value_sum, item_count) in contributions.items():
+            lookup = dict(zip(ROLLUP_KEY_FIELDS, key))
+            user_ids.add(lookup["user_id"])
+            value_sum = value_sum * sign
+            item_count = item_count * sign
+
+            updated = MonthlyRollup.objects.filter(**lookup).update(
+                value_sum=F("value_sum") + value_sum,
+                item_count=F("item_count") + item_count,
+            )
+            if updated:
+                continue
+            _, created = MonthlyRollup.objects.get_or_create(
+                **lookup, defaults={"value_sum": value_sum, "item_count": item_count}
+            )
+            if not created:
+                MonthlyRollup.objects.filter(**lookup).update(
+                    value_sum=F("value_sum") + value_sum,
+                    item_count=F("item_count") + item_count,
+                )
+        MonthlyRollup.objects.filter(user_id__in=user_ids, item_count__lte=0).delete()
+
+
+def bulk_apply_contributions(contributions, batch_size=1000):
+    """
+    Dodaje wkład wielu paragonów naraz (import masowy).
+
+    Istniejące wiersze z dotkniętych miesięcy są wczytywane jednym zapytaniem,
+    aktualizowane w pamięci i zapisywane przez ``bulk_update``; nowe klucze
+    trafiają do ``bulk_create``.
+    """
+    if not contributions:
+        return
+    user_ids = {key[0] for key in contributions}
+    months = {(key[1], key[2]) for key in contributions}
+
+    with transaction.atomic():
+        existing_qs = MonthlyRollup.objects.select_for_update().filter(user_id__in=user_ids)
+        month_filter = Q()
+        for year, month in months:
+            month_filter |= Q(year=year, month=month)
+        existing = {
+            tuple(getattr(rollup, field) for field in ROLLUP_KEY_FIELDS): rollup
+            for rollup in existing_qs.filter(month_filter)
+        }
+
+        to_update, to_create = [], []
+        for key, (value_sum, item_count) in contributions.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                to_create.append(
+                    MonthlyRollup(
+                        **dict(zip(ROLLUP_KEY_FIELDS, key)),
+                        value_sum=value_sum,
+                        item_count=item_count,
+                    )
+                )
+            else:
+                rollup.value_sum += value_sum
+                rollup.item_count += item_count
+                to_update.append(rollup)
+
+        MonthlyRollup.objects.bulk_update(to_update, ["value_sum", "item_count"], batch_size=batch_size)
+        MonthlyRollup.objects.bulk_create(to_create, batch_size=batch_size)
+
+
+def _raw_rollup_rows(user=None):
+    items = Item.objects.filter(receipt__isnull=False)
+    if user is not None:
+        items = items.filter(user=user)
+    return (
+        items.annotate(
+            year=ExtractYear("receipt__payment_date"),
+            month=ExtractMonth("receipt__payment_date"),
+            day=ExtractDay("receipt__payment_date"),
+        )
+        .values(
+            "user_id",
+            "year",
+            "month",
+            "day",
+            "category",
+            transaction_type=F("receipt__transaction_type"),
+            shop=F("receipt__shop"),
+        )
+        .annotate(value_sum=Sum("value"), item_count=Count("id"))
+        .order_by()
+    )
+
+
+def rebuild_rollups(user=None, batch_size=5000):
+    """
+    Przelicza tabelę rollup od zera na podstawie Receipt/Item.
+
+    Bez ``user`` przebudowuje dane wszystkich użytkowników.
+    Zwraca liczbę utworzonych wierszy.
+    """
+    created = 0
+    with transaction.atomic():
+        rollups = MonthlyRollup.objects.all()
+        if user is not None:
+            rollups = rollups.filter(user=user)
+        rollups.delete()
+
+        batch = []
+        for row in _raw_rollup_rows(user).iterator(chunk_size=batch_size):
+            batch.append(MonthlyRollup(**row))
+            if len(batch) >= batch_size:
+                MonthlyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            MonthlyRollup.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def verify_rollups(user=None):
+    """
+    Porównuje tabelę rollup z agregacją surowych tabel.
+
+    Zwraca listę rozbieżności (klucz, oczekiwane, zapisane); pusta lista oznacza zgodność.
+    """
+    expected = {
+        tuple(row[field] for field in ROLLUP_KEY_FIELDS): (row["value_sum"], row["item_count"])
+        for row in _raw_rollup_rows(user).iterator()
+    }
+    stored_qs = MonthlyRollup.objects.all()
+    if user is not None:
+        stored_qs = stored_qs.filter(user=user)
+    stored = {
+        tuple(row[field] for field in ROLLUP_KEY_FIELDS): (row["value_sum"], row["item_count"])
+        for row in stored_qs.values(*ROLLUP_KEY_FIELDS, "value_sum", "item_count").iterator()
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=str):
+        if expected.get(key) != stored.get(key):
+            mismatches.append((key, expected.get(key), stored.get(key)))
+    return mismatches
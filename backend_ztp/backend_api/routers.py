@@ -0,0 +1,172 @@
+# backend_api/routers.py
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+from rest_framework.permissions import SAFE_METHODS
+
+_routing = ContextVar("replica_routing", default=None)
+
+# backendy cache widoczne tylko w jednym procesie (Dummy nie zapamiętuje niczego)
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+    Znacznik po zapisie musi widzieć każdy worker gunicorna, więc przy replikach
+    cache ``default`` nie może być lokalny dla procesu.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if not settings.DATABASE_REPLICAS or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        checks.Error(
+            f"DATABASE_REPLICAS wymaga współdzielonego cache, a CACHE_BACKEND to {backend}.",
+            hint=(
+                "Ustaw CACHE_BACKEND na backend współdzielony przez procesy (np. Redis lub "
+                "baza danych); inaczej zapis w jednym workerze nie przypina odczytów w pozostałych."
+            ),
+            id="backend_api.E001",
+        )
+    ]
+
+
+def read_replica(view):
+    """
+    Oznacza widok funkcyjny, którego GET/HEAD mogą czytać z repliki
+    (DATABASE_REPLICAS). Dla widoków klasowych wystarczy atrybut ``read_replica = True``.
+    """
+    view.read_replica = True
+    return view
+
+
+def _reads_from_replica(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return False
+    func = match.func
+    # Django: view_class, DRF ViewSet: cls
+    view_class = getattr(func, "view_class", None) or getattr(func, "cls", None)
+    return bool(getattr(func, "read_replica", False) or getattr(view_class, "read_replica", False))
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+class _RequestRouting:
+    """Wybór bazy odczytu jednego żądania, ustalany przy pierwszym zapytaniu po uwierzytelnieniu."""
+    __slots__ = ("request", "alias")
+
+    def __init__(self, request):
+        self.request = request
+        self.alias = None
+
+    def read_alias(self):
+        if self.alias is not None:
+            return self.alias
+        request = self.request
+        if request.method not in SAFE_METHODS or not _reads_from_replica(request):
+            self.alias = DEFAULT_DB_ALIAS
+            return self.alias
+        # Przed uwierzytelnieniem (np. odczyt użytkownika z tokenu) user to leniwy obiekt
+        # z AuthenticationMiddleware – takie zapytania idą do bazy głównej bez decyzji
+        user = request.__dict__.get("user")
+        if user is None or isinstance(user, SimpleLazyObject):
+            return DEFAULT_DB_ALIAS
+        if not user.is_authenticated or cache.get(_pin_key(user.pk)):
+            self.alias = DEFAULT_DB_ALIAS
+        else:
+            self.alias = random.choice(settings.DATABASE_REPLICAS)
+        return self.alias
+
+
+class ReplicaRouter:
+    """
+    Odczyty widoków oznaczonych ``read_replica`` (fetch/*, GET wyszukiwarek, eksport)
+    idą do losowej repliki z DATABASE_REPLICAS, a cała reszta do bazy ``default``.
+
+    Po udanym zapisie użytkownika (POST/PUT/PATCH/DELETE) jego odczyty przez
+    REPLICA_STICKY_SECONDS trafiają do bazy głównej, więc widzi własne zmiany mimo
+    opóźnienia replikacji. Znacznik jest w cache Django, więc CACHE_BACKEND musi być
+    współdzielony przez procesy – pilnuje tego ``check_replica_pin_cache``.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None:
+            return None
+        return routing.read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # repliki mają te same dane co baza główna
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Udostępnia żądanie routerowi ``ReplicaRouter`` i po udanym zapisie przypina
+    użytkownika do bazy głównej. Bez replik nic nie robi. Działa w trybie sync i async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        token = _routing.set(_RequestRouting(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        user_id = self._written_by(request, response)
+        if user_id is not None:
+            cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        token = _routing.set(_RequestRouting(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        user_id = self._written_by(request, response)
+        if user_id is not None:
+            await cache.aset(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    @staticmethod
+    def _written_by(request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return None
+        # DRF ustawia uwierzytelnionego użytkownika także na HttpRequest
+        user = request.__dict__.get("user")
+        if user is None or isinstance(user, SimpleLazyObject) or not user.is_authenticated:
+            return None
+        return user.pk
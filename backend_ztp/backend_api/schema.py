@@ -0,0 +1,13 @@
+# backend_api/schema.py
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Schemat ``jwtAuth`` (Bearer JWT) dla ``CachedJWTAuthentication`` i podklas
+    (``StatelessReadJWTAuthentication``); rozszerzenie drf-spectacular dla
+    simplejwt rozpoznaje tylko dokładną klasę ``JWTAuthentication``.
+    """
+    target_class = "backend_api.authentication.CachedJWTAuthentication"
+    match_subclasses = True
+    priority = 1
@@ -0,0 +1,205 @@
+# backend_api/search.py
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.db.models.functions import Lower, Trim
+from django.utils.timezone import now
+
+from backend_api.autosuggest import autosuggest_index
+from backend_api.models import Item, ItemPrediction, Receipt, RecentShop
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _trigram_word_similar(field, query):
+    """
+    Warunek ``field %> query`` (pg_trgm) jako wyrażenie, bez rejestrowania lookupu
+    na wszystkich CharField i bez django.contrib.postgres w INSTALLED_APPS.
+    Tylko dla PostgreSQL.
+    """
+    return TrigramWordSimilar(F(field), query)
+
+
+def get_search_limit(request):
+    """Liczba wyników z parametru ``limit`` ograniczona do SEARCH_MAX_LIMIT."""
+    try:
+        limit = int(request.GET.get("limit", settings.SEARCH_LIMIT))
+    except ValueError:
+        limit = settings.SEARCH_LIMIT
+    return max(1, min(limit, settings.SEARCH_MAX_LIMIT))
+
+
+def use_memory_index():
+    """Indeks w pamięci: zawsze poza PostgreSQL, na PostgreSQL gdy AUTOSUGGEST_IN_MEMORY."""
+    return settings.AUTOSUGGEST_IN_MEMORY or connection.vendor != "postgresql"
+
+
+def _prediction_matches(user, query, limit):
+    return (
+        ItemPrediction.objects.filter(user=user)
+        .filter(
+            Q(item_description__contains=query)
+            | _trigram_word_similar("item_description", query)
+        )
+        .order_by("-frequency", "item_description")
+        .values_list("item_description", "frequency")[:limit]
+    )
+
+
+def _shop_matches(user, query, limit):
+    return (
+        RecentShop.objects.filter(user=user)
+        .filter(Q(name__contains=query) | _trigram_word_similar("name", query))
+        .order_by("-last_used", "name")
+        .values_list("id", "name")[:limit]
+    )
+
+
+def _prediction_listing(user, limit):
+    return (
+        ItemPrediction.objects.filter(user=user)
+        .order_by("item_description")
+        .values_list("item_description", "frequency")[:limit]
+    )
+
+
+def _shop_listing(user, limit):
+    return RecentShop.objects.filter(user=user).order_by("name").values_list("id", "name")[:limit]
+
+
+def list_predictions(user, limit):
+    """Pierwsze ``limit`` opisów alfabetycznie (GET bez ``q``): lista (opis, częstotliwość)."""
+    if use_memory_index():
+        return autosuggest_index.list_predictions(user.pk, limit)
+    return list(_prediction_listing(user, limit))
+
+
+async def alist_predictions(user, limit):
+    """``list_predictions`` dla widoków async."""
+    if use_memory_index():
+        return await autosuggest_index.alist_predictions(user.pk, limit)
+    return [row async for row in _prediction_listing(user, limit)]
+
+
+def list_shops(user, limit):
+    """Pierwsze ``limit`` sklepów alfabetycznie (GET bez ``q``): lista (id, nazwa)."""
+    if use_memory_index():
+        return autosuggest_index.list_shops(user.pk, limit)
+    return list(_shop_listing(user, limit))
+
+
+async def alist_shops(user, limit):
+    """``list_shops`` dla widoków async."""
+    if use_memory_index():
+        return await autosuggest_index.alist_shops(user.pk, limit)
+    return [row async for row in _shop_listing(user, limit)]
+
+
+def search_predictions(user, query, limit):
+    """
+    Najczęstsze opisy pozycji pasujące do ``query``: lista (opis, częstotliwość).
+
+    PostgreSQL: indeks GIN pg_trgm – dowolny podciąg opisu lub słowo podobne do
+    ``query`` ("leko" znajdzie "mleko").
+    Inne bazy lub AUTOSUGGEST_IN_MEMORY: drzewo prefiksowe w pamięci procesu –
+    tylko początek któregoś słowa opisu ("mle" znajdzie "jogurt mleczny", "leko" nic).
+    """
+    query = query.strip().lower()
+    if use_memory_index():
+        return autosuggest_index.search_predictions(user.pk, query, limit)
+    return list(_prediction_matches(user, query, limit))
+
+
+async def asearch_predictions(user, query, limit):
+    """``search_predictions`` dla widoków async (async ORM albo indeks w pamięci)."""
+    query = query.strip().lower()
+    if use_memory_index():
+        return await autosuggest_index.asearch_predictions(user.pk, query, limit)
+    return [row async for row in _prediction_matches(user, query, limit)]
+
+
+def search_shops(user, query, limit):
+    """
+    Ostatnio używane sklepy pasujące do ``query``: lista (id, nazwa).
+    Dopasowanie zależy od bazy jak w ``search_predictions``.
+    """
+    query = query.strip().lower()
+    if use_memory_index():
+        return autosuggest_index.search_shops(user.pk, query, limit)
+    return list(_shop_matches(user, query, limit))
+
+
+async def asearch_shops(user, query, limit):
+    """``search_shops`` dla widoków async (async ORM albo indeks w pamięci)."""
+    query = query.strip().lower()
+    if use_memory_index():
+        return await autosuggest_index.asearch_shops(user.pk, query, limit)
+    return [row async for row in _shop_matches(user, query, limit)]
+
+
+def rebuild_item_predictions(user, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Przelicza częstotliwości ItemPrediction z historii paragonów.
+
+    Jedno zapytanie ``GROUP BY lower(trim(description))`` zasila upsert
+    (``bulk_create(update_conflicts=True)``) oparty o unikalność (user, opis).
+    Predykcje spoza historii zostają bez zmian. Zwraca liczbę opisów.
+    """
+    rows = (
+        Item.objects.filter(receipt__user=user)
+        .annotate(normalized=Lower(Trim("description")))
+        .exclude(normalized="")
+        .values("normalized")
+        .annotate(frequency=Count("id"))
+        .order_by()
+        .values_list("normalized", "frequency")
+    )
+    # SQLite zmienia wielkość liter tylko w ASCII, więc grupy domykamy w Pythonie
+    frequencies = Counter()
+    for description, frequency in rows.iterator(chunk_size=batch_size):
+        frequencies[description.lower()] += frequency
+
+    total = 0
+    batch = []
+    for description, frequency in frequencies.items():
+        batch.append(ItemPrediction(user=user, item_description=description, frequency=frequency))
+        if len(batch) >= batch_size:
+            total += _upsert(ItemPrediction, batch, ["user", "item_description"], ["frequency"])
+            batch = []
+    if batch:
+        total += _upsert(ItemPrediction, batch, ["user", "item_description"], ["frequency"])
+    return total
+
+
+def rebuild_recent_shops(user, new_shops=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Odświeża RecentShop dla wszystkich sklepów z historii (plus ``new_shops``).
+
+    Nazwy są normalizowane i deduplikowane w bazie (``DISTINCT lower(trim(shop))``),
+    a zapis to upsert po (user, name). Zwraca zbiór nazw.
+    """
+    names = {
+        name.lower()
+        for name in Receipt.objects.filter(user=user)
+        .annotate(normalized=Lower(Trim("shop")))
+        .exclude(normalized="")
+        .values_list("normalized", flat=True)
+        .distinct()
+        .order_by()
+    }
+    names.update(shop.strip().lower() for shop in new_shops or [] if shop and shop.strip())
+    touched_at = now()
+    shops = [RecentShop(user=user, name=name, last_used=touched_at) for name in names]
+    for start in range(0, len(shops), batch_size):
+        _upsert(RecentShop, shops[start:start + batch_size], ["user", "name"], ["last_used"])
+    return names
+
+
+def _upsert(model, objs, unique_fields, update_fields):
+    model.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields
+    )
+    return len(objs)
@@ -1,13 +1,26 @@
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
 from django.utils.timezone import now
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
 from .models import (
+    Job,
     Item,
     Receipt,
     RecentShop,
     ItemPrediction,
 )
+from . import rollups
+from .caching import bump_data_version
+from .fingerprints import existing_fingerprints, receipt_fingerprint, receipt_total
+from .autosuggest import autosuggest_index
+
+logger = logging.getLogger(__name__)
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -43,10 +56,200 @@ class ItemSerializer(serializers.ModelSerializer):
         read_only_fields = ["save_date", "user", "receipt"]
 
 
+def apply_prediction_counts(user, prediction_counts):
+    """
+    Dodaje do ItemPrediction przyrosty {opis: zmiana} (mogą być ujemne).
+
+    Zapis zbiorczy: jedno zapytanie odczytu, ``bulk_update`` i ``bulk_create``;
+    predykcje, których częstotliwość spadła do zera, są usuwane.
+    Zwraca {opis: nowa częstotliwość} (0 dla usuniętych).
+    """
+    prediction_counts = {desc: count for desc, count in prediction_counts.items() if count}
+    if not prediction_counts:
+        return {}
+    existing = {
+        prediction.item_description: prediction
+        for prediction in ItemPrediction.objects.filter(
+            user=user, item_description__in=list(prediction_counts)
+        )
+    }
+    to_update, to_delete = [], []
+    for desc, prediction in existing.items():
+        prediction.frequency += prediction_counts[desc]
+        if prediction.frequency > 0:
+            to_update.append(prediction)
+        else:
+            prediction.frequency = 0
+            to_delete.append(prediction.pk)
+    ItemPrediction.objects.bulk_update(to_update, ["frequency"], batch_size=1000)
+    if to_delete:
+        ItemPrediction.objects.filter(pk__in=to_delete).delete()
+    ItemPrediction.objects.bulk_create(
+        [
+            ItemPrediction(user=user, item_description=desc, frequency=count)
+            for desc, count in prediction_counts.items()
+            if desc not in existing and count > 0
+        ],
+        batch_size=1000,
+    )
+    return {
+        desc: existing[desc].frequency if desc in existing else max(count, 0)
+        for desc, count in prediction_counts.items()
+    }
+
+
+class ReceiptItemSerializer(ItemSerializer):
+    """
+    Pozycja zagnieżdżona w paragonie. ``id`` jest zapisywalne, żeby aktualizacja
+    paragonu mogła dopasować pozycje zamiast usuwać je i tworzyć od nowa.
+    Brak ``id`` (albo 0/null, jak wysyła frontend) oznacza nową pozycję.
+    """
+    id = serializers.IntegerField(required=False, allow_null=True)
+
+
+class BulkReceiptListSerializer(serializers.ListSerializer):
+    """
+    Masowe tworzenie paragonów (POST /api/receipts/ z listą).
+
+    Paragony i pozycje są wstawiane przez ``bulk_create`` w jednej transakcji,
+    w paczkach po ``BULK_IMPORT_BATCH_SIZE`` paragonów. Liczniki ItemPrediction,
+    RecentShop i rollupy są scalane w pamięci i zapisywane zbiorczo.
+
+    Paragony, których odcisk użytkownik już ma (w bazie lub wcześniej w tym samym
+    imporcie), są liczone w ``duplicates``; przy ``context["duplicates"] == "skip"``
+    nie są zapisywane. Sprawdzenie to jedno zapytanie po indeksie na paczkę.
+    """
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context["request"].user
+        skip_duplicates = self.context.get("duplicates") == "skip"
+        batch_size = settings.BULK_IMPORT_BATCH_SIZE
+        self.import_stats = []
+        self.duplicates = 0
+        seen = set()
+
+        receipt_ids = []
+        prediction_counts = Counter()
+        shop_names = set()
+        contributions = {}
+
+        for start in range(0, len(validated_data), batch_size):
+            started = time.perf_counter()
+            batch = validated_data[start:start + batch_size]
+            fingerprints = [
+                receipt_fingerprint(
+                    data["payment_date"], data["shop"], data["transaction_type"], data.get("items", [])
+                )
+                for data in batch
+            ]
+            seen |= existing_fingerprints(user, fingerprints)
+            receipts, kept, batch_duplicates = [], [], 0
+            for data, fingerprint in zip(batch, fingerprints):
+                if fingerprint in seen:
+                    batch_duplicates += 1
+                    if skip_duplicates:
+                        continue
+                seen.add(fingerprint)
+                kept.append(data)
+                receipts.append(
+                    Receipt(
+                        user=user,
+                        fingerprint=fingerprint,
+                        total=receipt_total(data.get("items", [])),
+                        **{k: v for k, v in data.items() if k not in ("items", "removed_items")},
+                    )
+                )
+            batch = kept
+            self.duplicates += batch_duplicates
+            receipts = Receipt.objects.bulk_create(receipts)
+            items = []
+            for receipt, data in zip(receipts, batch):
+                receipt_items = [
+                    Item(
+                        user=user,
+                        receipt=receipt,
+                        **{k: v for k, v in item_data.items() if k != "id"},
+                    )
+                    for item_data in data.get("items", [])
+                ]
+                items.extend(receipt_items)
+
+                shop_name = (receipt.shop or "").strip().lower()
+                if shop_name:
+                    shop_names.add(shop_name)
+                for item in receipt_items:
+                    desc = (item.description or "").strip().lower()
+                    if desc:
+                        prediction_counts[desc] += 1
+                for key, value in rollups.receipt_contributions(receipt, receipt_items).items():
+                    entry = contributions.setdefault(key, [0, 0])
+                    entry[0] += value[0]
+                    entry[1] += value[1]
+            Item.objects.bulk_create(items, batch_size=batch_size)
+            receipt_ids.extend(receipt.id for receipt in receipts)
+
+            elapsed = time.perf_counter() - started
+            stats = {
+                "receipts": len(receipts),
+                "items": len(items),
+                "duplicates": batch_duplicates,
+                "seconds": round(elapsed, 4),
+                "items_per_second": round(len(items) / elapsed) if elapsed else None,
+            }
+            self.import_stats.append(stats)
+            logger.info(
+                "Bulk import batch: %(receipts)d receipts, %(items)d items, "
+                "%(duplicates)d duplicates in %(seconds).3fs (%(items_per_second)s items/s)",
+                stats,
+            )
+
+        predictions = self._flush_predictions(user, prediction_counts)
+        shops = self._flush_recent_shops(user, shop_names)
+        rollups.bulk_apply_contributions(contributions)
+        versions = bump_data_version(user)
+        transaction.on_commit(
+            lambda: autosuggest_index.record(
+                user.pk, predictions=predictions, shops=shops, versions=versions
+            )
+        )
+
+        return list(
+            Receipt.objects.filter(id__in=receipt_ids)
+            .prefetch_related("items")
+            .order_by("id")
+        )
+
+    @staticmethod
+    def _flush_predictions(user, prediction_counts):
+        return apply_prediction_counts(user, prediction_counts)
+
+    @staticmethod
+    def _flush_recent_shops(user, shop_names):
+        """Odświeża last_used sklepów; zwraca [(id, nazwa, last_used)]."""
+        if not shop_names:
+            return []
+        touched_at = now()
+        existing = dict(
+            RecentShop.objects.filter(user=user, name__in=shop_names).values_list("name", "id")
+        )
+        RecentShop.objects.filter(user=user, name__in=existing).update(last_used=touched_at)
+        created = RecentShop.objects.bulk_create(
+            [
+                RecentShop(user=user, name=name, last_used=touched_at)
+                for name in shop_names - set(existing)
+            ]
+        )
+        existing.update((shop.name, shop.id) for shop in created)
+        return [(shop_id, name, touched_at) for name, shop_id in existing.items()]
+
 
 class ReceiptSerializer(serializers.ModelSerializer):
-    items = ItemSerializer(many=True)
+    items = ReceiptItemSerializer(many=True)
     user = serializers.PrimaryKeyRelatedField(read_only=True)
+    removed_items = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False
+    )
 
     class Meta:
         model = Receipt
@@ -58,8 +261,10 @@ class ReceiptSerializer(serializers.ModelSerializer):
             "shop",
             "transaction_type",
             "items",
+            "removed_items",
         ]
         read_only_fields = ["id", "save_date", "user"]
+        list_serializer_class = BulkReceiptListSerializer
 
     def _update_recent_shop(self, user, shop_name):
         if shop_name:
@@ -71,59 +276,185 @@ class ReceiptSerializer(serializers.ModelSerializer):
             if not created:
                 recent_shop.last_used = now()
                 recent_shop.save()
+            return recent_shop
 
-    def update_item_prediction(self, item, shop_name):
-        desc = (item.description or "").strip().lower()
-        if not desc:
-            return
-        from .models import ItemPrediction
-
-        prediction, created = ItemPrediction.objects.get_or_create(
-            user=item.user,
-            item_description=desc
+    @staticmethod
+    def _record_autosuggest(user, recent_shop, predictions, versions):
+        # Indeks autosugestii w pamięci aktualizujemy dopiero po commicie
+        shops = (
+            [(recent_shop.id, recent_shop.name, recent_shop.last_used)] if recent_shop else []
+        )
+        transaction.on_commit(
+            lambda: autosuggest_index.record(
+                user.pk, predictions=predictions, shops=shops, versions=versions
+            )
         )
-        prediction.frequency += 1
-        prediction.save()
 
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
+        validated_data.pop("removed_items", None)
         user = self.context["request"].user
-        receipt = Receipt.objects.create(user=user, **validated_data)
+        receipt = Receipt.objects.create(
+            user=user,
+            fingerprint=receipt_fingerprint(
+                validated_data["payment_date"],
+                validated_data["shop"],
+                validated_data["transaction_type"],
+                items_data,
+            ),
+            total=receipt_total(items_data),
+            **validated_data,
+        )
 
         shop_name = validated_data.get("shop", "").strip().lower()
-        self._update_recent_shop(user, shop_name)
+        recent_shop = self._update_recent_shop(user, shop_name)
+
+        # Nowy paragon zawsze dostaje nowe pozycje, więc ``id`` z payloadu pomijamy
+        items = Item.objects.bulk_create(
+            [
+                Item(
+                    user=user,
+                    receipt=receipt,
+                    **{k: v for k, v in item_data.items() if k != "id"},
+                )
+                for item_data in items_data
+            ]
+        )
+        prediction_counts = Counter(self._description_key(item.description) for item in items)
+        prediction_counts.pop("", None)
+        predictions = apply_prediction_counts(user, prediction_counts)
 
-        for item_data in items_data:
-            item = Item.objects.create(
-                user=user,
-                receipt=receipt,
-                **item_data
-            )
-            self.update_item_prediction(item, shop_name)
+        rollups.apply_contributions(rollups.receipt_contributions(receipt, items))
+        versions = bump_data_version(user)
+        self._record_autosuggest(user, recent_shop, predictions, versions)
 
         return receipt
 
+    def validate(self, attrs):
+        # Nowe pozycje (bez id) muszą być kompletne także przy PATCH
+        if self.partial:
+            for item_data in attrs.get("items", []):
+                missing = [
+                    field
+                    for field in ("category", "value")
+                    if not item_data.get("id") and field not in item_data
+                ]
+                if missing:
+                    raise serializers.ValidationError(
+                        {"items": f"New items require: {', '.join(missing)}"}
+                    )
+        return attrs
+
+    @staticmethod
+    def _description_key(description):
+        return (description or "").strip().lower()
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        items_data = validated_data.pop("items", [])
-
+        """
+        Aktualizacja paragonu z uzgadnianiem pozycji po ``id``.
+
+        - pozycje bez zmian zostają nietknięte,
+        - zmienione idą przez ``bulk_update``, nowe (bez ``id``) przez ``bulk_create``,
+        - PUT usuwa pozycje nieobecne w ``items``; PATCH usuwa tylko te z ``removed_items``
+          (bez ``items`` pozycje nie są zmieniane),
+        - ItemPrediction zmienia się o różnicę netto opisów,
+        - odcisk i suma paragonu liczone są z pozycji po zmianie (bez dodatkowego odczytu).
+        """
+        items_data = validated_data.pop("items", None)
+        removed_ids = set(validated_data.pop("removed_items", []))
+        if items_data is None and not self.partial:
+            items_data = []
+        # Wkład w rollupy sprzed zmiany (stara data/sklep/pozycje)
+        old_contributions = rollups.receipt_contributions(instance)
+
+        changed_receipt = False
         for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+            if getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed_receipt = True
 
         shop_name = (instance.shop or "").strip().lower()
         user = self.context["request"].user
-        self._update_recent_shop(user, shop_name)
-
-        # Remove and recreate items
-        instance.items.all().delete()
-
-        for item_data in items_data:
-            item = Item.objects.create(
-                user=user,
-                receipt=instance,
-                **item_data
+        recent_shop = self._update_recent_shop(user, shop_name)
+
+        prediction_counts = Counter()
+        final_items = None
+        if items_data is not None or removed_ids:
+            existing = {item.id: item for item in instance.items.all()}
+            submitted_ids = {item_data["id"] for item_data in items_data or [] if item_data.get("id")}
+            unknown = (submitted_ids | removed_ids) - set(existing)
+            if unknown:
+                raise serializers.ValidationError(
+                    {"items": f"Items not in this receipt: {sorted(unknown)}"}
+                )
+            if not self.partial:
+                removed_ids |= set(existing) - submitted_ids
+
+            to_update, to_create, update_fields = [], [], set()
+            for item_data in items_data or []:
+                item_id = item_data.pop("id", None)
+                if not item_id:
+                    item = Item(user=user, receipt=instance, **item_data)
+                    to_create.append(item)
+                    prediction_counts[self._description_key(item.description)] += 1
+                    continue
+                if item_id in removed_ids:
+                    continue
+                item = existing[item_id]
+                changed = {
+                    field: value
+                    for field, value in item_data.items()
+                    if getattr(item, field) != value
+                }
+                if not changed:
+                    continue
+                if "description" in changed:
+                    prediction_counts[self._description_key(item.description)] -= 1
+                    prediction_counts[self._description_key(changed["description"])] += 1
+                for field, value in changed.items():
+                    setattr(item, field, value)
+                update_fields.update(changed)
+                to_update.append(item)
+
+            for item_id in removed_ids:
+                prediction_counts[self._description_key(existing[item_id].description)] -= 1
+
+            if to_update:
+                Item.objects.bulk_update(to_update, sorted(update_fields))
+            if to_create:
+                Item.objects.bulk_create(to_create)
+            if removed_ids:
+                Item.objects.filter(receipt=instance, id__in=removed_ids).delete()
+            final_items = [
+                item for item_id, item in existing.items() if item_id not in removed_ids
+            ] + to_create
+
+        if final_items is None and changed_receipt:
+            final_items = list(instance.items.all())
+        if final_items is not None:
+            fingerprint = receipt_fingerprint(
+                instance.payment_date, instance.shop, instance.transaction_type, final_items
             )
-            self.update_item_prediction(item, shop_name)
+            total = receipt_total(final_items)
+            if fingerprint != instance.fingerprint or total != instance.total:
+                instance.fingerprint = fingerprint
+                instance.total = total
+                changed_receipt = True
+        if changed_receipt:
+            instance.save()
+
+        prediction_counts.pop("", None)
+        predictions = apply_prediction_counts(user, prediction_counts)
+
+        rollups.apply_contributions(
+            rollups.contribution_delta(
+                old_contributions, rollups.receipt_contributions(instance)
+            )
+        )
+        versions = bump_data_version(user)
+        self._record_autosuggest(user, recent_shop, predictions, versions)
 
         return instance
 
@@ -168,3 +499,21 @@ class CategoryPieExpenseSerializer(serializers.Serializer):
 
     class Meta:
         fields = ["category", "expense_sum", "fill"]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "task",
+            "status",
+            "attempts",
+            "max_attempts",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,29 @@
+# backend_api/testing.py
+from backend_api.instrumentation import RequestMetricsMiddleware
+
+
+class QueryBudgetMixin:
+    """
+    Asercje budżetu zapytań dla testów API (wymaga RequestMetricsMiddleware).
+
+    Budżet deklaruje widok: ``@query_budget(n)`` albo atrybut ``query_budget``.
+    Odpowiedź strumieniowa jest najpierw czytana do końca, żeby policzyć
+    zapytania strumienia.
+    """
+
+    def assertWithinQueryBudget(self, response):
+        if response.streaming:
+            response.getvalue()
+        metrics = getattr(response, "request_metrics", None)
+        if metrics is None:
+            self.fail(f"No request metrics; is {RequestMetricsMiddleware.__name__} enabled?")
+        if metrics.query_budget is None:
+            self.fail(f"{response.request['PATH_INFO']}: view has no declared query budget")
+        if metrics.queries > metrics.query_budget:
+            templates = "\n".join(
+                f"  {count}x {template}" for template, count in metrics.templates.most_common()
+            )
+            self.fail(
+                f"{response.request['PATH_INFO']}: {metrics.queries} queries, "
+                f"budget {metrics.query_budget}\n{templates}"
+            )
@@ -1,9 +1,61 @@
-from django.test import TestCase
+from unittest import skipUnless
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from backend_api.models import Item, Receipt
+from backend_api.models import (
+    Instrument,
+    InstrumentPrice,
+    Item,
+    Job,
+    Receipt,
+    MonthlyRollup,
+    ItemPrediction,
+    RecentShop,
+    UserDataVersion,
+)
+from backend_api.quotes import FileQuoteProvider, QuoteProvider, fetch_quotes, update_instrument_prices
+from backend_api import jobs
+from backend_api.rollups import rebuild_rollups, verify_rollups
+from backend_api.caching import bump_data_version, get_data_version
+from backend_api.filters import period_date_range
+from backend_api.autosuggest import PrefixTrie, UserSuggestions, autosuggest_index
+from backend_api.authentication import CachedJWTAuthentication, user_cache
 from backend_api.serializers import ItemSerializer, ReceiptSerializer
-from datetime import date
+from backend_api.instrumentation import RequestMetricsMiddleware, database_pool_stats, query_budget
+from backend_api.benchmarks import percentile
+from backend_api.fingerprints import receipt_fingerprint
+from backend_api.renderers import ORJSONRenderer
+from backend_api.outliers import statistical_outliers
+from backend_api.views.utils import get_top_outlier_receipts
+from backend_api.testing import QueryBudgetMixin
+from backend_api.urls import api_urlpatterns
+import csv
+import importlib
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+from decimal import Decimal
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, models
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch, include, path, resolve
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from rest_framework_simplejwt.tokens import AccessToken
+from drf_spectacular.generators import SchemaGenerator
 
 
 class UserModelTest(TestCase):
@@ -140,3 +192,1996 @@ class ApiViewsTest(APITestCase):
         })
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.json(), list)
+
+
+class LineSumsAggregationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="lineuser", password="pass")
+        self.other = User.objects.create_user(username="lineother", password="pass")
+        self.client.force_authenticate(user=self.user)
+
+        for day, transaction_type, values in [
+            (3, "expense", [10.25, 4.75]),
+            (3, "income", [100.0]),
+            (10, "expense", [20.0]),
+        ]:
+            receipt = Receipt.objects.create(
+                user=self.user,
+                shop="Lidl",
+                transaction_type=transaction_type,
+                payment_date=date(2025, 2, day),
+            )
+            for value in values:
+                Item.objects.create(
+                    user=self.user, category="food_drinks", value=value, receipt=receipt
+                )
+
+        foreign = Receipt.objects.create(
+            user=self.other,
+            shop="Lidl",
+            transaction_type="expense",
+            payment_date=date(2025, 2, 3),
+        )
+        Item.objects.create(user=self.other, category="fuel", value=999, receipt=foreign)
+        rebuild_rollups()
+
+    def test_cumulative_sums(self):
+        response = self.client.get("/api/fetch/line-sums/", {"month": 2, "year": 2025})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data), 28)
+        self.assertEqual(data[0], {"day": "2025-02-01", "expense": 0, "income": 0})
+        self.assertEqual(data[2], {"day": "2025-02-03", "expense": 15.0, "income": 100.0})
+        self.assertEqual(data[9], {"day": "2025-02-10", "expense": 35.0, "income": 100.0})
+        self.assertEqual(data[-1], {"day": "2025-02-28", "expense": 35.0, "income": 100.0})
+
+    def test_single_aggregation_query(self):
+        cache.clear()
+        # odczyt wersji danych + jedno zapytanie agregujące
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/fetch/line-sums/", {"month": 2, "year": 2025})
+        self.assertEqual(response.status_code, 200)
+
+
+class PieCategoriesAggregationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pieuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+
+        expense = Receipt.objects.create(
+            user=self.user, shop="Orlen", transaction_type="expense", payment_date=date(2025, 3, 5)
+        )
+        income = Receipt.objects.create(
+            user=self.user, shop="Firma", transaction_type="income", payment_date=date(2025, 3, 5)
+        )
+        Item.objects.create(user=self.user, category="fuel", value=200.10, receipt=expense)
+        Item.objects.create(user=self.user, category="fuel", value=50.05, receipt=expense)
+        Item.objects.create(user=self.user, category="alcohol", value=30, receipt=expense)
+        Item.objects.create(user=self.user, category="work_income", value=5000, receipt=income)
+        rebuild_rollups(self.user)
+
+    def test_grouped_by_category(self):
+        get_data_version(self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/fetch/pie-categories/", {"month": 3, "year": 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {"category": "alcohol", "expense_sum": 30.0, "fill": "var(--color-alcohol)"},
+                {"category": "fuel", "expense_sum": 250.15, "fill": "var(--color-fuel)"},
+            ],
+        )
+
+    def test_missing_params(self):
+        response = self.client.get("/api/fetch/pie-categories/", {"month": 3})
+        self.assertEqual(response.status_code, 400)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("bench_pie_categories", sizes=[50], repeat=1, stdout=out)
+        self.assertIn("50", out.getvalue())
+        self.assertFalse(User.objects.filter(username="bench_pie_50").exists())
+
+
+class DashboardEndpointTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dashboarduser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        rng = random.Random(3)
+        receipts = []
+        for _ in range(30):
+            transaction_type = rng.choice(["expense", "expense", "income"])
+            receipts.append(
+                {
+                    "shop": rng.choice(["Lidl", "Orlen", "Żabka", "Firma"]),
+                    "transaction_type": transaction_type,
+                    "payment_date": f"2024-02-{rng.randint(1, 29):02d}",
+                    "items": [
+                        {
+                            "category": rng.choice(
+                                ["fuel", "food_drinks", "chemistry", "clothes"]
+                                if transaction_type == "expense"
+                                else ["work_income", "money_back"]
+                            ),
+                            "value": f"{rng.uniform(1, 200):.2f}",
+                        }
+                        for _ in range(rng.randint(1, 4))
+                    ],
+                }
+            )
+        self.client.post("/api/receipts/", receipts, format="json")
+
+    def test_matches_individual_endpoints(self):
+        for params in (
+            {"year": 2024, "month": 2},
+            {"year": 2024, "month": 2, "category[]": ["fuel", "chemistry"]},
+            {"year": 2024, "month": 3},
+        ):
+            response = self.client.get("/api/fetch/dashboard/", params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            for key, path in (
+                ("line_sums", "/api/fetch/line-sums/"),
+                ("bar_shops", "/api/fetch/bar-shops/"),
+                ("pie_categories", "/api/fetch/pie-categories/"),
+            ):
+                self.assertEqual(data[key], self.client.get(path, params).json(), (key, params))
+
+    def test_single_rollup_read(self):
+        get_data_version(self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/fetch/dashboard/", {"year": 2024, "month": 2})
+        self.assertEqual(len(response.json()["line_sums"]), 29)
+        with self.assertNumQueries(1):
+            self.client.get("/api/fetch/dashboard/", {"year": 2024, "month": 2})
+
+    def test_missing_parameters(self):
+        response = self.client.get("/api/fetch/dashboard/", {"year": 2024})
+        self.assertEqual(response.status_code, 400)
+
+
+class TrendsEndpointTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="trenduser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        receipts = [
+            ("2024-01-10", "Lidl", "expense", [("food_drinks", "30.00"), ("chemistry", "10.00")]),
+            ("2024-01-31", "Orlen", "expense", [("fuel", "60.00")]),
+            ("2024-02-05", "Lidl", "expense", [("food_drinks", "50.00")]),
+            ("2024-02-10", "Firma", "income", [("work_income", "1000.00")]),
+            ("2024-04-01", "Lidl", "expense", [("food_drinks", "20.00")]),
+            ("2024-05-01", "Lidl", "expense", [("food_drinks", "999.00")]),
+        ]
+        self.client.post(
+            "/api/receipts/",
+            [
+                {
+                    "payment_date": payment_date,
+                    "shop": shop,
+                    "transaction_type": transaction_type,
+                    "items": [
+                        {"category": category, "value": value, "description": category}
+                        for category, value in items
+                    ],
+                }
+                for payment_date, shop, transaction_type, items in receipts
+            ],
+            format="json",
+        )
+
+    def fetch(self, **params):
+        return self.client.get("/api/fetch/trends/", params)
+
+    def test_monthly_trends(self):
+        response = self.fetch(start="2024-01-01", end="2024-04-30", window=2)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        periods = {row["period"]: row for row in data["periods"]}
+        self.assertEqual(list(periods), ["2024-01-01", "2024-02-01", "2024-03-01", "2024-04-01"])
+        self.assertEqual([row["expense"] for row in data["periods"]], [100.0, 50.0, 0.0, 20.0])
+        self.assertEqual(periods["2024-02-01"]["expense_rolling"], 75.0)
+        self.assertEqual(periods["2024-02-01"]["expense_change"], -50.0)
+        self.assertEqual(periods["2024-02-01"]["expense_change_pct"], -50.0)
+        self.assertIsNone(periods["2024-01-01"]["expense_change"])
+        self.assertIsNone(periods["2024-04-01"]["expense_change_pct"])
+        self.assertEqual(periods["2024-02-01"]["balance"], 950.0)
+        self.assertEqual(
+            periods["2024-01-01"]["category_shares"],
+            {"chemistry": 0.1, "food_drinks": 0.3, "fuel": 0.6},
+        )
+        self.assertEqual(data["categories"][0], {"category": "food_drinks", "expense_sum": 100.0, "share": 0.5882})
+        self.assertEqual(data["summary"]["expense_total"], 170.0)
+        self.assertEqual(data["summary"]["income_total"], 1000.0)
+
+    def test_daily_and_weekly_with_filters(self):
+        data = self.fetch(
+            start="2024-01-10", end="2024-02-05", granularity="week", **{"shop[]": ["Lidl"]}
+        ).json()
+        self.assertEqual(data["periods"][0]["period"], "2024-01-08")
+        self.assertEqual(len(data["periods"]), 5)
+        self.assertEqual(sum(row["expense"] for row in data["periods"]), 90.0)
+
+        data = self.fetch(
+            start="2024-01-01", end="2024-01-31", granularity="day", **{"category[]": ["fuel"]}
+        ).json()
+        self.assertEqual(len(data["periods"]), 31)
+        self.assertEqual(data["periods"][-1]["expense"], 60.0)
+        self.assertEqual(data["summary"]["expense_total"], 60.0)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"start": "2024-01-01"},
+            {"start": "2024-02-01", "end": "2024-01-01"},
+            {"start": "2024-01-01", "end": "2024-12-31", "granularity": "year"},
+            {"start": "x", "end": "2024-12-31"},
+            # poza zakresem pd.Timestamp
+            {"start": "1500-01-01", "end": "1500-02-01"},
+            {"start": "2262-05-01", "end": "2262-06-01"},
+            {"start": "0001-01-01", "end": "2024-01-01", "granularity": "month"},
+        ):
+            self.assertEqual(self.fetch(**params).status_code, 400, params)
+        with self.settings(TRENDS_MAX_PERIODS=30):
+            self.assertEqual(
+                self.fetch(start="2024-01-01", end="2024-12-31", granularity="day").status_code, 400
+            )
+
+
+class ReceiptOutlierTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="outlieruser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        food = ["10.00", "12.00", "11.00", "9.00", "10.50", "11.50", "10.00", "95.00"]
+        receipts = [
+            {
+                "payment_date": f"2024-03-{day + 1:02d}",
+                "shop": "Lidl",
+                "transaction_type": "expense",
+                "items": [
+                    {"category": "food_drinks", "value": value, "description": "zakupy"},
+                    {"category": "chemistry", "value": "5.00", "description": "mydło"},
+                ],
+            }
+            for day, value in enumerate(food)
+        ]
+        receipts.append(
+            {
+                "payment_date": "2024-04-01",
+                "shop": "Firma",
+                "transaction_type": "income",
+                "items": [{"category": "work_income", "value": "5000.00"}],
+            }
+        )
+        response = self.client.post("/api/receipts/", receipts, format="json")
+        self.receipt_ids = [receipt["id"] for receipt in response.json()]
+
+    def test_total_is_maintained_on_writes(self):
+        receipt = Receipt.objects.get(pk=self.receipt_ids[0])
+        self.assertEqual(receipt.total, Decimal("15.00"))
+        item = receipt.items.get(category="chemistry")
+        self.client.patch(
+            f"/api/receipts/{receipt.id}/",
+            {"items": [{"id": item.id, "value": "7.00"}, {"category": "fuel", "value": "100.00"}]},
+            format="json",
+        )
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.total, Decimal("117.00"))
+        self.client.delete(f"/api/items/{item.id}/")
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.total, Decimal("110.00"))
+
+    def test_top_receipts_use_stored_total(self):
+        response = self.client.get("/api/fetch/outliers/", {"k": 2, "year": 2024, "month": 3})
+        self.assertEqual(response.status_code, 200)
+        receipts = response.json()["receipts"]
+        self.assertEqual([receipt["total"] for receipt in receipts], [100.0, 17.0])
+        self.assertEqual(receipts[0]["receipt_id"], self.receipt_ids[7])
+        self.assertEqual(get_top_outlier_receipts(self.receipt_ids, 1), [self.receipt_ids[8]])
+        with self.assertNumQueries(1):
+            get_top_outlier_receipts(self.receipt_ids)
+
+    def test_statistical_outliers_per_category(self):
+        for mode in ("zscore", "iqr"):
+            params = {"mode": mode, "year": 2024}
+            if mode == "zscore":
+                params["threshold"] = 2
+            receipts = self.client.get("/api/fetch/outliers/", params).json()["receipts"]
+            self.assertEqual(len(receipts), 1, mode)
+            self.assertEqual(receipts[0]["receipt_id"], self.receipt_ids[7])
+            self.assertEqual(receipts[0]["category"], "food_drinks")
+            self.assertEqual(receipts[0]["value"], 95.0)
+            self.assertEqual(receipts[0]["payment_date"], "2024-03-08")
+        # kategoria ze stałą kwotą (odchylenie 0) nigdy nie jest oznaczana
+        flagged = statistical_outliers(self.user, "zscore", 0.1, None)
+        self.assertEqual({row["category"] for row in flagged}, {"food_drinks"})
+
+    def test_invalid_parameters(self):
+        for params in ({"mode": "median"}, {"month": 3}, {"k": "x"}, {"mode": "zscore", "threshold": -1}):
+            response = self.client.get("/api/fetch/outliers/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class MonthlyRollupTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollupuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            "shop": "Lidl",
+            "transaction_type": "expense",
+            "payment_date": "2025-04-07",
+            "items": [
+                {"category": "food_drinks", "value": "12.50", "description": "Ser", "quantity": 1},
+                {"category": "food_drinks", "value": "7.50", "description": "Chleb", "quantity": 1},
+                {"category": "chemistry", "value": "9.99", "description": "Mydło", "quantity": 1},
+            ],
+        }
+
+    def test_create_updates_rollups(self):
+        response = self.client.post("/api/receipts/", self.payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        food = MonthlyRollup.objects.get(user=self.user, category="food_drinks")
+        self.assertEqual((food.year, food.month, food.day), (2025, 4, 7))
+        self.assertEqual(food.value_sum, 20)
+        self.assertEqual(food.item_count, 2)
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_update_moves_rollups(self):
+        receipt_id = self.client.post("/api/receipts/", self.payload, format="json").json()["id"]
+        payload = dict(self.payload, payment_date="2025-05-01", shop="Biedronka")
+        payload["items"] = [{"category": "fuel", "value": "100.00", "description": "", "quantity": 1}]
+        response = self.client.put(f"/api/receipts/{receipt_id}/", payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(MonthlyRollup.objects.values_list("month", "category", "shop", "item_count")),
+            [(5, "fuel", "Biedronka", 1)],
+        )
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_delete_clears_rollups(self):
+        receipt_id = self.client.post("/api/receipts/", self.payload, format="json").json()["id"]
+        response = self.client.delete(f"/api/receipts/{receipt_id}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(MonthlyRollup.objects.exists())
+
+    def test_item_edit_updates_rollups(self):
+        self.client.post("/api/receipts/", self.payload, format="json")
+        item = Item.objects.get(description="Mydło")
+        response = self.client.patch(f"/api/items/{item.id}/", {"value": "19.99"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MonthlyRollup.objects.get(category="chemistry").value_sum, Decimal("19.99"))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_rebuild_command(self):
+        receipt = Receipt.objects.create(
+            user=self.user, shop="Orlen", transaction_type="expense", payment_date=date(2025, 4, 1)
+        )
+        Item.objects.create(user=self.user, category="fuel", value=150, receipt=receipt)
+        self.assertEqual(len(verify_rollups()), 1)
+
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+        self.assertIn("zgodne", out.getvalue())
+        self.assertEqual(verify_rollups(), [])
+
+
+class ReceiptItemReconciliationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reconcileuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        payload = {
+            "shop": "Lidl",
+            "transaction_type": "expense",
+            "payment_date": "2025-04-07",
+            "items": [
+                {"category": "food_drinks", "value": f"{i}.00", "description": f"Produkt {i}", "quantity": 1}
+                for i in range(1, 41)
+            ],
+        }
+        self.receipt = self.client.post("/api/receipts/", payload, format="json").json()
+        self.url = f"/api/receipts/{self.receipt['id']}/"
+
+    def frequencies(self):
+        return sorted(set(ItemPrediction.objects.filter(user=self.user).values_list("frequency", flat=True)))
+
+    def test_put_updates_only_changed_items(self):
+        payload = dict(self.receipt)
+        payload["items"] = [dict(item) for item in self.receipt["items"]]
+        payload["items"][0]["value"] = "99.00"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(
+            sorted(item["id"] for item in response.json()["items"]),
+            sorted(item["id"] for item in self.receipt["items"]),
+        )
+        self.assertEqual(Item.objects.get(id=payload["items"][0]["id"]).value, Decimal("99.00"))
+        self.assertEqual(self.frequencies(), [1])
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_put_removes_missing_and_creates_new_items(self):
+        payload = dict(self.receipt)
+        payload["items"] = self.receipt["items"][:2] + [
+            {"id": 0, "category": "chemistry", "value": "5.00", "description": "Produkt 1", "quantity": 1}
+        ]
+        response = self.client.put(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Item.objects.filter(receipt_id=self.receipt["id"]).count(), 3)
+        self.assertEqual(ItemPrediction.objects.get(item_description="produkt 1").frequency, 2)
+        self.assertFalse(ItemPrediction.objects.filter(item_description="produkt 3").exists())
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_patch_changed_items_only(self):
+        first, second = self.receipt["items"][:2]
+        response = self.client.patch(
+            self.url,
+            {"items": [{"id": first["id"], "description": "Masło"}], "removed_items": [second["id"]]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["items"]), 39)
+        self.assertEqual(Item.objects.get(id=first["id"]).value, Decimal("1.00"))
+        self.assertEqual(ItemPrediction.objects.get(item_description="masło").frequency, 1)
+        self.assertFalse(
+            ItemPrediction.objects.filter(item_description__in=["produkt 1", "produkt 2"]).exists()
+        )
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_patch_without_items_keeps_items(self):
+        response = self.client.patch(self.url, {"shop": "Biedronka"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["items"]), 40)
+        self.assertEqual(self.frequencies(), [1])
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_patch_rejects_foreign_and_incomplete_items(self):
+        response = self.client.patch(self.url, {"items": [{"id": 999999, "value": "1.00"}]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(self.url, {"items": [{"value": "1.00"}]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Item.objects.filter(receipt_id=self.receipt["id"]).count(), 40)
+
+
+class ChartCacheTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cacheuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            "shop": "Orlen",
+            "transaction_type": "expense",
+            "payment_date": "2025-06-02",
+            "items": [{"category": "fuel", "value": "100.00", "description": "Pb95", "quantity": 1}],
+        }
+        self.client.post("/api/receipts/", self.payload, format="json")
+
+    def test_cached_response_skips_aggregation(self):
+        params = {"month": 6, "year": 2025}
+        first = self.client.get("/api/fetch/bar-shops/", params)
+        with self.assertNumQueries(1):
+            second = self.client.get("/api/fetch/bar-shops/", params)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_write_invalidates_cache(self):
+        params = {"month": 6, "year": 2025}
+        before = self.client.get("/api/fetch/pie-categories/", params)
+        self.client.post("/api/receipts/", self.payload, format="json")
+        after = self.client.get("/api/fetch/pie-categories/", params)
+        self.assertNotEqual(before["ETag"], after["ETag"])
+        self.assertEqual(after.json()[0]["expense_sum"], 200.0)
+
+    def test_etag_not_modified(self):
+        params = {"month": 6, "year": 2025}
+        etag = self.client.get("/api/fetch/line-sums/", params)["ETag"]
+        response = self.client.get("/api/fetch/line-sums/", params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_none_match_compares_whole_etags(self):
+        params = {"month": 6, "year": 2025}
+        etag = self.client.get("/api/fetch/line-sums/", params)["ETag"]
+        cases = [
+            (f'"other", W/{etag}', 304),
+            ("*", 304),
+            (f' "stale" ,{etag} ', 304),
+            (f'"x{etag[1:]}', 200),
+            (f"{etag[:-2]}\"", 200),
+            # cały ETag wewnątrz innej wartości nie jest dopasowaniem
+            (f'"stale-{etag}"', 200),
+        ]
+        for header, status in cases:
+            response = self.client.get("/api/fetch/line-sums/", params, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, status, header)
+
+    def test_category_order_is_normalized(self):
+        first = self.client.get(
+            "/api/fetch/bar-shops/?month=6&year=2025&category[]=fuel&category[]=alcohol"
+        )
+        second = self.client.get(
+            "/api/fetch/bar-shops/?year=2025&category[]=alcohol&month=6&category[]=fuel"
+        )
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_read_does_not_create_data_version(self):
+        UserDataVersion.objects.filter(user=self.user).delete()
+        response = self.client.get("/api/fetch/line-sums/", {"month": 6, "year": 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(UserDataVersion.objects.filter(user=self.user).exists())
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get("/api/fetch/bar-shops/", {"month": 6})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header("ETag"))
+
+
+class BulkReceiptImportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulkuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        ItemPrediction.objects.create(user=self.user, item_description="mleko", frequency=5)
+        RecentShop.objects.create(user=self.user, name="lidl")
+
+    def payload(self, count):
+        return [
+            {
+                "shop": "Lidl" if i % 2 else "Biedronka",
+                "transaction_type": "expense",
+                "payment_date": f"2025-07-{i % 28 + 1:02d}",
+                "items": [
+                    {"category": "food_drinks", "value": "3.50", "description": "Mleko", "quantity": 1},
+                    {"category": "chemistry", "value": "8.00", "description": "Proszek", "quantity": 1},
+                ],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        with self.assertLogs("backend_api.serializers", "INFO") as logs:
+            response = self.client.post("/api/receipts/", self.payload(40), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 40)
+        self.assertEqual(len(response.json()[0]["items"]), 2)
+        self.assertIn("items/s", logs.output[0])
+
+        self.assertEqual(Receipt.objects.filter(user=self.user).count(), 40)
+        self.assertEqual(ItemPrediction.objects.get(item_description="mleko").frequency, 45)
+        self.assertEqual(ItemPrediction.objects.get(item_description="proszek").frequency, 40)
+        self.assertEqual(
+            sorted(RecentShop.objects.filter(user=self.user).values_list("name", flat=True)),
+            ["biedronka", "lidl"],
+        )
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_query_count_does_not_grow_with_receipts(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/receipts/", self.payload(150), format="json")
+        self.assertEqual(response.status_code, 201)
+        # stała liczba zapytań zamiast kilku na każdy paragon i pozycję
+        self.assertLess(len(ctx.captured_queries), 30)
+
+
+class ReceiptTransferTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="transferuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            "/api/receipts/",
+            [
+                {
+                    "shop": "Lidl",
+                    "transaction_type": "expense",
+                    "payment_date": "2025-08-02",
+                    "items": [
+                        {"category": "food_drinks", "value": "3.50", "description": "Mleko, 2%", "quantity": 2},
+                        {"category": "chemistry", "value": "8.00", "description": "Proszek", "quantity": 1},
+                    ],
+                },
+                {
+                    "shop": "Firma",
+                    "transaction_type": "income",
+                    "payment_date": "2025-08-01",
+                    "items": [],
+                },
+            ],
+            format="json",
+        )
+
+    def export(self, file_format):
+        response = self.client.get("/api/receipts/export/", {"file_format": file_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        lines = [json.loads(line) for line in self.export("ndjson").splitlines()]
+        self.assertEqual([line["shop"] for line in lines], ["Firma", "Lidl"])
+        self.assertEqual(lines[0]["items"], [])
+        self.assertEqual(
+            lines[1]["items"][0],
+            {"category": "food_drinks", "value": "3.50", "description": "Mleko, 2%", "quantity": "2"},
+        )
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(StringIO(self.export("csv"))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["category"], "")
+        self.assertEqual(rows[1]["description"], "Mleko, 2%")
+
+    def test_round_trip_to_other_user(self):
+        for file_format in ("ndjson", "csv"):
+            content = self.export(file_format).encode()
+            other = User.objects.create_user(username=f"importer_{file_format}", password="pass")
+            self.client.force_authenticate(user=other)
+            upload = SimpleUploadedFile(f"receipts.{file_format}", content)
+            with self.settings(BULK_IMPORT_BATCH_SIZE=1):
+                response = self.client.post("/api/receipts/import/", {"file": upload})
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertEqual(
+                response.json(),
+                {"imported_receipts": 2, "imported_items": 2, "duplicate_receipts": 0},
+            )
+            self.assertEqual(
+                sorted(Item.objects.filter(user=other).values_list("description", flat=True)),
+                ["Mleko, 2%", "Proszek"],
+            )
+            self.assertEqual(verify_rollups(other), [])
+            self.client.force_authenticate(user=self.user)
+
+    def test_import_reports_invalid_batch(self):
+        content = (
+            '{"shop": "A", "transaction_type": "expense", "payment_date": "2025-08-03", "items": []}\n'
+            '{"shop": "B", "transaction_type": "bogus", "payment_date": "2025-08-03", "items": []}\n'
+        ).encode()
+        upload = SimpleUploadedFile("receipts.ndjson", content)
+        with self.settings(BULK_IMPORT_BATCH_SIZE=1):
+            response = self.client.post("/api/receipts/import/", {"file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["imported_receipts"], 1)
+        self.assertIn("paragon 2", response.json()["error"])
+
+    def test_large_import_runs_in_background(self):
+        content = self.export("ndjson").encode()
+        other = User.objects.create_user(username="importer_bg", password="pass")
+        self.client.force_authenticate(user=other)
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            upload = SimpleUploadedFile("receipts.ndjson", content)
+            response = self.client.post("/api/receipts/import/?background=1", {"file": upload})
+            self.assertEqual(response.status_code, 202)
+            self.assertFalse(Receipt.objects.filter(user=other).exists())
+            call_command("runworker", once=True, processes=0, stdout=StringIO())
+            self.assertEqual(os.listdir(os.path.join(media_root, "imports")), [])
+        job = self.client.get(f"/api/jobs/{response.json()['job_id']}/").json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(
+            job["result"], {"imported_receipts": 2, "imported_items": 2, "duplicate_receipts": 0}
+        )
+        self.assertEqual(verify_rollups(other), [])
+
+
+class ReceiptFingerprintTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="fingerprintuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.receipt_data = {
+            "shop": "Lidl",
+            "transaction_type": "expense",
+            "payment_date": "2025-09-01",
+            "items": [
+                {"category": "food_drinks", "value": "3.50", "description": "Mleko", "quantity": 2},
+                {"category": "chemistry", "value": "8.00", "description": "Proszek", "quantity": 1},
+            ],
+        }
+
+    def create(self, data):
+        response = self.client.post("/api/receipts/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return Receipt.objects.get(pk=response.json()["id"])
+
+    def test_fingerprint_ignores_item_order_and_formatting(self):
+        receipt = self.create(self.receipt_data)
+        self.assertEqual(len(receipt.fingerprint), 64)
+        reordered = dict(
+            self.receipt_data,
+            shop=" LIDL ",
+            items=[
+                {"category": "chemistry", "value": "8", "description": "proszek"},
+                {"category": "food_drinks", "value": "3.5", "description": "MLEKO ", "quantity": "2"},
+            ],
+        )
+        self.assertEqual(self.create(reordered).fingerprint, receipt.fingerprint)
+        other_items = dict(self.receipt_data, items=self.receipt_data["items"][:1])
+        self.assertNotEqual(self.create(other_items).fingerprint, receipt.fingerprint)
+
+    def test_fingerprint_follows_updates(self):
+        receipt = self.create(self.receipt_data)
+        original = receipt.fingerprint
+        item = receipt.items.get(description="Mleko")
+        response = self.client.patch(
+            f"/api/receipts/{receipt.id}/",
+            {"items": [{"id": item.id, "value": "4.00"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        receipt.refresh_from_db()
+        self.assertNotEqual(receipt.fingerprint, original)
+
+        self.client.patch(f"/api/items/{item.id}/", {"value": "3.50"}, format="json")
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.fingerprint, original)
+
+        self.client.patch(f"/api/receipts/{receipt.id}/", {"shop": "Biedronka"}, format="json")
+        receipt.refresh_from_db()
+        self.assertEqual(
+            receipt.fingerprint,
+            receipt_fingerprint(date(2025, 9, 1), "biedronka", "expense", receipt.items.all()),
+        )
+
+    def test_migration_fingerprint_matches_runtime(self):
+        # migracja 0007 ma własną kopię funkcji; paragony sprzed niej muszą mieć te same odciski
+        migration = importlib.import_module("backend_api.migrations.0007_receipt_fingerprint")
+        receipt = self.create(dict(self.receipt_data, shop=" Lidl "))
+        items = list(receipt.items.all()) + [Item(category="other", value=None, description=None, quantity=None)]
+        self.assertEqual(
+            migration.receipt_fingerprint(receipt.payment_date, receipt.shop, receipt.transaction_type, items),
+            receipt_fingerprint(receipt.payment_date, receipt.shop, receipt.transaction_type, items),
+        )
+        self.assertEqual(
+            migration.receipt_fingerprint(
+                receipt.payment_date, receipt.shop, receipt.transaction_type, receipt.items.all()
+            ),
+            receipt.fingerprint,
+        )
+
+    def test_duplicate_report_is_scoped_to_user(self):
+        first = self.create(self.receipt_data)
+        second = self.create(self.receipt_data)
+        self.create(dict(self.receipt_data, payment_date="2025-09-02"))
+        other = User.objects.create_user(username="fingerprintother", password="pass")
+        Receipt.objects.create(
+            user=other, shop="Lidl", transaction_type="expense",
+            payment_date=date(2025, 9, 1), fingerprint=first.fingerprint,
+        )
+
+        response = self.client.get("/api/debug/receipts/duplicates/")
+        duplicates = response.json()["duplicates"]
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0]["receipt_ids"], [first.id, second.id])
+        self.assertEqual(duplicates[0]["count"], 2)
+
+        self.client.force_authenticate(user=other)
+        response = self.client.get("/api/debug/receipts/duplicates/")
+        self.assertEqual(response.json(), {"status": "Brak duplikatów"})
+
+    def test_bulk_create_flags_or_skips_duplicates(self):
+        self.create(self.receipt_data)
+        new = dict(self.receipt_data, payment_date="2025-09-03")
+        response = self.client.post(
+            "/api/receipts/", [self.receipt_data, new, new], format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["X-Duplicate-Receipts"], "2")
+        self.assertEqual(len(response.json()), 3)
+
+        newer = dict(self.receipt_data, payment_date="2025-09-04")
+        response = self.client.post(
+            "/api/receipts/?duplicates=skip", [self.receipt_data, newer, newer], format="json"
+        )
+        self.assertEqual(response["X-Duplicate-Receipts"], "2")
+        self.assertEqual([receipt["payment_date"] for receipt in response.json()], ["2025-09-04"])
+        self.assertEqual(Receipt.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(verify_rollups(self.user), [])
+
+        response = self.client.post("/api/receipts/?duplicates=bogus", [new], format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_skips_existing_receipts(self):
+        self.create(self.receipt_data)
+        lines = [
+            json.dumps(self.receipt_data),
+            json.dumps(dict(self.receipt_data, payment_date="2025-09-05")),
+        ]
+        for duplicates, expected in (("flag", 2), ("skip", 0)):
+            upload = SimpleUploadedFile("receipts.ndjson", "\n".join(lines).encode())
+            with self.settings(BULK_IMPORT_BATCH_SIZE=1):
+                response = self.client.post(
+                    f"/api/receipts/import/?duplicates={duplicates}", {"file": upload}
+                )
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertEqual(response.json()["imported_receipts"], expected)
+        self.assertEqual(response.json()["duplicate_receipts"], 2)
+        self.assertEqual(Receipt.objects.filter(user=self.user).count(), 3)
+
+
+@jobs.task("test_flaky")
+def _flaky_task(job):
+    if job.attempts < job.payload["succeed_on"]:
+        raise RuntimeError("temporary failure")
+    return {"attempt": job.attempts}
+
+
+class JobQueueTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="jobuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+
+    def test_retry_with_backoff_then_succeed(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 2})
+        with self.settings(JOB_RETRY_BACKOFF=10), self.assertLogs("backend_api.jobs", "WARNING"):
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("queued", 1))
+        self.assertIn("temporary failure", job.error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=5))
+
+        # przed upływem backoffu zadanie nie jest pobierane
+        self.assertEqual(jobs.run_pending(), 0)
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.error), ("succeeded", {"attempt": 2}, ""))
+
+    def test_fails_after_max_attempts(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 99})
+        with self.assertLogs("backend_api.jobs", "WARNING") as logs:
+            for _ in range(job.max_attempts):
+                Job.objects.filter(id=job.id).update(run_after=timezone.now())
+                jobs.run_pending()
+        self.assertIn("failed permanently", logs.output[-1])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", job.max_attempts))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claim_is_exclusive(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 1})
+        self.assertEqual(jobs.claim_jobs(10), [job.id])
+        self.assertEqual(jobs.claim_jobs(10), [])
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 1})
+        Job.objects.filter(id=job.id).update(status="running", started_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+
+    def test_stale_job_without_attempts_left_fails(self):
+        job = jobs.enqueue(
+            "import_receipts", user=self.user, payload={"path": "imports/x.csv", "file_format": "csv"}
+        )
+        self.assertEqual(jobs.claim_jobs(10), [job.id])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("running", 1))
+
+        # worker padł w trakcie importu: ponowienie zdublowałoby zatwierdzone paczki
+        Job.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(days=1))
+        with self.assertLogs("backend_api.jobs", "ERROR"):
+            self.assertEqual(jobs.requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 1))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.claim_jobs(10), [])
+
+    def test_running_jobs_of_this_worker_are_not_requeued(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 1})
+        Job.objects.filter(id=job.id).update(status="running", started_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.requeue_stale_jobs(exclude=[job.id]), 0)
+
+    def test_worker_requeues_stale_jobs_while_running(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 1})
+        stale = {"status": "running", "started_at": timezone.now() - timedelta(days=1)}
+        sleeps = []
+
+        def sleep(seconds):
+            # po pierwszym obiegu zadanie znów wisi; drugi obieg musi je przywrócić
+            sleeps.append(seconds)
+            if len(sleeps) > 1:
+                raise InterruptedError
+            Job.objects.filter(id=job.id).update(attempts=0, **stale)
+
+        Job.objects.filter(id=job.id).update(**stale)
+        with (
+            self.settings(JOB_STALE_CHECK_INTERVAL=0),
+            patch("backend_api.management.commands.runworker.time.sleep", side_effect=sleep),
+            self.assertRaises(InterruptedError),
+        ):
+            call_command("runworker", processes=0, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "succeeded")
+
+    def test_scheduled_jobs_enqueued_once_per_interval(self):
+        with self.settings(JOB_SCHEDULE={"test_flaky": 3600}):
+            self.assertEqual(len(jobs.enqueue_scheduled()), 1)
+            self.assertEqual(jobs.enqueue_scheduled(), [])
+
+    def test_concurrent_scheduling_creates_one_job(self):
+        real_get = QuerySet.get
+        calls = []
+
+        def get(queryset, *args, **kwargs):
+            # drugi worker sprawdził kolejkę, zanim pierwszy zapisał zadanie
+            calls.append(kwargs)
+            if len(calls) == 1:
+                jobs.enqueue_scheduled()
+                raise Job.DoesNotExist
+            return real_get(queryset, *args, **kwargs)
+
+        with self.settings(JOB_SCHEDULE={"test_flaky": 3600}):
+            with patch.object(QuerySet, "get", get):
+                self.assertEqual(jobs.enqueue_scheduled(), [])
+        self.assertEqual(Job.objects.filter(task="test_flaky").count(), 1)
+
+    def test_status_endpoints_are_per_user(self):
+        job = jobs.enqueue("test_flaky", user=self.user, payload={"succeed_on": 1})
+        self.assertEqual(self.client.get("/api/jobs/").json()[0]["id"], job.id)
+        other = User.objects.create_user(username="jobother", password="pass")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/").json(), [])
+
+
+class RecordingQuoteProvider(QuoteProvider):
+    batch_size = 250
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def fetch(self, symbols):
+        self.batches.append(list(symbols))
+        if self.fail_on in symbols:
+            raise ConnectionError("provider down")
+        return {symbol: Decimal(len(symbol)) for symbol in symbols}
+
+
+class InstrumentPriceUpdateTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        Instrument.objects.bulk_create(Instrument(symbol=f"SYM{i}") for i in range(2000))
+
+    def test_bulk_update_with_batched_fetch(self):
+        provider = RecordingQuoteProvider()
+        with CaptureQueriesContext(connection) as queries:
+            stats = update_instrument_prices(provider=provider)
+        self.assertEqual(stats, {"instruments": 2000, "updated": 2000, "missing": 0})
+        self.assertEqual(len(provider.batches), 8)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(Instrument.objects.get(symbol="SYM1999").current_price, Decimal("7"))
+        self.assertEqual(InstrumentPrice.objects.count(), 2000)
+
+    def test_ttl_cache_skips_fresh_symbols(self):
+        provider = RecordingQuoteProvider()
+        fetch_quotes(["SYM1", "SYM2"], provider)
+        quotes = fetch_quotes(["SYM1", "SYM2", "SYM3"], provider)
+        self.assertEqual(provider.batches, [["SYM1", "SYM2"], ["SYM3"]])
+        self.assertEqual(set(quotes), {"SYM1", "SYM2", "SYM3"})
+
+    def test_failed_batch_is_skipped(self):
+        provider = RecordingQuoteProvider(fail_on="SYM0")
+        with self.assertLogs("backend_api.quotes", "ERROR"):
+            stats = update_instrument_prices(provider=provider)
+        self.assertEqual(stats["missing"], 250)
+        self.assertIsNone(Instrument.objects.get(symbol="SYM0").current_price)
+
+    def test_file_provider_offline(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({"sym1": "101.25", "SYM2": 7, "SYM3": "n/a"}, f)
+        self.addCleanup(os.remove, f.name)
+        self.assertEqual(
+            FileQuoteProvider(f.name).fetch(["SYM1", "SYM2", "SYM3"]),
+            {"SYM1": Decimal("101.25"), "SYM2": Decimal("7")},
+        )
+        out = StringIO()
+        call_command("update_instrument_prices", fixture=f.name, stdout=out)
+        self.assertIn("2/2000", out.getvalue())
+
+    def test_scheduled_job_runs_updater(self):
+        with self.settings(QUOTE_PROVIDER="backend_api.tests.RecordingQuoteProvider"):
+            job = jobs.enqueue("update_instruments_prices")
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.result["updated"], 2000)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_seed_bench_generates_dataset(self):
+        out = StringIO()
+        call_command("seed_bench", items=500, users=2, months=3, prefix="seed_", stdout=out)
+        self.assertEqual(Item.objects.filter(user__username__startswith="seed_").count(), 500)
+        self.assertFalse(Receipt.objects.filter(user__username__startswith="seed_", items__isnull=True).exists())
+        user = User.objects.get(username="seed_0")
+        self.assertEqual(verify_rollups(user), [])
+        self.assertTrue(ItemPrediction.objects.filter(user=user).exists())
+        self.assertTrue(RecentShop.objects.filter(user=user).exists())
+        with self.assertRaises(CommandError):
+            call_command("seed_bench", items=10, prefix="seed_", stdout=out)
+
+    def test_bench_api_writes_json_report(self):
+        call_command("seed_bench", items=300, prefix="bench_user_", stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            call_command(
+                "bench_api", concurrency=1, requests=4, writes=True, output=output, stdout=StringIO()
+            )
+            out = StringIO()
+            call_command(
+                "bench_api", concurrency=1, requests=4, output=os.path.join(tmp, "next.json"),
+                baseline=output, stdout=out,
+            )
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+        self.assertIn("p95", out.getvalue())
+        self.assertEqual(report["dataset"]["items"], 300)
+        for name in ("receipts-month", "line-sums", "pie-categories", "bar-shops", "dashboard", "trends",
+                     "outliers", "items", "item-predictions", "recent-shops", "receipts-create"):
+            stats = report["endpoints"][name]
+            self.assertEqual((stats["requests"], stats["errors"]), (4, 0), name)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+            self.assertIsNotNone(stats["queries"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(
+            [percentile(values, p) for p in (50, 95, 99)], [50, 95, 99]
+        )
+
+
+class RequestMetricsTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="metricsuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.receipts = [
+            self.client.post(
+                "/api/receipts/",
+                {
+                    "shop": f"Sklep {n}",
+                    "transaction_type": "expense",
+                    "payment_date": f"2025-03-{n + 1:02d}",
+                    "items": [
+                        {"category": category, "value": "2.50", "description": f"{category} {n}", "quantity": 1}
+                        for category in ("fuel", "food_drinks", "chemistry")
+                    ],
+                },
+                format="json",
+            ).json()
+            for n in range(20)
+        ]
+
+    def test_endpoints_within_query_budget(self):
+        receipt = self.receipts[0]
+        responses = [
+            self.client.get("/api/receipts/"),
+            self.client.get("/api/receipts/", {"page_size": 5}),
+            self.client.get(f"/api/receipts/{receipt['id']}/"),
+            self.client.patch(f"/api/receipts/{receipt['id']}/", {"shop": "Orlen"}, format="json"),
+            self.client.put(f"/api/receipts/{receipt['id']}/", receipt, format="json"),
+            self.client.get("/api/items/"),
+            self.client.get("/api/fetch/line-sums/", {"month": 3, "year": 2025}),
+            self.client.get("/api/fetch/pie-categories/", {"month": 3, "year": 2025}),
+            self.client.get("/api/fetch/bar-shops/", {"month": 3, "year": 2025}),
+            self.client.get("/api/item-predictions/", {"q": "fuel"}),
+            self.client.get("/api/recent-shops/", {"q": "skl"}),
+            self.client.get("/api/jobs/"),
+            self.client.get("/api/receipts/export/"),
+            self.client.delete(f"/api/receipts/{self.receipts[1]['id']}/"),
+        ]
+        for response in responses:
+            self.assertLess(response.status_code, 300, response.request["PATH_INFO"])
+            self.assertWithinQueryBudget(response)
+
+    def test_create_query_count_independent_of_items(self):
+        def create(n_items, prefix):
+            return self.client.post(
+                "/api/receipts/",
+                {
+                    "shop": "Lidl",
+                    "transaction_type": "expense",
+                    "payment_date": "2025-03-05",
+                    "items": [
+                        {"category": "food_drinks", "value": "1.00", "description": f"{prefix} {i}", "quantity": 1}
+                        for i in range(n_items)
+                    ],
+                },
+                format="json",
+            )
+
+        create(1, "rozgrzewka")  # pierwszy zapis tworzy sklep i wiersz rollup
+        small, large = create(2, "mały"), create(40, "duży")
+        self.assertWithinQueryBudget(large)
+        self.assertEqual(small.request_metrics.queries, large.request_metrics.queries)
+        self.assertFalse(large.request_metrics.repeated_queries())
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/receipts/")
+        header = response["Server-Timing"]
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="2 queries"')
+        self.assertIn("serializer;dur=", header)
+        self.assertIn("view;dur=", header)
+        self.assertGreater(response.request_metrics.timings["serializer"], 0)
+
+    def test_streamed_queries_count_towards_budget(self):
+        response = self.client.get("/api/receipts/export/", {"file_format": "csv"})
+        self.assertEqual(response.request_metrics.queries, 0)
+        with self.assertLogs("backend_api.requests", "INFO") as logs:
+            self.assertIn(b"Sklep 7", response.getvalue())
+        self.assertEqual(response.request_metrics.queries, 1)
+        self.assertEqual(json.loads(logs.records[0].getMessage())["queries"], 1)
+
+        def over_budget_stream(request):
+            return StreamingHttpResponse(str(receipt.id) for receipt in Receipt.objects.filter(user=self.user))
+
+        middleware = RequestMetricsMiddleware(query_budget(0)(over_budget_stream))
+        request = RequestFactory().get("/stream/")
+        request.resolver_match = ResolverMatch(middleware.get_response, (), {})
+        response = middleware(request)
+        with self.assertLogs("backend_api.requests", "WARNING") as logs:
+            response.getvalue()
+        self.assertEqual(json.loads(logs.records[0].getMessage())["query_budget"], 0)
+
+    def test_detects_repeated_query_templates(self):
+        def n_plus_one_view(request):
+            for receipt in Receipt.objects.filter(user=self.user):
+                list(receipt.items.all())
+            return HttpResponse("ok")
+
+        middleware = RequestMetricsMiddleware(n_plus_one_view)
+        with self.assertLogs("backend_api.requests", "WARNING") as logs:
+            response = middleware(RequestFactory().get("/n-plus-one/"))
+        repeated = response.request_metrics.repeated_queries()
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0]["count"], 20)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["queries"], 21)
+        self.assertEqual(entry["n_plus_one"][0]["count"], 20)
+
+
+class StubPool:
+    def get_stats(self):
+        return {"pool_min": 2, "pool_max": 10, "pool_size": 3, "pool_available": 1, "requests_waiting": 0}
+
+
+class DatabasePoolStatsTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="pooladmin", password="pass")
+        self.user = User.objects.create_user(username="pooluser", password="pass")
+
+    def test_stats_without_pool(self):
+        stats = database_pool_stats()
+        self.assertEqual(stats["default"]["vendor"], connection.vendor)
+        if connection.vendor != "postgresql":
+            self.assertIsNone(stats["default"]["pool"])
+
+    def test_stats_report_pool_sizes(self):
+        with patch.object(connection, "pool", StubPool(), create=True):
+            pool = database_pool_stats()["default"]["pool"]
+        self.assertEqual(pool["pool_max"], 10)
+        self.assertEqual(pool["pool_size"], 3)
+
+    def test_endpoint_is_admin_only(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get("/api/debug/db-pool/").status_code, 403)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get("/api/debug/db-pool/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["pid"], os.getpid())
+        self.assertIn("default", response.json()["databases"])
+        self.assertEqual(response.request_metrics.queries, 0)
+
+
+@skipUnless(
+    connection.vendor == "postgresql" and "pool" in connection.settings_dict["OPTIONS"],
+    "Pula połączeń sprawdzana tylko na PostgreSQL z DB_POOL=1",
+)
+class PostgresConnectionPoolTest(TestCase):
+    def test_connection_comes_from_configured_pool(self):
+        connection.ensure_connection()
+        options = connection.settings_dict["OPTIONS"]["pool"]
+        self.assertIs(connection.connection._pool, connection.pool)
+        self.assertEqual(connection.pool.max_size, options["max_size"])
+        stats = database_pool_stats()["default"]["pool"]
+        self.assertGreaterEqual(stats["pool_size"], 1)
+        self.assertEqual(connection.settings_dict["CONN_MAX_AGE"], 0)
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="jwtcacheuser", password="pass12345!")
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        user_cache.clear()
+        autosuggest_index.clear()
+
+    def get(self, path="/api/item-predictions/", **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params, headers=self.auth)
+        user_queries = [q["sql"] for q in queries.captured_queries if '"auth_user"' in q["sql"]]
+        return response, user_queries
+
+    def test_user_is_read_once_per_ttl(self):
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(user_queries), 1)
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+
+        with override_settings(AUTH_USER_CACHE_TTL=0):
+            user_cache.clear()
+            self.get()
+            self.assertEqual(len(self.get()[1]), 1)
+
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_cache_is_size_bounded(self):
+        for i in range(3):
+            user = User.objects.create_user(username=f"jwtcache{i}", password="pass")
+            headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+            self.assertEqual(self.client.get("/api/item-predictions/", headers=headers).status_code, 200)
+        self.assertEqual(len(user_cache), 2)
+
+    def test_password_change_invalidates_entry(self):
+        self.get()
+        self.assertIsNotNone(user_cache.get(self.user.id))
+        response = self.client.post(
+            "/auth/users/set_password/",
+            {"current_password": "pass12345!", "new_password": "n3w-Passw0rd!"},
+            headers=self.auth,
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(user_cache.get(self.user.id))
+
+    def test_deactivation_and_deletion_invalidate_entry(self):
+        self.get()
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        response, _ = self.get()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "user_inactive")
+
+        self.user.is_active = True
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.get()[0].status_code, 200)
+        response = self.client.delete(
+            "/auth/users/me/", {"current_password": "pass12345!"}, headers=self.auth
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(user_cache.get(self.user.id))
+        response, _ = self.get()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "user_not_found")
+
+    def test_requests_get_their_own_user_instance(self):
+        request = RequestFactory().get("/api/receipts/", HTTP_AUTHORIZATION=self.auth["Authorization"])
+        first, _ = CachedJWTAuthentication().authenticate(request)
+        second, _ = CachedJWTAuthentication().authenticate(request)
+        third, _ = CachedJWTAuthentication().authenticate(request)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertIsNot(second, third)
+        second.first_name = "zmiana"
+        second._state.fields_cache["marker"] = object()
+        self.assertEqual(third.first_name, "")
+        self.assertNotIn("marker", user_cache.get(self.user.id)._state.fields_cache)
+
+    def test_schema_keeps_jwt_security(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertIn("jwtAuth", schema["components"]["securitySchemes"])
+        self.assertIn({"jwtAuth": []}, schema["paths"]["/api/fetch/line-sums/"]["get"]["security"])
+        self.assertIn({"jwtAuth": []}, schema["paths"]["/api/receipts/"]["post"]["security"])
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads_trust_claims(self):
+        ItemPrediction.objects.create(user=self.user, item_description="mleko", frequency=3)
+        response, user_queries = self.get(q="mle")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+        self.assertEqual(response.json()["results"], [{"name": "Mleko", "frequency": 3}])
+        self.assertIsNone(user_cache.get(self.user.id))
+
+        response, user_queries = self.get("/api/fetch/line-sums/", month=1, year=2025)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+
+        # zapisy i widoki spoza odczytu nadal sprawdzają konto
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get(q="mle")[0].status_code, 200)
+        response = self.client.delete("/api/item-predictions/", headers=self.auth)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get("/api/jobs/", headers=self.auth).status_code, 401)
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads_reject_removed_accounts(self):
+        self.assertEqual(self.get("/api/fetch/line-sums/", month=1, year=2025)[0].status_code, 200)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        response, _ = self.get("/api/fetch/line-sums/", month=1, year=2025)
+        self.assertEqual((response.status_code, response.json()["code"]), (401, "user_inactive"))
+
+        self.user.is_active = True
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.get(q="mle")[0].status_code, 200)
+        self.user.delete()
+        for path, params in [("/api/fetch/line-sums/", {"month": 1, "year": 2025}), ("/api/item-predictions/", {})]:
+            response, user_queries = self.get(path, **params)
+            self.assertEqual((response.status_code, response.json()["code"]), (401, "user_not_found"))
+            self.assertEqual(user_queries, [])
+
+
+class FastReadPathTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="fastreaduser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            "/api/receipts/",
+            [
+                {
+                    "shop": "Żabka \u2028 Centrum",
+                    "transaction_type": "expense",
+                    "payment_date": f"2025-0{month}-1{month}",
+                    "items": [
+                        {"category": "food_drinks", "value": "3.5", "description": "Mleko „łaciate”", "quantity": 2},
+                        {"category": "chemistry", "value": "8", "description": None},
+                        {"category": "other", "value": "0.01", "description": ""},
+                    ],
+                }
+                for month in range(1, 5)
+            ]
+            + [{"shop": "Firma", "transaction_type": "income", "payment_date": "2025-01-01", "items": []}],
+            format="json",
+        )
+        # pozycja bez paragonu (dodana przez /api/items/)
+        self.client.post("/api/items/", {"category": "fuel", "value": "100.00"}, format="json")
+
+    def assertSameBytes(self, path, params=None):
+        # stara ścieżka: serializery DRF i json.dumps z JSONRenderer
+        with self.settings(FAST_READ_PATH=False), patch.object(
+            ORJSONRenderer, "render", JSONRenderer.render
+        ):
+            expected = self.client.get(path, params)
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    def test_receipt_list_matches_serializer_output(self):
+        response = self.assertSameBytes("/api/receipts/")
+        self.assertEqual(len(response.json()), 5)
+        self.assertIn(b"\\u2028", response.content)
+        self.assertSameBytes("/api/receipts/", {"category": "chemistry", "month": 2, "year": 2025})
+
+    def test_paginated_receipt_list_matches_serializer_output(self):
+        response = self.assertSameBytes("/api/receipts/", {"page_size": 2})
+        next_url = response.json()["next"]
+        self.assertIsNotNone(next_url)
+        self.assertSameBytes(next_url)
+
+    def test_item_list_matches_serializer_output(self):
+        response = self.assertSameBytes("/api/items/")
+        self.assertEqual(len(response.json()), 13)
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            "decimal": Decimal("1.50"),
+            "date": date(2025, 1, 2),
+            "datetime": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            "uuid": uuid.UUID(int=1),
+            1: ["ą", "\u2029", None, True, 1.25],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_fast_path_query_count(self):
+        # paragony + pozycje jednym IN; lista pozycji jednym zapytaniem
+        with self.assertNumQueries(2):
+            self.client.get("/api/receipts/")
+        with self.assertNumQueries(1):
+            self.client.get("/api/items/")
+
+
+class ReceiptKeysetPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pageuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            "/api/receipts/",
+            [
+                {
+                    "shop": f"Sklep {i}",
+                    "transaction_type": "expense",
+                    "payment_date": f"2025-09-{i % 3 + 1:02d}",
+                    "items": [{"category": "other", "value": "1.00", "description": "", "quantity": 1}],
+                }
+                for i in range(7)
+            ],
+            format="json",
+        )
+        self.expected = list(
+            Receipt.objects.filter(user=self.user).order_by("payment_date", "id").values_list("id", flat=True)
+        )
+
+    def test_unpaginated_list_is_unchanged(self):
+        response = self.client.get("/api/receipts/")
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual([receipt["id"] for receipt in response.json()], self.expected)
+
+    def test_walk_pages(self):
+        ids = []
+        url = "/api/receipts/?page_size=3"
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(receipt["id"] for receipt in response.json()["results"])
+            url = response.json()["next"]
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, self.expected)
+
+    def test_items_are_prefetched(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/receipts/", {"page_size": 5})
+        self.assertEqual(len(response.json()["results"][0]["items"]), 1)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/receipts/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class ReceiptPeriodFilterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="filteruser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        for payment_date in [date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 31), date(2025, 2, 1)]:
+            Receipt.objects.create(
+                user=self.user, shop="Lidl", transaction_type="expense", payment_date=payment_date
+            )
+
+    def dates(self, params):
+        response = self.client.get("/api/receipts/", params)
+        self.assertEqual(response.status_code, 200)
+        return [receipt["payment_date"] for receipt in response.json()]
+
+    def test_month_and_year_use_date_range(self):
+        with CaptureQueriesContext(connection) as ctx:
+            dates = self.dates({"month": 1, "year": 2025})
+        self.assertEqual(dates, ["2025-01-01", "2025-01-31"])
+        self.assertIn("BETWEEN", ctx.captured_queries[0]["sql"])
+
+    def test_year_only(self):
+        self.assertEqual(self.dates({"year": 2024}), ["2024-12-31"])
+
+    def test_exact_day(self):
+        self.assertEqual(self.dates({"year": 2025, "month": 1, "day": 31}), ["2025-01-31"])
+
+    def test_month_only_and_invalid_day(self):
+        self.assertEqual(self.dates({"month": 2}), ["2025-02-01"])
+        self.assertEqual(self.dates({"year": 2025, "month": 2, "day": 30}), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "Plany zapytań sprawdzane tylko na PostgreSQL")
+class PostgresIndexPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(username=f"planuser{i}") for i in range(50)])
+        receipts = Receipt.objects.bulk_create(
+            [
+                Receipt(
+                    user=user,
+                    shop="Lidl",
+                    transaction_type="income" if day % 10 == 0 else "expense",
+                    payment_date=date(2023 + day % 3, day % 12 + 1, day % 28 + 1),
+                )
+                for user in users
+                for day in range(400)
+            ],
+            batch_size=5000,
+        )
+        Item.objects.bulk_create(
+            [
+                Item(user_id=receipt.user_id, receipt=receipt, category=category, value=10)
+                for receipt in receipts
+                for category in ("fuel", "food_drinks", "chemistry")
+            ],
+            batch_size=5000,
+        )
+        cls.user = users[7]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+        self.assertNotIn(f"Seq Scan on {queryset.model._meta.db_table}", plan, plan)
+
+    def test_receipt_month_filter(self):
+        first, last = period_date_range(2024, 5)
+        self.assertUsesIndex(
+            Receipt.objects.filter(user=self.user, payment_date__range=(first, last)).order_by(
+                "payment_date", "id"
+            ),
+            "receipt_user_date_idx",
+        )
+
+    def test_receipt_type_filter(self):
+        first, last = period_date_range(2024, 5)
+        self.assertUsesIndex(
+            Receipt.objects.filter(
+                user=self.user, transaction_type="income", payment_date__range=(first, last)
+            ),
+            "receipt_user_type_date_idx",
+        )
+
+    def test_item_category_filter(self):
+        self.assertUsesIndex(
+            Item.objects.filter(user=self.user, category="fuel"), "item_user_category_idx"
+        )
+
+
+class PrefixTrieTest(TestCase):
+    def setUp(self):
+        self.trie = PrefixTrie(max_depth=4)
+        for text, frequency in [("mleko łaciate", 3), ("jogurt mleko", 9), ("masło", 5), ("mleczko", 1)]:
+            self.trie.add(text, -frequency, text)
+
+    def test_matches_word_prefixes_ranked(self):
+        self.assertEqual(self.trie.search("mle", 10), ["jogurt mleko", "mleko łaciate", "mleczko"])
+        self.assertEqual(self.trie.search("mle", 2), ["jogurt mleko", "mleko łaciate"])
+
+    def test_query_longer_than_depth(self):
+        self.assertEqual(self.trie.search("mleko ła", 10), ["mleko łaciate"])
+        self.assertEqual(self.trie.search("xyz", 10), [])
+
+    def test_update_and_remove(self):
+        nodes = self.trie.node_count
+        self.trie.add("mleczko", -20, "mleczko")
+        self.trie.remove("jogurt mleko")
+        self.assertEqual(self.trie.search("mle", 10), ["mleczko", "mleko łaciate"])
+        self.assertEqual(self.trie.node_count, nodes)
+
+    def test_large_index_latency(self):
+        rng = random.Random(0)
+        words = ["".join(rng.choice("abcdeghiklmnoprstuwyz") for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+        trie = PrefixTrie()
+        for i in range(30000):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+            trie.add(text, -(i % 500), i)
+        query = words[0][:3]
+        started = time.perf_counter()
+        for _ in range(100):
+            results = trie.search(query, 10)
+        elapsed_ms = (time.perf_counter() - started) * 10
+        self.assertEqual(len(results), 10)
+        self.assertLess(elapsed_ms, 5)
+
+
+class SearchViewsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="searchuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        ItemPrediction.objects.bulk_create(
+            [ItemPrediction(user=self.user, item_description=f"mleko {i}", frequency=i) for i in range(30)]
+            + [ItemPrediction(user=self.user, item_description="jogurt mleczny", frequency=100)]
+        )
+        RecentShop.objects.create(user=self.user, name="lidl")
+        RecentShop.objects.create(user=self.user, name="lidl express")
+        autosuggest_index.clear()
+
+    def test_predictions_top_k_by_frequency(self):
+        response = self.client.get("/api/item-predictions/", {"q": "Mle"})
+        results = response.json()["results"]
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0], {"name": "Jogurt mleczny", "frequency": 100})
+        self.assertEqual(results[1]["name"], "Mleko 29")
+
+    def test_limit_param_is_capped(self):
+        response = self.client.get("/api/item-predictions/", {"q": "mleko", "limit": 1000})
+        self.assertEqual(len(response.json()["results"]), 30)
+        response = self.client.get("/api/item-predictions/", {"q": "mleko", "limit": 3})
+        self.assertEqual(len(response.json()["results"]), 3)
+
+    def test_listing_without_query_is_limited(self):
+        response = self.client.get("/api/item-predictions/")
+        self.assertEqual(len(response.json()["results"]), 10)
+        self.assertEqual(response.json()["results"][0]["name"], "Jogurt mleczny")
+        response = self.client.get("/api/recent-shops/", {"limit": 1})
+        self.assertEqual(response.json()["results"], [{"id": RecentShop.objects.get(name="lidl").id, "name": "Lidl"}])
+
+    @override_settings(AUTOSUGGEST_REFRESH_SECONDS=60)
+    def test_listing_without_query_is_served_from_memory(self):
+        autosuggest_index.get(self.user.pk)
+        ItemPrediction.objects.create(user=self.user, item_description="a-poza-indeksem", frequency=1)
+        with self.assertNumQueries(0):
+            predictions = self.client.get("/api/item-predictions/", {"limit": 2}).json()["results"]
+            shops = self.client.get("/api/recent-shops/").json()["results"]
+        self.assertEqual(
+            predictions, [{"name": "Jogurt mleczny", "frequency": 100}, {"name": "Mleko 0", "frequency": 0}]
+        )
+        self.assertEqual([shop["name"] for shop in shops], ["Lidl", "Lidl express"])
+
+    def test_trigram_lookup_is_not_registered_globally(self):
+        self.assertNotIn("trigram_word_similar", models.CharField.get_lookups())
+
+    def test_shops_by_recency(self):
+        RecentShop.objects.filter(name="lidl express").update(last_used=timezone.now() + timedelta(days=1))
+        response = self.client.get("/api/recent-shops/", {"q": "lid"})
+        names = [shop["name"] for shop in response.json()["results"]]
+        self.assertEqual(names, ["Lidl express", "Lidl"])
+
+    def test_new_receipt_updates_suggestions(self):
+        self.client.get("/api/item-predictions/", {"q": "kef"})
+        self.client.post(
+            "/api/receipts/",
+            {
+                "shop": "Lidl",
+                "transaction_type": "expense",
+                "payment_date": "2025-10-01",
+                "items": [{"category": "food_drinks", "value": "4.00", "description": "Kefir", "quantity": 1}],
+            },
+            format="json",
+        )
+        response = self.client.get("/api/item-predictions/", {"q": "kef"})
+        self.assertEqual(response.json()["results"], [{"name": "Kefir", "frequency": 1}])
+
+    def test_rebuild_predictions_is_set_based(self):
+        receipt = Receipt.objects.create(
+            user=self.user, shop=" Lidl ", transaction_type="expense", payment_date=date(2025, 4, 1)
+        )
+        Item.objects.bulk_create(
+            [Item(user=self.user, receipt=receipt, category="food_drinks", value=1, description=f" Mleko {i % 3}") for i in range(30)]
+            + [Item(user=self.user, receipt=receipt, category="food_drinks", value=1, description=f"chleb {i}") for i in range(299)]
+            + [Item(user=self.user, receipt=receipt, category="food_drinks", value=1, description="Śledź")]
+            + [Item(user=self.user, receipt=receipt, category="food_drinks", value=1, description="  ")]
+        )
+        response = self.client.post("/api/item-predictions/")
+        self.assertEqual(response.status_code, 202)
+        with CaptureQueriesContext(connection) as queries:
+            call_command("runworker", once=True, processes=0, stdout=StringIO())
+        self.assertLess(len(queries), 20)
+        job = self.client.get(f"/api/jobs/{response.json()['job_id']}/").json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["predictions"], 303)
+        self.assertEqual(ItemPrediction.objects.get(item_description="mleko 0").frequency, 10)
+        self.assertEqual(ItemPrediction.objects.get(item_description="mleko 29").frequency, 29)
+        self.assertEqual(ItemPrediction.objects.filter(user=self.user).count(), 331)
+        self.assertEqual(ItemPrediction.objects.get(item_description="śledź").frequency, 1)
+        self.assertFalse(ItemPrediction.objects.filter(item_description="").exists())
+
+    def test_rebuild_shops_upserts(self):
+        Receipt.objects.create(user=self.user, shop="Lidl ", transaction_type="expense", payment_date=date(2025, 4, 1))
+        Receipt.objects.create(user=self.user, shop="Żabka", transaction_type="expense", payment_date=date(2025, 4, 2))
+        response = self.client.post("/api/recent-shops/", {"new_shops": ["Orlen", " "]}, format="json")
+        self.assertEqual(response.status_code, 202)
+        call_command("runworker", once=True, processes=0, stdout=StringIO())
+        job = self.client.get(f"/api/jobs/{response.json()['job_id']}/").json()
+        self.assertEqual(job["result"]["updated_shops"], ["lidl", "orlen", "żabka"])
+        self.assertEqual(
+            sorted(RecentShop.objects.filter(user=self.user).values_list("name", flat=True)),
+            ["lidl", "lidl express", "orlen", "żabka"],
+        )
+
+    def test_rebuild_benchmark_command(self):
+        out = StringIO()
+        call_command("bench_suggestion_rebuild", sizes=[50], repeat=1, stdout=out)
+        self.assertIn("predictions", out.getvalue())
+        self.assertFalse(User.objects.filter(username="bench_suggest_50").exists())
+
+    def test_index_updated_incrementally_after_commit(self):
+        self.client.get("/api/item-predictions/", {"q": "kef"})
+        serializer = ReceiptSerializer(
+            data={
+                "shop": "Biedronka",
+                "transaction_type": "expense",
+                "payment_date": "2025-10-01",
+                "items": [{"category": "food_drinks", "value": "4.00", "description": "Kefir", "quantity": 1}],
+            },
+            context={"request": type("Request", (), {"user": self.user})()},
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        entry = autosuggest_index.get(self.user.pk)
+        self.assertEqual(entry.predictions.search("kef", 10), [("kefir", 1)])
+        self.assertEqual([name for _, name in entry.shops.search("bie", 10)], ["biedronka"])
+
+    def test_write_does_not_reload_index(self):
+        autosuggest_index.get(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/receipts/",
+                {
+                    "shop": "Biedronka",
+                    "transaction_type": "expense",
+                    "payment_date": "2025-10-01",
+                    "items": [{"category": "food_drinks", "value": "4.00", "description": "Kefir", "quantity": 1}],
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        # AUTOSUGGEST_REFRESH_SECONDS=0 w testach: każde get sprawdza wersję w bazie
+        with patch.object(UserSuggestions, "load", wraps=UserSuggestions.load) as load:
+            entry = autosuggest_index.get(self.user.pk)
+        load.assert_not_called()
+        self.assertEqual(entry.version, get_data_version(self.user))
+        self.assertEqual(entry.predictions.search("kef", 10), [("kefir", 1)])
+
+    def test_write_after_foreign_bump_drops_entry(self):
+        autosuggest_index.get(self.user.pk)
+        # inny worker zapisał dane, a ten proces jeszcze ich nie widział
+        _, version = bump_data_version(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/receipts/",
+                {
+                    "shop": "Biedronka",
+                    "transaction_type": "expense",
+                    "payment_date": "2025-10-01",
+                    "items": [{"category": "food_drinks", "value": "4.00", "description": "Kefir", "quantity": 1}],
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(self.user.pk, autosuggest_index)
+        self.assertNotEqual(get_data_version(self.user), version)
+
+    @override_settings(AUTOSUGGEST_REFRESH_SECONDS=60)
+    def test_version_check_is_debounced(self):
+        autosuggest_index.get(self.user.pk)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                autosuggest_index.search_predictions(self.user.pk, "mle", 10)
+
+    @override_settings(AUTOSUGGEST_MEMORY_CAP_MB=0)
+    def test_memory_cap_evicts_least_recently_used(self):
+        other = User.objects.create_user(username="searchother", password="pass")
+        autosuggest_index.get(self.user.pk)
+        autosuggest_index.get(other.pk)
+        self.assertNotIn(self.user.pk, autosuggest_index)
+        self.assertIn(other.pk, autosuggest_index)
+
+
+# URLconf z widokami async (jak przy ASYNC_VIEWS=1) dla AsyncReadViewsTest
+urlpatterns = [path("api/", include(api_urlpatterns(async_read_views=True)))]
+
+ASYNC_READ_PATHS = [
+    "/api/fetch/line-sums/",
+    "/api/fetch/pie-categories/",
+    "/api/fetch/bar-shops/",
+    "/api/fetch/dashboard/",
+    "/api/fetch/trends/",
+    "/api/fetch/outliers/",
+    "/api/recent-shops/",
+    "/api/item-predictions/",
+]
+
+
+@override_settings(ROOT_URLCONF="backend_api.tests")
+class AsyncReadViewsTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="asyncuser", password="pass")
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        rng = random.Random(5)
+        receipts = [
+            {
+                "shop": rng.choice(["Lidl", "Orlen", "Żabka"]),
+                "transaction_type": "expense" if n % 5 else "income",
+                "payment_date": f"2024-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}",
+                "items": [
+                    {
+                        "category": rng.choice(["fuel", "food_drinks", "chemistry"]) if n % 5 else "work_income",
+                        "value": f"{rng.uniform(1, 300):.2f}",
+                        "description": rng.choice(["mleko", "chleb", "pb95"]),
+                    }
+                    for _ in range(rng.randint(1, 3))
+                ],
+            }
+            for n in range(40)
+        ]
+        response = self.client.post(
+            "/api/receipts/", receipts, content_type="application/json", headers=self.auth
+        )
+        self.assertEqual(response.status_code, 201)
+        ItemPrediction.objects.bulk_create(
+            [ItemPrediction(user=self.user, item_description=f"mleko {i}", frequency=i) for i in range(15)]
+        )
+        RecentShop.objects.get_or_create(user=self.user, name="lidl express")
+        autosuggest_index.clear()
+        cache.clear()
+
+    def async_get(self, path, params=None, **headers):
+        return async_to_sync(self.async_client.get)(path, params, headers={**self.auth, **headers})
+
+    def test_read_routes_are_async(self):
+        for path in ASYNC_READ_PATHS:
+            self.assertTrue(iscoroutinefunction(resolve(path).func), path)
+        self.assertFalse(iscoroutinefunction(resolve("/api/receipts/").func))
+
+    def test_responses_match_sync_views(self):
+        cases = [
+            ("/api/fetch/line-sums/", {"year": 2024, "month": 2}),
+            ("/api/fetch/line-sums/", {"year": 2024}),
+            ("/api/fetch/pie-categories/", {"year": 2024, "month": 1}),
+            ("/api/fetch/bar-shops/", {"year": 2024, "month": 3, "category[]": ["fuel", "chemistry"]}),
+            ("/api/fetch/dashboard/", {"year": 2024, "month": 2}),
+            ("/api/fetch/trends/", {"start": "2024-01-01", "end": "2024-03-31", "granularity": "week"}),
+            ("/api/fetch/trends/", {"start": "2024-03-01", "end": "2024-01-01"}),
+            ("/api/fetch/outliers/", {"k": 5}),
+            ("/api/fetch/outliers/", {"mode": "iqr", "threshold": 0.5}),
+            ("/api/recent-shops/", {}),
+            ("/api/recent-shops/", {"q": "lid"}),
+            ("/api/item-predictions/", {"q": "mle", "limit": 4}),
+            ("/api/item-predictions/", {"q": "ml"}),
+            ("/api/item-predictions/", {}),
+            ("/api/recent-shops/", {"limit": 1}),
+            ("/api/item-predictions/", {"limit": 1}),
+        ]
+        for path, params in cases:
+            cache.clear()
+            with override_settings(ROOT_URLCONF="wydatki_ztp.urls"):
+                expected = self.client.get(path, params, headers=self.auth)
+            cache.clear()
+            response = self.async_get(path, params)
+            self.assertEqual(response.status_code, expected.status_code, (path, params))
+            self.assertEqual(response.json(), expected.json(), (path, params))
+
+    def test_query_budget_and_etag(self):
+        user_cache.clear()
+        response = self.async_get("/api/fetch/line-sums/", {"year": 2024, "month": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+        # użytkownik, wersja danych i odczyt rollupów – liczone także w wątkach async ORM
+        self.assertEqual(response.request_metrics.queries, 3)
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+
+        # użytkownik z user_cache, wykres z cache – zostaje tylko wersja danych
+        cached = self.async_get("/api/fetch/line-sums/", {"year": 2024, "month": 1})
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached.request_metrics.queries, 1)
+        not_modified = self.async_get(
+            "/api/fetch/line-sums/", {"year": 2024, "month": 1}, **{"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_authentication_required(self):
+        response = async_to_sync(self.async_client.get)("/api/fetch/dashboard/", {"year": 2024, "month": 1})
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+        response = async_to_sync(self.async_client.get)(
+            "/api/item-predictions/", {"q": "mle"}, headers={"Authorization": "Bearer invalid"}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    def test_other_methods_use_drf_views(self):
+        response = self.client.post(
+            "/api/recent-shops/", {"new_shops": ["Orlen"]}, content_type="application/json", headers=self.auth
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(Job.objects.filter(pk=response.json()["job_id"]).exists())
+        response = self.client.delete("/api/item-predictions/", headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ItemPrediction.objects.filter(user=self.user).exists())
+        response = self.client.post("/api/fetch/line-sums/", headers=self.auth)
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads_skip_user_query(self):
+        user_cache.clear()
+        response = self.async_get("/api/item-predictions/", {"q": "mle"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('"auth_user"' in sql for sql in response.request_metrics.templates))
+
+    def test_metrics_middleware_keeps_async_chain(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(RequestMetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(RequestMetricsMiddleware(lambda request: HttpResponse())))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=60)
+class ReadReplicaRoutingTest(APITestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="replicauser", password="pass")
+        User.objects.db_manager("replica").bulk_create([User(id=self.user.id, username=self.user.username)])
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        # ten sam opis z inną częstotliwością: po odpowiedzi widać, która baza ją dała
+        ItemPrediction.objects.create(user=self.user, item_description="mleko", frequency=1)
+        ItemPrediction.objects.using("replica").create(user_id=self.user.id, item_description="mleko", frequency=7)
+        cache.clear()
+        autosuggest_index.clear()
+
+    def frequency(self, client_get=None):
+        # indeks w pamięci ładuje się z bazy wybranej dla żądania; bez czyszczenia
+        # kolejne żądania czytałyby wpis załadowany wcześniej z innej bazy
+        autosuggest_index.clear()
+        response = (client_get or self.client.get)("/api/item-predictions/", headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"][0]["frequency"]
+
+    def test_search_and_fetch_read_from_replica(self):
+        self.assertEqual(self.frequency(), 7)
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get(
+                "/api/fetch/line-sums/", {"month": 1, "year": 2025}, headers=self.auth
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(len(replica_queries), 1)
+
+    def test_write_pins_user_to_primary(self):
+        response = self.client.post(
+            "/api/item-predictions/", {}, content_type="application/json", headers=self.auth
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.frequency(), 1)
+
+        other = User.objects.create_user(username="replicaother", password="pass")
+        User.objects.db_manager("replica").bulk_create([User(id=other.id, username=other.username)])
+        ItemPrediction.objects.using("replica").create(user_id=other.id, item_description="chleb", frequency=3)
+        response = self.client.get(
+            "/api/item-predictions/", headers={"Authorization": f"Bearer {AccessToken.for_user(other)}"}
+        )
+        self.assertEqual(response.json()["results"], [{"name": "Chleb", "frequency": 3}])
+
+        # po REPLICA_STICKY_SECONDS znacznik wygasa
+        cache.clear()
+        self.assertEqual(self.frequency(), 7)
+
+    def test_chart_version_read_from_replica(self):
+        primary_version = bump_data_version(self.user)[1]
+        replica_version = uuid.uuid4()
+        UserDataVersion.objects.using("replica").create(user_id=self.user.id, version=replica_version)
+        with CaptureQueriesContext(connections["default"]) as primary_queries:
+            response = self.client.get("/api/fetch/line-sums/", {"month": 1, "year": 2025}, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        # replika jeszcze bez zapisu: dane i klucz cache w jej wersji, nie w nowszej z bazy głównej
+        self.assertIn(replica_version.hex, response["ETag"])
+        self.assertNotIn(primary_version, response["ETag"])
+        self.assertFalse(any("backend_api_userdataversion" in query["sql"] for query in primary_queries))
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post("/api/receipts/", [{"shop": "Lidl"}], format="json", headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.frequency(), 7)
+
+    def test_other_endpoints_use_primary(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            self.assertEqual(self.client.get("/api/receipts/", headers=self.auth).status_code, 200)
+            self.assertEqual(self.client.get("/api/jobs/", headers=self.auth).status_code, 200)
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_export_stream_reads_replica(self):
+        Receipt.objects.create(
+            user=self.user, shop="Primary", transaction_type="expense", payment_date=date(2025, 1, 2)
+        )
+        Receipt.objects.using("replica").create(
+            user_id=self.user.id, shop="Replica", transaction_type="expense", payment_date=date(2025, 1, 3)
+        )
+        response = self.client.get("/api/receipts/export/", headers=self.auth)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Replica", content)
+        self.assertNotIn("Primary", content)
+
+    @override_settings(ROOT_URLCONF="backend_api.tests")
+    def test_async_views_read_from_replica(self):
+        self.assertEqual(self.frequency(async_to_sync(self.async_client.get)), 7)
+        response = async_to_sync(self.async_client.post)(
+            "/api/item-predictions/", {}, content_type="application/json", headers=self.auth
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.frequency(async_to_sync(self.async_client.get)), 1)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.assertEqual(self.frequency(), 1)
+
+    def test_check_requires_shared_cache(self):
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache"}}
+        local = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=local):
+            self.assertEqual([error.id for error in run_checks(tags=["caches"])], ["backend_api.E001"])
+            with override_settings(DATABASE_REPLICAS=[]):
+                self.assertEqual(run_checks(tags=["caches"]), [])
+        with override_settings(CACHES=shared):
+            self.assertEqual(run_checks(tags=["caches"]), [])
@@ -0,0 +1,140 @@
+# backend_api/trends.py
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from backend_api.models import MonthlyRollup
+
+GRANULARITIES = {"day": "D", "week": "W-SUN", "month": "M"}
+TRANSACTION_TYPES = ["expense", "income"]
+# pd.Timestamp obejmuje lata 1677–2262; pełne lata z zapasem na domknięcie okresów
+MIN_DATE = date(1678, 1, 1)
+MAX_DATE = date(2261, 12, 31)
+
+
+def _month_range_filter(start, end):
+    # Zakres (rok, miesiąc) po indeksie rollup_user_month_idx; dni docinamy w pandas
+    return (
+        (Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month))
+        & (Q(year__lt=end.year) | Q(year=end.year, month__lte=end.month))
+    )
+
+
+def period_count(start, end, granularity):
+    return len(pd.period_range(start, end, freq=GRANULARITIES[granularity]))
+
+
+def _rollup_rows(user, start, end, categories=None, shops=None):
+    rows = MonthlyRollup.objects.filter(_month_range_filter(start, end), user=user)
+    if categories:
+        rows = rows.filter(category__in=categories)
+    if shops:
+        rows = rows.filter(shop__in=shops)
+    return rows.values_list("year", "month", "day", "transaction_type", "category", "value_sum")
+
+
+def _load_frame(rows, start, end):
+    """Wiersze ``values_list`` z tabeli rollup jako DataFrame z kolumną ``date``."""
+    frame = pd.DataFrame.from_records(
+        rows, columns=["year", "month", "day", "transaction_type", "category", "value"]
+    )
+    frame["date"] = pd.to_datetime(frame[["year", "month", "day"]])
+    frame["value"] = frame["value"].astype(float)
+    return frame[(frame["date"] >= pd.Timestamp(start)) & (frame["date"] <= pd.Timestamp(end))]
+
+
+def _records(frame, decimals):
+    # NaN/inf (np. zmiana procentowa od zera) wysyłamy jako null
+    frame = frame.replace([np.inf, -np.inf], np.nan).round(decimals)
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def compute_trends(user, start, end, granularity="month", categories=None, shops=None, window=3):
+    """
+    Trendy wydatków i przychodów w zakresie dat ``start``–``end``.
+
+    Dane to jeden odczyt tabeli rollup; sumy per okres (dzień, tydzień od poniedziałku,
+    miesiąc), średnie kroczące z ``window`` okresów, zmiany względem poprzedniego
+    okresu i udziały kategorii liczone są wektorowo w pandas. Okresy bez transakcji
+    mają zera.
+    """
+    rows = _rollup_rows(user, start, end, categories, shops)
+    return _trends(rows, start, end, granularity, window)
+
+
+async def acompute_trends(user, start, end, granularity="month", categories=None, shops=None, window=3):
+    """
+    ``compute_trends`` przez async ORM. Obliczenia pandas idą do puli wątków,
+    żeby nie blokować pętli zdarzeń na czas agregacji.
+    """
+    rows = [row async for row in _rollup_rows(user, start, end, categories, shops)]
+    return await sync_to_async(_trends, thread_sensitive=False)(rows, start, end, granularity, window)
+
+
+def _trends(rows, start, end, granularity, window):
+    freq = GRANULARITIES[granularity]
+    periods = pd.period_range(start, end, freq=freq)
+    frame = _load_frame(rows, start, end)
+    frame = frame.assign(period=frame["date"].dt.to_period(freq))
+
+    totals = (
+        frame.groupby(["period", "transaction_type"])["value"].sum()
+        .unstack(fill_value=0.0)
+        .reindex(index=periods, columns=TRANSACTION_TYPES, fill_value=0.0)
+    )
+    series = pd.DataFrame(index=periods)
+    for transaction_type in TRANSACTION_TYPES:
+        values = totals[transaction_type]
+        series[transaction_type] = values
+        series[f"{transaction_type}_rolling"] = values.rolling(window, min_periods=1).mean()
+        series[f"{transaction_type}_change"] = values.diff()
+        series[f"{transaction_type}_change_pct"] = values.pct_change(fill_method=None) * 100
+    series["balance"] = series["income"] - series["expense"]
+
+    expenses = frame[frame["transaction_type"] == "expense"]
+    by_category = (
+        expenses.groupby(["period", "category"])["value"].sum()
+        .unstack(fill_value=0.0)
+        .reindex(index=periods, fill_value=0.0)
+    )
+    shares = by_category.div(by_category.sum(axis=1).replace(0.0, np.nan), axis=0)
+
+    category_totals = by_category.sum().sort_values(ascending=False)
+    expense_total = category_totals.sum()
+    category_summary = pd.DataFrame(
+        {
+            "category": category_totals.index,
+            "expense_sum": category_totals.values,
+            "share": category_totals.values / expense_total if expense_total else 0.0,
+        }
+    )
+
+    # bez wydatków ``shares`` nie ma kolumn, a to_dict("records") zwraca wtedy pustą listę
+    share_rows = _records(shares, 4) if len(shares.columns) else [{}] * len(periods)
+    result = [
+        {
+            "period": label.start_time.date().isoformat(),
+            **row,
+            "category_shares": {category: share for category, share in period_shares.items() if share},
+        }
+        for label, row, period_shares in zip(periods, _records(series, 2), share_rows)
+    ]
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "granularity": granularity,
+        "window": window,
+        "periods": result,
+        "categories": _records(category_summary, 4),
+        "summary": {
+            "expense_total": round(float(expense_total), 2),
+            "income_total": round(float(series["income"].sum()), 2),
+            "expense_mean": round(float(series["expense"].mean()), 2),
+            "expense_median": round(float(series["expense"].median()), 2),
+            "expense_std": round(float(series["expense"].std(ddof=0)), 2),
+        },
+    }
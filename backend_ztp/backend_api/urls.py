@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.routers import DefaultRouter
@@ -8,37 +9,62 @@ from backend_api.views import (
     ReceiptUpdateDestroyView,
     RecentShopSearchView,
     ItemPredictionSearchView,
-    fetch_line_sums,
-    fetch_bar_shops,
-    fetch_pie_categories,
-    DuplicateReceiptDebugView
+    DuplicateReceiptDebugView,
+    DatabasePoolStatsView,
+    ReceiptExportView,
+    ReceiptImportView,
+    JobListView,
+    JobDetailView,
 )
+from backend_api import views
+from backend_api.views import async_views
 
 router = DefaultRouter()
 
 router.register(r"items", ItemViewSet)
 # router.register(r"receipts", ReceiptViewSet)
 
-urlpatterns = [
-    path("", include(router.urls)),
-    path("receipts/", ReceiptListCreateView.as_view(), name="receipt-create"),
-    path(
-        "receipts/<int:pk>/", ReceiptUpdateDestroyView.as_view(), name="receipt-update"
-    ),
-    path("recent-shops/", RecentShopSearchView.as_view(), name="recent-shop-search"),
-    path(
-        "item-predictions/",
-        ItemPredictionSearchView.as_view(),
-        name="item-predictions",
-    ),
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
-    path(
-        "schema/swagger-ui/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
-        name="swagger-ui",
-    ),
-    path("fetch/line-sums/", fetch_line_sums, name="fetch-line-sums"),
-    path("fetch/bar-shops/", fetch_bar_shops, name="fetch-bar-shops"),
-    path("fetch/pie-categories/", fetch_pie_categories, name="fetch-pie-categories"),
-    path('debug/receipts/duplicates/', DuplicateReceiptDebugView.as_view(), name='receipt-duplicates-debug'),
-]
+
+def api_urlpatterns(async_read_views=False):
+    """
+    Trasy API. Przy ``async_read_views`` fetch/* i GET wyszukiwarek obsługują
+    widoki async (``views/async_views.py``); zapisy zawsze idą do widoków DRF.
+    """
+    read_views = async_views if async_read_views else views
+    if async_read_views:
+        recent_shop_search = async_views.recent_shop_search
+        item_prediction_search = async_views.item_prediction_search
+    else:
+        recent_shop_search = RecentShopSearchView.as_view()
+        item_prediction_search = ItemPredictionSearchView.as_view()
+
+    return [
+        path("", include(router.urls)),
+        path("receipts/", ReceiptListCreateView.as_view(), name="receipt-create"),
+        path(
+            "receipts/<int:pk>/", ReceiptUpdateDestroyView.as_view(), name="receipt-update"
+        ),
+        path("receipts/export/", ReceiptExportView.as_view(), name="receipt-export"),
+        path("receipts/import/", ReceiptImportView.as_view(), name="receipt-import"),
+        path("jobs/", JobListView.as_view(), name="job-list"),
+        path("jobs/<int:pk>/", JobDetailView.as_view(), name="job-detail"),
+        path("recent-shops/", recent_shop_search, name="recent-shop-search"),
+        path("item-predictions/", item_prediction_search, name="item-predictions"),
+        path("schema/", SpectacularAPIView.as_view(), name="schema"),
+        path(
+            "schema/swagger-ui/",
+            SpectacularSwaggerView.as_view(url_name="schema"),
+            name="swagger-ui",
+        ),
+        path("fetch/line-sums/", read_views.fetch_line_sums, name="fetch-line-sums"),
+        path("fetch/bar-shops/", read_views.fetch_bar_shops, name="fetch-bar-shops"),
+        path("fetch/pie-categories/", read_views.fetch_pie_categories, name="fetch-pie-categories"),
+        path("fetch/trends/", read_views.fetch_trends, name="fetch-trends"),
+        path("fetch/outliers/", read_views.fetch_outliers, name="fetch-outliers"),
+        path("fetch/dashboard/", read_views.fetch_dashboard, name="fetch-dashboard"),
+        path('debug/receipts/duplicates/', DuplicateReceiptDebugView.as_view(), name='receipt-duplicates-debug'),
+        path("debug/db-pool/", DatabasePoolStatsView.as_view(), name="db-pool-debug"),
+    ]
+
+
+urlpatterns = api_urlpatterns(async_read_views=settings.ASYNC_VIEWS)
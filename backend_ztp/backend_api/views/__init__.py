@@ -6,4 +6,9 @@ from .line_sums_views import fetch_line_sums
 # from .bar_views import fetch_bar_persons, fetch_bar_shops
 from .bar_views import fetch_bar_shops
 from .pie_views import fetch_pie_categories
-from .debug_views import DuplicateReceiptDebugView
+from .trends_views import fetch_trends
+from .outlier_views import fetch_outliers
+from .dashboard_views import fetch_dashboard
+from .debug_views import DatabasePoolStatsView, DuplicateReceiptDebugView
+from .transfer_views import ReceiptExportView, ReceiptImportView
+from .job_views import JobListView, JobDetailView
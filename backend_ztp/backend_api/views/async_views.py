@@ -0,0 +1,269 @@
+# myapp/views/async_views.py
+"""
+Widoki async odczytu: ``fetch/*`` i GET wyszukiwarek (włączane przez ASYNC_VIEWS,
+domyślnie przy serwowaniu przez ASGI, patrz ``wydatki_ztp/asgi.py``).
+
+Odpowiedzi są identyczne jak w widokach DRF, ale zapytania idą przez async ORM,
+więc czekanie na bazę nie blokuje workera. Metody inne niż GET/HEAD (zapisy,
+OPTIONS) obsługuje odpowiedni widok DRF w wątku.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+
+from backend_api.aggregations import (
+    acategory_expense_sums,
+    adaily_transaction_sums,
+    adashboard_sums,
+    ashop_expense_sums,
+    cumulative_series,
+)
+from backend_api.caching import cached_chart_response
+from backend_api.instrumentation import query_budget
+from backend_api.outliers import astatistical_outliers, atop_receipts
+from backend_api.routers import read_replica
+from backend_api.search import (
+    alist_predictions,
+    alist_shops,
+    asearch_predictions,
+    asearch_shops,
+    get_search_limit,
+)
+from backend_api.serializers import ShopExpenseSerializer
+from backend_api.trends import acompute_trends
+from backend_api.views import (
+    bar_views,
+    dashboard_views,
+    line_sums_views,
+    outlier_views,
+    pie_views,
+    search_views,
+    trends_views,
+)
+from backend_api.views.bar_views import DEFAULT_SHOP_CATEGORIES
+from backend_api.views.utils import get_all_dates_in_month, get_query_params, handle_error
+
+
+def _unauthorized(exc, authenticator, request):
+    # format odpowiedzi jak w rest_framework.views.exception_handler
+    data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+    response = JsonResponse(data, status=401)
+    if authenticator is not None:
+        response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+    return response
+
+
+async def _authenticate(request, authentication_classes):
+    """
+    Uwierzytelnia żądanie klasami widoku DRF (jak DRF z IsAuthenticated) i ustawia
+    ``request.user``. Zwraca odpowiedź 401 albo ``None``. Użytkownik z cache
+    (``authenticate_cached``) nie wymaga przejścia do wątku.
+    """
+    authenticators = [authentication() for authentication in authentication_classes]
+    first = authenticators[0] if authenticators else None
+    for authenticator in authenticators:
+        try:
+            result = None
+            if hasattr(authenticator, "authenticate_cached"):
+                result = authenticator.authenticate_cached(request)
+            if result is None:
+                result = await sync_to_async(authenticator.authenticate)(request)
+        except AuthenticationFailed as e:
+            return _unauthorized(e, first, request)
+        if result is not None:
+            request.user, request.auth = result
+            return None
+    return _unauthorized(NotAuthenticated(), first, request)
+
+
+def async_get(sync_view):
+    """
+    Zamienia funkcję ``async def`` w widok GET/HEAD z uwierzytelnieniem DRF.
+
+    Pozostałe metody trafiają do ``sync_view`` (widok DRF) w wątku, więc
+    zapisy, 405 i OPTIONS działają bez zmian. Uwierzytelnianie używa
+    ``authentication_classes`` widoku DRF.
+    """
+    view_class = getattr(sync_view, "view_class", None) or getattr(sync_view, "cls", None)
+    authentication_classes = view_class.authentication_classes
+
+    def decorator(handler):
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+            unauthorized = await _authenticate(request, authentication_classes)
+            if unauthorized is not None:
+                return unauthorized
+            return await handler(request, *args, **kwargs)
+
+        return view
+
+    return decorator
+
+
+@query_budget(3)
+@read_replica
+@async_get(line_sums_views.fetch_line_sums)
+@cached_chart_response("line-sums")
+async def fetch_line_sums(request):
+    try:
+        params = get_query_params(request, "month", "year")
+        selected_month = params["month"]
+        selected_year = params["year"]
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        daily_sums = await adaily_transaction_sums(request.user, selected_year, selected_month)
+        results = cumulative_series(get_all_dates_in_month(selected_year, selected_month), daily_sums)
+        return JsonResponse(results, safe=False, status=200)
+    except Exception as e:
+        return handle_error(e, 500, f"Błąd podczas przetwarzania danych: {str(e)}")
+
+
+@query_budget(3)
+@read_replica
+@async_get(pie_views.fetch_pie_categories)
+@cached_chart_response("pie-categories")
+async def fetch_pie_categories(request):
+    try:
+        params = get_query_params(request, "month", "year")
+        selected_month = params["month"]
+        selected_year = params["year"]
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        aggregated_data = await acategory_expense_sums(request.user, selected_year, selected_month)
+        return JsonResponse(aggregated_data, safe=False, status=200)
+    except Exception as e:
+        return handle_error(e, 500, "Error while fetching pie categories")
+
+
+@query_budget(3)
+@read_replica
+@async_get(bar_views.fetch_bar_shops)
+@cached_chart_response("bar-shops")
+async def fetch_bar_shops(request):
+    try:
+        params = get_query_params(request, "month", "year")
+        selected_month = params["month"]
+        selected_year = params["year"]
+        category = request.GET.getlist("category[]") or DEFAULT_SHOP_CATEGORIES
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        shop_sums = await ashop_expense_sums(request.user, selected_year, selected_month, category)
+        serializer = ShopExpenseSerializer(data=shop_sums, many=True)
+        if serializer.is_valid():
+            return JsonResponse(serializer.data, safe=False, status=200)
+        return JsonResponse(serializer.errors, status=400)
+    except Exception as e:
+        return handle_error(e, 500, "Błąd podczas pobierania danych wydatków")
+
+
+@query_budget(2)
+@read_replica
+@async_get(dashboard_views.fetch_dashboard)
+@cached_chart_response("dashboard")
+async def fetch_dashboard(request):
+    try:
+        params = get_query_params(request, "month", "year")
+        selected_month = params["month"]
+        selected_year = params["year"]
+        categories = request.GET.getlist("category[]") or DEFAULT_SHOP_CATEGORIES
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        daily_sums, pie_categories, bar_shops = await adashboard_sums(
+            request.user, selected_year, selected_month, categories
+        )
+        line_sums = cumulative_series(
+            get_all_dates_in_month(selected_year, selected_month), daily_sums
+        )
+        return JsonResponse(
+            {
+                "line_sums": line_sums,
+                "bar_shops": bar_shops,
+                "pie_categories": pie_categories,
+            },
+            status=200,
+        )
+    except Exception as e:
+        return handle_error(e, 500, "Błąd podczas pobierania danych wykresów")
+
+
+@query_budget(3)
+@read_replica
+@async_get(trends_views.fetch_trends)
+@cached_chart_response("trends")
+async def fetch_trends(request):
+    try:
+        params = trends_views._trend_params(request)
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        return JsonResponse(await acompute_trends(request.user, **params), status=200)
+    except Exception as e:
+        return handle_error(e, 500, f"Błąd podczas przetwarzania danych: {str(e)}")
+
+
+@query_budget(3)
+@read_replica
+@async_get(outlier_views.fetch_outliers)
+@cached_chart_response("outliers")
+async def fetch_outliers(request):
+    try:
+        mode, k, threshold, date_range = outlier_views._outlier_params(request)
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        if mode == "top":
+            receipts = await atop_receipts(request.user, k, date_range)
+        else:
+            receipts = await astatistical_outliers(request.user, mode, threshold, date_range, limit=k)
+        return JsonResponse({"mode": mode, "receipts": receipts}, status=200)
+    except Exception as e:
+        return handle_error(e, 500, f"Błąd podczas wyszukiwania paragonów odstających: {str(e)}")
+
+
+@query_budget(search_views.RecentShopSearchView.query_budget)
+@read_replica
+@async_get(search_views.RecentShopSearchView.as_view())
+async def recent_shop_search(request):
+    query = request.GET.get("q", "").strip()
+    if not query:
+        shops = await alist_shops(request.user, get_search_limit(request))
+    elif len(query) < 3:
+        return JsonResponse({"results": []})
+    else:
+        shops = await asearch_shops(request.user, query, get_search_limit(request))
+    results = [{"id": shop_id, "name": name.capitalize()} for shop_id, name in shops]
+    return JsonResponse({"results": results})
+
+
+@query_budget(search_views.ItemPredictionSearchView.query_budget)
+@read_replica
+@async_get(search_views.ItemPredictionSearchView.as_view())
+async def item_prediction_search(request):
+    query = request.GET.get("q", "").strip().lower()
+    if query:
+        if len(query) < 3:
+            return JsonResponse({"results": []})
+        predictions = await asearch_predictions(request.user, query, get_search_limit(request))
+    else:
+        predictions = await alist_predictions(request.user, get_search_limit(request))
+    results = [
+        {"name": item_description.capitalize(), "frequency": frequency}
+        for item_description, frequency in predictions
+    ]
+    return JsonResponse({"results": results})
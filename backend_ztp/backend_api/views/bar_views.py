@@ -2,18 +2,29 @@
 from collections import defaultdict
 from decimal import Decimal
 from django.http import JsonResponse
-from django.db.models import Sum, FloatField
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from backend_api.views.utils import (
     get_query_params,
     handle_error,
     get_top_outlier_receipts,
 )
-from backend_api.models import Receipt
+from backend_api.aggregations import shop_expense_sums
 from backend_api.serializers import PersonExpenseSerializer, ShopExpenseSerializer
 from rest_framework.permissions import IsAuthenticated
+from backend_api.authentication import StatelessReadJWTAuthentication
+from backend_api.caching import cached_chart_response
+from backend_api.instrumentation import query_budget
+from backend_api.routers import read_replica
 
+# Kategorie wykresu sklepów, gdy nie podano category[] – kilka najczęstszych
+DEFAULT_SHOP_CATEGORIES = [
+    "fuel", "car_expenses", "fastfood", "alcohol", "food_drinks", "chemistry",
+    "clothes", "electronics_games", "tickets_entrance", "delivery", "other_shopping"
+]
+
+@query_budget(3)
+@read_replica
 @extend_schema(
     methods=["GET"],
     parameters=[
@@ -45,7 +56,9 @@ from rest_framework.permissions import IsAuthenticated
     },
 )
 @api_view(["GET"])
+@authentication_classes([StatelessReadJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_chart_response("bar-shops")
 def fetch_bar_shops(request):
     try:
         # Pobierz miesiąc i rok z parametrów GET
@@ -58,33 +71,16 @@ def fetch_bar_shops(request):
 
         # Kategorie – domyślnie kilka najczęstszych
         category_param = request.GET.getlist("category[]")
-        category = category_param or [
-            "fuel", "car_expenses", "fastfood", "alcohol", "food_drinks", "chemistry",
-            "clothes", "electronics_games", "tickets_entrance", "delivery", "other_shopping"
-        ]
+        category = category_param or DEFAULT_SHOP_CATEGORIES
     except ValueError as e:
         return handle_error(e, 400, "Niepoprawne parametry zapytania")
 
     try:
-        # Filtrowanie paragonów użytkownika
-        queryset = (
-            Receipt.objects.filter(
-                transaction_type="expense",
-                payment_date__year=selected_year,
-                payment_date__month=selected_month,
-                items__category__in=category,
-                items__user=current_user,
-            )
-            .values("shop")
-            .annotate(expense_sum=Sum("items__value", output_field=FloatField()))
+        # Sumy wydatków per sklep z tabeli rollup
+        serialized_data = shop_expense_sums(
+            current_user, selected_year, selected_month, category
         )
 
-        sorted_expense_sums = queryset.order_by("-expense_sum")
-        serialized_data = [
-            {"shop": entry["shop"], "expense_sum": round(entry["expense_sum"], 2)}
-            for entry in sorted_expense_sums
-        ]
-
         serializer = ShopExpenseSerializer(data=serialized_data, many=True)
         if serializer.is_valid():
             return JsonResponse(serializer.data, safe=False, status=200)
@@ -0,0 +1,75 @@
+# myapp/views/dashboard_views.py
+from django.http import JsonResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from backend_api.authentication import StatelessReadJWTAuthentication
+
+from backend_api.aggregations import cumulative_series, dashboard_sums
+from backend_api.caching import cached_chart_response
+from backend_api.instrumentation import query_budget
+from backend_api.routers import read_replica
+from backend_api.views.bar_views import DEFAULT_SHOP_CATEGORIES
+from backend_api.views.utils import get_all_dates_in_month, get_query_params, handle_error
+
+
+@query_budget(2)
+@read_replica
+@extend_schema(
+    methods=["GET"],
+    parameters=[
+        OpenApiParameter(name="month", description="Wybrany miesiąc", required=True, type=int),
+        OpenApiParameter(name="year", description="Wybrany rok", required=True, type=int),
+        OpenApiParameter(
+            name="category[]",
+            description="Kategorie wykresu sklepów (domyślnie najczęstsze wydatki)",
+            required=False,
+            type=str,
+            many=True,
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description=(
+                "Obiekt z kluczami line_sums, bar_shops i pie_categories w formacie "
+                "odpowiednio fetch/line-sums/, fetch/bar-shops/ i fetch/pie-categories/"
+            )
+        ),
+        400: OpenApiResponse(description="Bad request"),
+        500: OpenApiResponse(description="Internal server error"),
+    },
+)
+@api_view(["GET"])
+@authentication_classes([StatelessReadJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@cached_chart_response("dashboard")
+def fetch_dashboard(request):
+    """
+    Wszystkie wykresy strony podsumowania w jednym żądaniu: jedno uwierzytelnienie,
+    jedno sprawdzenie wersji danych i jeden odczyt tabeli rollup zamiast trzech.
+    """
+    try:
+        params = get_query_params(request, "month", "year")
+        selected_month = params["month"]
+        selected_year = params["year"]
+        categories = request.GET.getlist("category[]") or DEFAULT_SHOP_CATEGORIES
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        daily_sums, pie_categories, bar_shops = dashboard_sums(
+            request.user, selected_year, selected_month, categories
+        )
+        line_sums = cumulative_series(
+            get_all_dates_in_month(selected_year, selected_month), daily_sums
+        )
+        return JsonResponse(
+            {
+                "line_sums": line_sums,
+                "bar_shops": bar_shops,
+                "pie_categories": pie_categories,
+            },
+            status=200,
+        )
+    except Exception as e:
+        return handle_error(e, 500, "Błąd podczas pobierania danych wykresów")
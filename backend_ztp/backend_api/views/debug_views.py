@@ -1,30 +1,58 @@
+import os
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Count
 from backend_api.models import Receipt
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from backend_api.instrumentation import database_pool_stats
 
 
 class DuplicateReceiptDebugView(APIView):
     """
-    Widok debugujący sprawdzający zduplikowane paragony
-    na podstawie tych samych pól (bez ID).
+    Widok debugujący sprawdzający zduplikowane paragony użytkownika
+    na podstawie odcisku treści (nagłówek + pozycje, bez ID).
     """
     permission_classes = [IsAuthenticated]
+    query_budget = 2
+
     def get(self, request, *args, **kwargs):
-        # Znajdowanie zduplikowanych paragonów na podstawie pól innych niż ID
-        duplicates = (
-            Receipt.objects.values("payment_date", "user", "shop", "transaction_type")
-            .annotate(count=Count("*"))
+        # Grupowanie po (user, fingerprint) korzysta z indeksu receipt_user_fingerprint_idx
+        receipts = Receipt.objects.filter(user=request.user).exclude(fingerprint="")
+        fingerprints = list(
+            receipts.values("fingerprint")
+            .annotate(count=Count("id"))
             .filter(count__gt=1)
+            .order_by()
+            .values_list("fingerprint", flat=True)
         )
 
-        if duplicates.exists():
+        if fingerprints:
+            groups = {}
+            rows = (
+                receipts.filter(fingerprint__in=fingerprints)
+                .order_by("payment_date", "id")
+                .values("id", "fingerprint", "payment_date", "shop", "transaction_type")
+            )
+            for row in rows:
+                group = groups.setdefault(
+                    row["fingerprint"],
+                    {
+                        "fingerprint": row["fingerprint"],
+                        "payment_date": row["payment_date"],
+                        "shop": row["shop"],
+                        "transaction_type": row["transaction_type"],
+                        "count": 0,
+                        "receipt_ids": [],
+                    },
+                )
+                group["count"] += 1
+                group["receipt_ids"].append(row["id"])
             return Response(
                 {
                     "status": "Duplikaty znalezione",
-                    "duplicates": list(duplicates),
+                    "duplicates": list(groups.values()),
                 },
                 status=status.HTTP_200_OK
             )
@@ -36,4 +64,14 @@ class DuplicateReceiptDebugView(APIView):
                 status=status.HTTP_200_OK
             )
 
-    
\ No newline at end of file
+
+class DatabasePoolStatsView(APIView):
+    """
+    Metryki puli połączeń z bazą w procesie, który obsłużył żądanie
+    (każdy worker gunicorna ma własną pulę). Tylko dla administratorów.
+    """
+    permission_classes = [IsAdminUser]
+    query_budget = 0
+
+    def get(self, request, *args, **kwargs):
+        return Response({"pid": os.getpid(), "databases": database_pool_stats()})
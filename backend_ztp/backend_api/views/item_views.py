@@ -1,10 +1,17 @@
 # myapp/views/item_views.py
+from django.conf import settings
+from django.db import transaction
 from rest_framework import viewsets
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from backend_api.models import Item
 from backend_api.serializers import ItemSerializer
 from backend_api.filters import ItemFilter  # zakładamy, że masz filtr ItemFilter
 from rest_framework.permissions import IsAuthenticated
+from backend_api import rollups
+from backend_api.caching import bump_data_version
+from backend_api.fingerprints import refresh_derived_fields
+from backend_api.listings import item_rows
 
 class ItemViewSet(viewsets.ModelViewSet):
     queryset = Item.objects.all()
@@ -12,9 +19,37 @@ class ItemViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = ItemFilter
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 3, "POST": 10, "PUT": 15, "PATCH": 15, "DELETE": 15}
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        # Szybka ścieżka odczytu: wiersze values_list w formacie ItemSerializer
+        return Response(item_rows(self.filter_queryset(self.get_queryset())))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        bump_data_version(self.request.user)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_contributions = rollups.item_contributions([serializer.instance])
+        item = serializer.save()
+        rollups.apply_contributions(
+            rollups.contribution_delta(old_contributions, rollups.item_contributions([item]))
+        )
+        if item.receipt_id:
+            refresh_derived_fields([item.receipt_id])
+        bump_data_version(self.request.user)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        rollups.apply_contributions(rollups.item_contributions([instance]), sign=-1)
+        receipt_id = instance.receipt_id
+        instance.delete()
+        if receipt_id:
+            refresh_derived_fields([receipt_id])
+        bump_data_version(self.request.user)
 
     def get_queryset(self):
         return Item.objects.filter(user=self.request.user)
\ No newline at end of file
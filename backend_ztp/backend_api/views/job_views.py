@@ -0,0 +1,25 @@
+# myapp/views/job_views.py
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from backend_api.models import Job
+from backend_api.serializers import JobSerializer
+
+
+class JobListView(generics.ListAPIView):
+    """Ostatnie zadania w tle użytkownika (najnowsze pierwsze)."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user).order_by("-created_at", "-id")[:50]
+
+
+class JobDetailView(generics.RetrieveAPIView):
+    """Status zadania do odpytywania po ``job_id`` zwróconym przez endpoint."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
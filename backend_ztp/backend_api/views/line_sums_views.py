@@ -1,4 +1,4 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from django.http import JsonResponse
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from backend_api.views.utils import (
@@ -6,11 +6,17 @@ from backend_api.views.utils import (
     get_all_dates_in_month,
     handle_error,
 )
-from backend_api.models import Receipt
+from backend_api.aggregations import daily_transaction_sums, cumulative_series
 from datetime import date
 from rest_framework.permissions import IsAuthenticated
+from backend_api.authentication import StatelessReadJWTAuthentication
+from backend_api.caching import cached_chart_response
+from backend_api.instrumentation import query_budget
+from backend_api.routers import read_replica
 
 
+@query_budget(3)
+@read_replica
 @extend_schema(
     methods=["GET"],
     parameters=[
@@ -29,7 +35,9 @@ from rest_framework.permissions import IsAuthenticated
     },
 )
 @api_view(["GET"])
+@authentication_classes([StatelessReadJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_chart_response("line-sums")
 def fetch_line_sums(request):
     try:
         # Pobierz wymagane parametry miesiąca i roku
@@ -49,47 +57,11 @@ def fetch_line_sums(request):
             for d in get_all_dates_in_month(selected_year, selected_month)
         ]
 
-        # Inicjalizacja słowników sum dla każdego dnia
-        daily_expense = {date: 0 for date in all_dates}
-        daily_income = {date: 0 for date in all_dates}
-
-        # Pobierz paragony, które zawierają itemy tego użytkownika
-        receipts = Receipt.objects.filter(
-            payment_date__month=selected_month,
-            payment_date__year=selected_year,
-            items__user=current_user,
-        ).distinct()
-
-        for receipt in receipts:
-            for item in receipt.items.all():
-                # Sprawdź, czy item należy do użytkownika
-                if item.user == current_user:
-                    value_per_owner = float(item.value)  # item ma 1 właściciela
-
-                    payment_date_str = (
-                        receipt.payment_date.isoformat()
-                        if isinstance(receipt.payment_date, date)
-                        else str(receipt.payment_date)
-                    )
-
-                    if receipt.transaction_type == "expense":
-                        daily_expense[payment_date_str] += value_per_owner
-                    elif receipt.transaction_type == "income":
-                        daily_income[payment_date_str] += value_per_owner
+        # Sumy dzienne liczone w bazie jednym zapytaniem (bez pętli po paragonach)
+        daily_sums = daily_transaction_sums(current_user, selected_year, selected_month)
 
         # Budujemy wynik z kumulacją
-        results = []
-        cumulative_expense = 0
-        cumulative_income = 0
-
-        for day_str in all_dates:
-            cumulative_expense += daily_expense[day_str]
-            cumulative_income += daily_income[day_str]
-            results.append({
-                "day": day_str,
-                "expense": round(cumulative_expense, 2),
-                "income": round(cumulative_income, 2),
-            })
+        results = cumulative_series(all_dates, daily_sums)
 
         return JsonResponse(results, safe=False, status=200)
     except Exception as e:
@@ -0,0 +1,90 @@
+# myapp/views/outlier_views.py
+from django.http import JsonResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from backend_api.authentication import StatelessReadJWTAuthentication
+
+from backend_api.caching import cached_chart_response
+from backend_api.filters import period_date_range
+from backend_api.instrumentation import query_budget
+from backend_api.routers import read_replica
+from backend_api.outliers import OUTLIER_MODES, statistical_outliers, top_receipts
+from backend_api.views.utils import handle_error
+
+MAX_OUTLIERS = 100
+
+
+def _outlier_params(request):
+    values = {}
+    for name, cast, default in (
+        ("year", int, None), ("month", int, None), ("k", int, 10), ("threshold", float, None)
+    ):
+        raw = request.GET.get(name)
+        try:
+            values[name] = default if raw is None else cast(raw)
+        except ValueError:
+            raise ValueError(f"Invalid value for parameter: {name}")
+
+    mode = request.GET.get("mode", "top")
+    if mode not in OUTLIER_MODES:
+        raise ValueError(f"Invalid mode: {mode}")
+    if values["month"] is not None and values["year"] is None:
+        raise ValueError("Missing parameter: year")
+    if values["month"] is not None and not 1 <= values["month"] <= 12:
+        raise ValueError("Invalid value for parameter: month")
+    if values["threshold"] is not None and values["threshold"] <= 0:
+        raise ValueError("threshold must be positive")
+
+    date_range = (
+        period_date_range(values["year"], values["month"]) if values["year"] is not None else None
+    )
+    return mode, max(1, min(values["k"], MAX_OUTLIERS)), values["threshold"], date_range
+
+
+@query_budget(3)
+@read_replica
+@extend_schema(
+    methods=["GET"],
+    parameters=[
+        OpenApiParameter(
+            name="mode",
+            description="top: największe paragony; zscore/iqr: nietypowe kwoty w kategorii",
+            required=False,
+            type=str,
+            enum=list(OUTLIER_MODES),
+        ),
+        OpenApiParameter(name="year", description="Wybrany rok", required=False, type=int),
+        OpenApiParameter(name="month", description="Wybrany miesiąc", required=False, type=int),
+        OpenApiParameter(name="k", description="Maksymalna liczba wyników", required=False, type=int),
+        OpenApiParameter(
+            name="threshold",
+            description="Próg z-score (domyślnie 3) lub mnożnik IQR (domyślnie 1.5)",
+            required=False,
+            type=float,
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description="Lista paragonów odstających"),
+        400: OpenApiResponse(description="Bad request"),
+        500: OpenApiResponse(description="Internal server error"),
+    },
+)
+@api_view(["GET"])
+@authentication_classes([StatelessReadJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@cached_chart_response("outliers")
+def fetch_outliers(request):
+    try:
+        mode, k, threshold, date_range = _outlier_params(request)
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        if mode == "top":
+            receipts = top_receipts(request.user, k, date_range)
+        else:
+            receipts = statistical_outliers(request.user, mode, threshold, date_range, limit=k)
+        return JsonResponse({"mode": mode, "receipts": receipts}, status=200)
+    except Exception as e:
+        return handle_error(e, 500, f"Błąd podczas wyszukiwania paragonów odstających: {str(e)}")
@@ -1,13 +1,18 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from django.http import JsonResponse
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
-from django.db.models import Sum
 from django.core.exceptions import ValidationError
 from backend_api.views.utils import get_query_params, handle_error
-from backend_api.models import Receipt
+from backend_api.aggregations import category_expense_sums
 from backend_api.serializers import CategoryPieExpenseSerializer
 from rest_framework.permissions import IsAuthenticated
+from backend_api.authentication import StatelessReadJWTAuthentication
+from backend_api.caching import cached_chart_response
+from backend_api.instrumentation import query_budget
+from backend_api.routers import read_replica
 
+@query_budget(3)
+@read_replica
 @extend_schema(
     methods=["GET"],
     parameters=[
@@ -25,50 +30,24 @@ from rest_framework.permissions import IsAuthenticated
     },
 )
 @api_view(["GET"])
+@authentication_classes([StatelessReadJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_chart_response("pie-categories")
 def fetch_pie_categories(request):
     try:
         # Parametry miesiąca i roku
         params = get_query_params(request, "month", "year")
         selected_month = params["month"]
         selected_year = params["year"]
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
 
-        # Filtrowanie paragonów użytkownika (uwzględnia tylko itemy usera)
-        receipts = Receipt.objects.filter(
-            transaction_type="expense",
-            payment_date__month=selected_month,
-            payment_date__year=selected_year,
-            items__user=request.user,
-        ).distinct()
-
-        # Pobieranie elementów powiązanych z paragonami
-        from backend_api.models import Item  # Dostosuj import do struktury projektu
-
-        item_qs = Item.objects.filter(receipt__in=receipts).distinct()
-
-        # Agregacja według kategorii
-        category_totals = {}
-        for item in item_qs:
-            if item.user == request.user:
-                category_totals[item.category] = category_totals.get(item.category, 0) + float(item.value)
-
-        # Lista wyników
-        aggregated_data = [
-            {
-                "category": category,
-                "expense_sum": round(total, 2),
-                "fill": f"var(--color-{category})",
-            }
-            for category, total in category_totals.items()
-        ]
-        aggregated_data.sort(key=lambda x: x["category"])
-
-        serializer = CategoryPieExpenseSerializer(data=aggregated_data, many=True)
-        if serializer.is_valid():
-            return JsonResponse(serializer.data, safe=False, status=200)
-        else:
-            return JsonResponse(serializer.errors, safe=False, status=400)
-
+    try:
+        # Agregacja według kategorii w bazie, bez iterowania po pozycjach
+        aggregated_data = category_expense_sums(
+            request.user, selected_year, selected_month
+        )
+        return JsonResponse(aggregated_data, safe=False, status=200)
     except ValidationError as e:
         return handle_error(e, 400, "Invalid category")
     except Exception as e:
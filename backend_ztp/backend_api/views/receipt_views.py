@@ -1,10 +1,18 @@
 # myapp/views/receipt_views.py
+from django.conf import settings
+from django.db import transaction
 from rest_framework import generics
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from backend_api.models import Receipt
 from backend_api.serializers import ReceiptSerializer
 from backend_api.filters import ReceiptFilter
+from backend_api.pagination import ReceiptKeysetPagination
+from backend_api.listings import RECEIPT_COLUMNS, receipt_rows
+from backend_api import rollups
+from backend_api.caching import bump_data_version
+from backend_api.fingerprints import DUPLICATE_POLICIES
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 
 class ReceiptListCreateView(generics.ListCreateAPIView):
@@ -13,17 +21,45 @@ class ReceiptListCreateView(generics.ListCreateAPIView):
     filter_backends = [DjangoFilterBackend]
     filterset_class = ReceiptFilter
     permission_classes = [IsAuthenticated]
+    pagination_class = ReceiptKeysetPagination
+    query_budget = {"GET": 3, "POST": 40}
     
+    def get_serializer_context(self):
+        # Lista paragonów: ?duplicates=skip pomija te, które użytkownik już ma
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method == "POST":
+            duplicates = self.request.query_params.get("duplicates", "flag")
+            if duplicates not in DUPLICATE_POLICIES:
+                raise ValidationError(
+                    {"duplicates": f"Allowed values: {', '.join(DUPLICATE_POLICIES)}"}
+                )
+            context["duplicates"] = duplicates
+        return context
+
     def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(
-            data=request.data, many=isinstance(request.data, list)
-        )
+        many = isinstance(request.data, list)
+        serializer = self.get_serializer(data=request.data, many=many)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        return Response(serializer.data, status=201)
+        headers = {"X-Duplicate-Receipts": str(serializer.duplicates)} if many else None
+        return Response(serializer.data, status=201, headers=headers)
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        if settings.FAST_READ_PATH:
+            # Szybka ścieżka odczytu: wiersze values_list zamiast instancji i serializera
+            rows = queryset.prefetch_related(None).values_list(*RECEIPT_COLUMNS, named=True)
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                return self.get_paginated_response(receipt_rows(page))
+            return Response(receipt_rows(rows))
+
+        # Paginacja tylko na życzenie (?cursor= / ?page_size=)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -31,12 +67,18 @@ class ReceiptListCreateView(generics.ListCreateAPIView):
         serializer.save()
         
     def get_queryset(self):
-        return Receipt.objects.filter(user=self.request.user).order_by("payment_date").distinct()
+        return (
+            Receipt.objects.filter(user=self.request.user)
+            .prefetch_related("items")
+            .order_by("payment_date", "id")
+            .distinct()
+        )
 
 class ReceiptUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Receipt.objects.all()
     serializer_class = ReceiptSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 3, "PUT": 40, "PATCH": 40, "DELETE": 20}
 
     def get_queryset(self):
         return Receipt.objects.filter(user=self.request.user).order_by("payment_date").distinct()
@@ -44,6 +86,9 @@ class ReceiptUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
         
+    @transaction.atomic
     def perform_destroy(self, instance):
+        rollups.apply_contributions(rollups.receipt_contributions(instance), sign=-1)
         instance.delete()
+        bump_data_version(self.request.user)
         return Response(status=204)
\ No newline at end of file
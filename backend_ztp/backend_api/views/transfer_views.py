@@ -0,0 +1,290 @@
+# myapp/views/transfer_views.py
+import csv
+import io
+import json
+import uuid
+from itertools import groupby
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import router
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework.parsers import MultiPartParser, FileUploadParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from backend_api import jobs
+from backend_api.fingerprints import DUPLICATE_POLICIES
+from backend_api.models import Receipt
+from backend_api.serializers import ReceiptSerializer
+
+FILE_FORMATS = ("ndjson", "csv")
+
+CSV_COLUMNS = [
+    "receipt_id",
+    "payment_date",
+    "shop",
+    "transaction_type",
+    "category",
+    "value",
+    "description",
+    "quantity",
+]
+
+ITEM_FIELDS = ("category", "value", "description", "quantity")
+
+
+class _Echo:
+    """Obiekt plikopodobny dla csv.writer zwracający zapisany wiersz."""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(user):
+    """
+    Płaskie wiersze (paragon + pozycja) czytane kursorem po stronie serwera.
+
+    Paragony bez pozycji dają jeden wiersz z pustymi polami pozycji.
+    """
+    # baza ustalana od razu: strumień jest czytany już po wyjściu z widoku (i routera żądania)
+    return (
+        Receipt.objects.using(router.db_for_read(Receipt))
+        .filter(user=user)
+        .values(
+            "id",
+            "payment_date",
+            "shop",
+            "transaction_type",
+            category=F("items__category"),
+            value=F("items__value"),
+            description=F("items__description"),
+            quantity=F("items__quantity"),
+        )
+        .order_by("payment_date", "id", "items__id")
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+
+
+def _stream_ndjson(rows):
+    for _, receipt_rows in groupby(rows, key=lambda row: row["id"]):
+        receipt_rows = list(receipt_rows)
+        first = receipt_rows[0]
+        receipt = {
+            "id": first["id"],
+            "payment_date": first["payment_date"].isoformat(),
+            "shop": first["shop"],
+            "transaction_type": first["transaction_type"],
+            "items": [
+                {
+                    "category": row["category"],
+                    "value": str(row["value"]),
+                    "description": row["description"],
+                    "quantity": str(row["quantity"]),
+                }
+                for row in receipt_rows
+                if row["category"] is not None
+            ],
+        }
+        yield json.dumps(receipt, ensure_ascii=False) + "\n"
+
+
+def _stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            [
+                row["id"],
+                row["payment_date"].isoformat(),
+                row["shop"],
+                row["transaction_type"],
+                row["category"] or "",
+                "" if row["value"] is None else row["value"],
+                row["description"] or "",
+                "" if row["quantity"] is None else row["quantity"],
+            ]
+        )
+
+
+def _read_ndjson(lines):
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            receipt = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Niepoprawny JSON w linii {line_number}: {e}")
+        receipt.pop("id", None)
+        yield receipt
+
+
+def _read_csv(lines):
+    reader = csv.DictReader(lines)
+    missing = set(CSV_COLUMNS[1:]) - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Brak kolumn CSV: {', '.join(sorted(missing))}")
+
+    # Kolejne wiersze z tym samym receipt_id tworzą jeden paragon
+    for _, rows in groupby(reader, key=lambda row: row.get("receipt_id") or object()):
+        rows = list(rows)
+        first = rows[0]
+        yield {
+            "payment_date": first["payment_date"],
+            "shop": first["shop"],
+            "transaction_type": first["transaction_type"],
+            "items": [
+                {field: row[field] for field in ITEM_FIELDS}
+                for row in rows
+                if row["category"]
+            ],
+        }
+
+
+class ReceiptExportView(APIView):
+    """
+    Strumieniowy eksport paragonów użytkownika (z pozycjami) jako NDJSON lub CSV.
+
+    Dane są czytane kursorem i wysyłane kawałkami, więc zużycie pamięci
+    nie zależy od długości historii.
+    """
+    permission_classes = [IsAuthenticated]
+    # użytkownik z tokenu i odczyt wierszy (wykonywany dopiero przy wysyłaniu strumienia)
+    query_budget = 2
+    read_replica = True
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                description="Format pliku",
+                required=False,
+                type=str,
+                enum=list(FILE_FORMATS),
+            ),
+        ],
+        responses={200: OpenApiResponse(description="Strumień NDJSON lub CSV")},
+    )
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get("file_format", "ndjson")
+        if file_format not in FILE_FORMATS:
+            return JsonResponse({"error": f"Nieobsługiwany format: {file_format}"}, status=400)
+
+        rows = _export_rows(request.user)
+        if file_format == "csv":
+            response = StreamingHttpResponse(_stream_csv(rows), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(
+                _stream_ndjson(rows), content_type="application/x-ndjson"
+            )
+        response["Content-Disposition"] = f'attachment; filename="receipts.{file_format}"'
+        return response
+
+
+class ReceiptImportError(ValueError):
+    """Błąd importu z liczbą paragonów i pozycji zapisanych przed błędem."""
+
+    def __init__(self, message, imported_receipts, imported_items):
+        super().__init__(message)
+        self.imported_receipts = imported_receipts
+        self.imported_items = imported_items
+
+
+def import_receipts(user, binary_file, file_format, duplicates="flag"):
+    """
+    Importuje paragony z pliku binarnego paczkami po ``BULK_IMPORT_BATCH_SIZE``.
+
+    Każda paczka to osobna transakcja. Paragony, które użytkownik już ma
+    (ten sam odcisk treści), są zliczane w ``duplicate_receipts``; przy
+    ``duplicates="skip"`` nie są zapisywane. Zwraca liczniki zaimportowanych
+    paragonów, pozycji i duplikatów; przy błędzie rzuca ``ReceiptImportError``.
+    """
+    lines = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    reader = _read_csv(lines) if file_format == "csv" else _read_ndjson(lines)
+    context = {"request": SimpleNamespace(user=user), "duplicates": duplicates}
+
+    counts = {"imported_receipts": 0, "imported_items": 0, "duplicate_receipts": 0}
+    read_receipts = 0
+    batch = []
+    try:
+        for receipt in reader:
+            batch.append(receipt)
+            if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+                _commit_batch(context, batch, read_receipts, counts)
+                read_receipts += len(batch)
+                batch = []
+        if batch:
+            _commit_batch(context, batch, read_receipts, counts)
+    except ValueError as e:
+        raise ReceiptImportError(str(e), counts["imported_receipts"], counts["imported_items"])
+    return counts
+
+
+def _commit_batch(context, batch, read_receipts, counts):
+    serializer = ReceiptSerializer(data=batch, many=True, context=context)
+    if not serializer.is_valid():
+        errors = [
+            f"paragon {read_receipts + index + 1}: {error}"
+            for index, error in enumerate(serializer.errors)
+            if error
+        ]
+        raise ValueError("; ".join(errors))
+    receipts = serializer.save()
+    counts["imported_receipts"] += len(receipts)
+    counts["imported_items"] += sum(stats["items"] for stats in serializer.import_stats)
+    counts["duplicate_receipts"] += serializer.duplicates
+
+
+class ReceiptImportView(APIView):
+    """
+    Import paragonów z pliku NDJSON lub CSV (np. z eksportu innej instancji).
+
+    Plik jest czytany przyrostowo, a paragony zapisywane paczkami po
+    ``BULK_IMPORT_BATCH_SIZE``; każda paczka to osobna transakcja.
+    Pliki większe niż IMPORT_BACKGROUND_THRESHOLD (lub z ``?background=1``)
+    są importowane w tle: odpowiedź 202 zawiera ``job_id``.
+    ``?duplicates=skip`` pomija paragony, które użytkownik już ma;
+    domyślnie (``flag``) są zapisywane i zliczane w ``duplicate_receipts``.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FileUploadParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return JsonResponse({"error": "Brak pliku (pole 'file')"}, status=400)
+
+        file_format = request.GET.get("file_format") or (
+            "csv" if upload.name.lower().endswith(".csv") else "ndjson"
+        )
+        if file_format not in FILE_FORMATS:
+            return JsonResponse({"error": f"Nieobsługiwany format: {file_format}"}, status=400)
+        duplicates = request.GET.get("duplicates", "flag")
+        if duplicates not in DUPLICATE_POLICIES:
+            return JsonResponse({"error": f"Nieobsługiwana wartość duplicates: {duplicates}"}, status=400)
+
+        if request.GET.get("background") == "1" or upload.size > settings.IMPORT_BACKGROUND_THRESHOLD:
+            path = default_storage.save(f"imports/{uuid.uuid4().hex}.{file_format}", upload)
+            job = jobs.enqueue(
+                "import_receipts",
+                user=request.user,
+                payload={"path": path, "file_format": file_format, "duplicates": duplicates},
+            )
+            return JsonResponse({"job_id": job.id, "status": job.status}, status=202)
+
+        try:
+            counts = import_receipts(request.user, upload.file, file_format, duplicates)
+        except ReceiptImportError as e:
+            return JsonResponse(
+                {
+                    "error": str(e),
+                    "imported_receipts": e.imported_receipts,
+                    "imported_items": e.imported_items,
+                },
+                status=400,
+            )
+        return JsonResponse(counts, status=201)
@@ -0,0 +1,98 @@
+# myapp/views/trends_views.py
+from datetime import date
+
+from django.conf import settings
+from django.http import JsonResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from backend_api.authentication import StatelessReadJWTAuthentication
+
+from backend_api.caching import cached_chart_response
+from backend_api.instrumentation import query_budget
+from backend_api.routers import read_replica
+from backend_api.trends import GRANULARITIES, MAX_DATE, MIN_DATE, compute_trends, period_count
+from backend_api.views.utils import handle_error
+
+
+def _trend_params(request):
+    try:
+        start = date.fromisoformat(request.GET["start"])
+        end = date.fromisoformat(request.GET["end"])
+    except KeyError as e:
+        raise ValueError(f"Missing parameter: {e.args[0]}")
+    except ValueError:
+        raise ValueError("Invalid date, expected YYYY-MM-DD")
+    if start > end:
+        raise ValueError("start must not be after end")
+    if start < MIN_DATE or end > MAX_DATE:
+        raise ValueError(f"Dates must be between {MIN_DATE} and {MAX_DATE}")
+
+    granularity = request.GET.get("granularity", "month")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}")
+    try:
+        window = int(request.GET.get("window", 3))
+    except ValueError:
+        raise ValueError("Invalid value for parameter: window")
+    if not 1 <= window <= 366:
+        raise ValueError("window must be between 1 and 366")
+    if period_count(start, end, granularity) > settings.TRENDS_MAX_PERIODS:
+        raise ValueError(f"Range exceeds {settings.TRENDS_MAX_PERIODS} periods")
+
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "window": window,
+        "categories": request.GET.getlist("category[]"),
+        "shops": request.GET.getlist("shop[]"),
+    }
+
+
+@query_budget(3)
+@read_replica
+@extend_schema(
+    methods=["GET"],
+    parameters=[
+        OpenApiParameter(name="start", description="Początek zakresu (YYYY-MM-DD)", required=True, type=str),
+        OpenApiParameter(name="end", description="Koniec zakresu (YYYY-MM-DD)", required=True, type=str),
+        OpenApiParameter(
+            name="granularity",
+            description="Długość okresu",
+            required=False,
+            type=str,
+            enum=list(GRANULARITIES),
+        ),
+        OpenApiParameter(
+            name="window", description="Liczba okresów średniej kroczącej", required=False, type=int
+        ),
+        OpenApiParameter(
+            name="category[]", description="Wybrane kategorie", required=False, type=str, many=True
+        ),
+        OpenApiParameter(
+            name="shop[]", description="Wybrane sklepy", required=False, type=str, many=True
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description="Sumy per okres, średnie kroczące, zmiany okres do okresu i udziały kategorii"
+        ),
+        400: OpenApiResponse(description="Bad request"),
+        500: OpenApiResponse(description="Internal server error"),
+    },
+)
+@api_view(["GET"])
+@authentication_classes([StatelessReadJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@cached_chart_response("trends")
+def fetch_trends(request):
+    try:
+        params = _trend_params(request)
+    except ValueError as e:
+        return handle_error(e, 400, "Niepoprawne parametry zapytania")
+
+    try:
+        return JsonResponse(compute_trends(request.user, **params), status=200)
+    except Exception as e:
+        return handle_error(e, 500, f"Błąd podczas przetwarzania danych: {str(e)}")
@@ -55,8 +55,9 @@ def get_top_outlier_receipts(receipt_ids, num_top=3):
         Receipt,
     )  # importuj lokalnie, aby uniknąć cyklicznych zależności
 
-    receipts = Receipt.objects.filter(id__in=receipt_ids).prefetch_related("items")
-    sorted_receipts = sorted(
-        receipts, key=lambda r: sum(item.value for item in r.items.all()), reverse=True
-    )
-    return [r.id for r in sorted_receipts[:num_top]]
+    # Zapisana suma paragonu: sortowanie i LIMIT w bazie, bez ładowania pozycji
+    return list(
+        Receipt.objects.filter(id__in=receipt_ids)
+        .order_by("-total", "-id")
+        .values_list("id", flat=True)[:num_top]
+    )
\ No newline at end of file
@@ -0,0 +1,19 @@
+# backend_api/worker_process.py
+# Funkcje uruchamiane w procesach potomnych ``runworker`` (kontekst spawn).
+# Moduł nie importuje modeli na poziomie modułu, bo proces startuje bez Django.
+import django
+
+
+def init_process():
+    django.setup()
+
+
+def run_job(job_id):
+    from django.db import close_old_connections
+
+    from backend_api.jobs import execute_job
+
+    try:
+        return execute_job(job_id)
+    finally:
+        close_old_connections()
@@ -4,8 +4,8 @@
 set -e
 
 echo "Applying migrations..."
-python manage.py makemigrations
 python manage.py migrate
+python manage.py rebuild_rollups --if-empty
 
 echo "Starting server..."
 exec "$@"
@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+"""
+Profil serwowania produkcyjnego (gunicorn), zamiast ``manage.py runserver``.
+
+WSGI – widoki DRF, workery wątkowe:
+    gunicorn -c gunicorn.conf.py
+ASGI – fetch/* i GET wyszukiwarek jako widoki async, workery uvicorn:
+    SERVER_INTERFACE=asgi gunicorn -c gunicorn.conf.py
+albo bez gunicorna:
+    uvicorn wydatki_ztp.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Zmienne środowiskowe:
+    SERVER_INTERFACE  wsgi (domyślnie) albo asgi
+    WEB_CONCURRENCY   liczba procesów (domyślnie 2 * CPU + 1)
+    WEB_THREADS       wątki procesu WSGI (domyślnie 4); ASGI obsługuje
+                      wiele żądań w pętli zdarzeń jednego procesu
+    BIND / PORT       adres nasłuchu (domyślnie 0.0.0.0:8000)
+    WEB_TIMEOUT, WEB_MAX_REQUESTS, WEB_ACCESS_LOG
+    WEB_RELOAD        1 = przeładowanie po zmianie kodu (tylko dev)
+
+Każdy worker ma własną pulę połączeń z bazą (DB_POOL_*, patrz settings), więc
+WEB_CONCURRENCY * DB_POOL_MAX_SIZE musi mieścić się w max_connections. Pula
+powstaje leniwie w workerze, dlatego nie używamy ``preload_app``.
+"""
+import multiprocessing
+import os
+
+interface = os.environ.get("SERVER_INTERFACE", "wsgi")
+if interface not in ("wsgi", "asgi"):
+    raise ValueError(f"SERVER_INTERFACE must be wsgi or asgi, got {interface!r}")
+
+if interface == "asgi":
+    wsgi_app = "wydatki_ztp.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "wydatki_ztp.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.environ.get("WEB_THREADS", 4))
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = timeout
+keepalive = 5
+# okresowy restart workera ogranicza skutki wycieków pamięci
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+accesslog = "-" if os.environ.get("WEB_ACCESS_LOG", "0") == "1" else None
+errorlog = "-"
+reload = os.environ.get("WEB_RELOAD", "0") == "1"
+
+
+def worker_exit(server, worker):
+    # zamknięcie puli przy restarcie workera (max_requests, HUP) zamiast zrywania połączeń
+    from django.db import connections
+
+    for connection in connections.all():
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wydatki_ztp.settings')
+# Pod ASGI endpointy odczytu (fetch/*, wyszukiwarki) działają jako widoki async
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -11,12 +11,15 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import copy
 import os
 import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+# Pliki przekazywane do zadań w tle (np. importy) - współdzielone przez web i worker
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 
 
 # Quick-start development settings - unsuitable for production
@@ -40,6 +43,9 @@ LOGGING = {
             "class": "logging.FileHandler",
             "filename": "django_error.log",
         },
+        "console": {
+            "class": "logging.StreamHandler",
+        },
     },
     "loggers": {
         "django": {
@@ -47,9 +53,25 @@ LOGGING = {
             "level": "ERROR",
             "propagate": True,
         },
+        "backend_api": {
+            "handlers": ["console"],
+            "level": os.environ.get("BACKEND_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        # jedna linia JSON na żądanie (RequestMetricsMiddleware)
+        "backend_api.requests": {
+            "handlers": ["console"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
     },
 }
 
+# Pomiar żądań: liczba zapytań, czasy, Server-Timing, wykrywanie N+1
+REQUEST_METRICS_ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "1") == "1"
+# Ile powtórzeń tego samego szablonu zapytania w żądaniu uznajemy za N+1
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get("REQUEST_METRICS_N_PLUS_ONE_THRESHOLD", 5))
+
 
 ALLOWED_HOSTS = ["192.168.100.4", "localhost", "127.0.0.1"]
 
@@ -70,10 +92,11 @@ INSTALLED_APPS = [
     "rest_framework",
     "drf_spectacular",
     "django_filters",
-    "django_crontab",
 ]
 
 MIDDLEWARE = [
+    "backend_api.instrumentation.RequestMetricsMiddleware",
+    "backend_api.routers.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -103,11 +126,20 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "wydatki_ztp.wsgi.application"
+ASGI_APPLICATION = "wydatki_ztp.asgi.application"
+
+# fetch/* i GET wyszukiwarek jako widoki async (async ORM); włączane domyślnie
+# przez wydatki_ztp/asgi.py, pod WSGI zostają widoki DRF
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "0") == "1"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DB_POOL=1: pula połączeń psycopg 3 (DB_POOL_*); DB_POOL=0: trwałe połączenia
+# per wątek (DB_CONN_MAX_AGE sekund, 0 = nowe połączenie w każdym żądaniu)
+DB_POOL = os.environ.get("DB_POOL", "1") == "1"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -116,9 +148,80 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASSWORD", "mypassword"),
         "HOST": os.environ.get("DB_HOST", "localhost"),
         "PORT": os.environ.get("DB_PORT", "5432"),
+        # przy puli połączenia trzyma pula, więc CONN_MAX_AGE musi być 0
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        # sprawdzenie połączenia przed użyciem (przy puli: check przy wydaniu z puli)
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_HEALTH_CHECKS", "1") == "1",
+        "OPTIONS": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        },
+    }
+}
+if DB_POOL:
+    # Pula psycopg 3 jest osobna w każdym procesie (worker gunicorna, proces kolejki),
+    # więc WEB_CONCURRENCY * DB_POOL_MAX_SIZE musi mieścić się w max_connections
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        # ile sekund żądanie czeka na wolne połączenie, zanim dostanie błąd
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", 3600)),
+    }
+
+# Repliki tylko do odczytu: DB_REPLICA_HOSTS="host[:port],..." (baza i logowanie jak w DB_*).
+# Czytają z nich fetch/*, GET wyszukiwarek i eksport (backend_api.routers)
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    host, _, port = address.strip().partition(":")
+    DATABASES[f"replica{index}"] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["backend_api.routers.ReplicaRouter"]
+# Po zapisie użytkownika jego odczyty idą do bazy głównej przez tyle sekund
+# (powinno przekraczać typowe opóźnienie replikacji)
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "wydatki-ztp"),
     }
 }
 
+# Liczba paragonów wstawianych jednym bulk_create przy imporcie listy
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get("BULK_IMPORT_BATCH_SIZE", 500))
+
+# Paginacja keyset listy paragonów (włączana parametrem ?cursor= / ?page_size=)
+RECEIPT_PAGE_SIZE = int(os.environ.get("RECEIPT_PAGE_SIZE", 100))
+RECEIPT_MAX_PAGE_SIZE = int(os.environ.get("RECEIPT_MAX_PAGE_SIZE", 1000))
+
+# Rozmiar paczki wierszy czytanych kursorem przy eksporcie paragonów
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+
+# Autosugestie (recent-shops/, item-predictions/): domyślna i maksymalna liczba wyników
+SEARCH_LIMIT = int(os.environ.get("SEARCH_LIMIT", 10))
+SEARCH_MAX_LIMIT = int(os.environ.get("SEARCH_MAX_LIMIT", 50))
+# Indeks autosugestii w pamięci procesu (poza PostgreSQL używany zawsze)
+AUTOSUGGEST_IN_MEMORY = os.environ.get("AUTOSUGGEST_IN_MEMORY", "0") == "1"
+AUTOSUGGEST_MEMORY_CAP_MB = int(os.environ.get("AUTOSUGGEST_MEMORY_CAP_MB", 64))
+# Jak często (s) indeks sprawdza w bazie wersję danych użytkownika
+AUTOSUGGEST_REFRESH_SECONDS = float(os.environ.get("AUTOSUGGEST_REFRESH_SECONDS", 5))
+
+# Czas życia odpowiedzi fetch/* w cache (sekundy); unieważniane też przez UserDataVersion
+CHART_CACHE_TIMEOUT = int(os.environ.get("CHART_CACHE_TIMEOUT", 300))
+
+# Limit liczby okresów w odpowiedzi fetch/trends/ (np. ~13 lat przy granularity=day)
+TRENDS_MAX_PERIODS = int(os.environ.get("TRENDS_MAX_PERIODS", 5000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -187,10 +290,25 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "backend_api.authentication.CachedJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "backend_api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
 }
 
+# Użytkownik tokenu JWT z pamięci procesu zamiast SELECT z auth_user w każdym żądaniu
+# (backend_api.authentication); zmiany konta z innych procesów widać po TTL sekundach
+AUTH_USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", 30))
+AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 10000))
+# GET fetch/* i wyszukiwarek ufają podpisanym claimom tokenu, bez sprawdzania konta w bazie;
+# usunięcie i dezaktywację konta widać przez znacznik we współdzielonym CACHE_BACKEND
+JWT_STATELESS_READS = os.environ.get("JWT_STATELESS_READS", "0") == "1"
+
+# GET /api/receipts/ i /api/items/ budowane z values_list zamiast serializerów DRF
+FAST_READ_PATH = os.environ.get("FAST_READ_PATH", "1") == "1"
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Expense Tracker API",
     "DESCRIPTION": "Your project description",
@@ -199,17 +317,51 @@ SPECTACULAR_SETTINGS = {
     # OTHER SETTINGS
 }
 
-CRONJOBS = [
-    ("0 0 * * *", "backend_api.cron.update_instruments_prices"),
-]
-
-if "test" in sys.argv or "test_coverage" in sys.argv:
+# Kolejka zadań w tle (backend_api.jobs, manage.py runworker)
+JOB_WORKER_PROCESSES = int(os.environ.get("JOB_WORKER_PROCESSES", 2))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+# Opóźnienie ponowienia: JOB_RETRY_BACKOFF * 2^(próba - 1) sekund
+JOB_RETRY_BACKOFF = int(os.environ.get("JOB_RETRY_BACKOFF", 30))
+# Zadania "running" starsze niż tyle sekund wracają do kolejki; worker sprawdza to
+# przy starcie i co JOB_STALE_CHECK_INTERVAL sekund
+JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 3600))
+JOB_STALE_CHECK_INTERVAL = int(os.environ.get("JOB_STALE_CHECK_INTERVAL", 60))
+# Zadania cykliczne: {nazwa zadania: interwał w sekundach} (zamiast django-crontab),
+# jedno na każdy pełny okres liczony od epoki Unix
+JOB_SCHEDULE = {
+    "update_instruments_prices": 24 * 60 * 60,
+}
+# Notowania instrumentów (backend_api.quotes)
+QUOTE_PROVIDER = os.environ.get("QUOTE_PROVIDER", "backend_api.quotes.YFinanceQuoteProvider")
+# Plik JSON/CSV dla FileQuoteProvider (praca offline)
+QUOTE_FIXTURE_PATH = os.environ.get("QUOTE_FIXTURE_PATH", os.path.join(BASE_DIR, "quotes.json"))
+QUOTE_CACHE_TTL = int(os.environ.get("QUOTE_CACHE_TTL", 15 * 60))
+QUOTE_MAX_WORKERS = int(os.environ.get("QUOTE_MAX_WORKERS", 8))
+
+# Importy plików większych niż tyle bajtów idą do kolejki
+IMPORT_BACKGROUND_THRESHOLD = int(os.environ.get("IMPORT_BACKGROUND_THRESHOLD", 5 * 1024 * 1024))
+
+# TEST_USE_POSTGRES=1 uruchamia testy na PostgreSQL z DB_* (np. testy planów zapytań)
+if ("test" in sys.argv or "test_coverage" in sys.argv) and not os.environ.get("TEST_USE_POSTGRES"):
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": ":memory:",
-        }
+        },
+        # osobna baza udająca replikę (testy routingu włączają ją przez DATABASE_REPLICAS)
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        },
     }
+    DATABASE_REPLICAS = []
+
+if "test" in sys.argv or "test_coverage" in sys.argv:
+    LOGGING["loggers"]["backend_api"]["level"] = "WARNING"
+    LOGGING["loggers"]["backend_api.requests"]["level"] = "ERROR"
+    AUTOSUGGEST_REFRESH_SECONDS = 0
+    JOB_SCHEDULE = {}
 
 DJOSER = {
   "TOKEN_MODEL": None